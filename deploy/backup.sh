@@ -30,6 +30,9 @@ $COMPOSE exec -T db mysqldump -uroot -p"$MYSQL_ROOT_PASSWORD" --single-transacti
   > "$OUT_DIR/db.sql"
 
 echo "Backing up uploaded files..."
-tar -czf "$OUT_DIR/upload.tar.gz" -C "$ROOT_DIR/server" upload
+# .partial 是未完成的上传；sitemap 和 img/_v（衍生图）可由 build_sitemaps / build_image_variants 重新生成
+tar -czf "$OUT_DIR/upload.tar.gz" -C "$ROOT_DIR/server" \
+  --exclude=upload/.partial --exclude=upload/sitemap --exclude=upload/img/_v \
+  upload
 
 echo "Backup created: $OUT_DIR"
@@ -72,3 +72,8 @@ tar -xzf "$BACKUP_DIR/upload.tar.gz" -C "$ROOT_DIR/server"
 
 echo "Done. Restarting containers..."
 $COMPOSE up -d
+
+# 备份里不含衍生图和站点地图分片，恢复后重新生成
+echo "Rebuilding image variants and sitemap..."
+$COMPOSE exec -T api python manage.py build_image_variants || echo "WARN: build_image_variants failed"
+$COMPOSE exec -T api python manage.py build_sitemaps || echo "WARN: build_sitemaps failed"
@@ -9,9 +9,18 @@ if [ -n "${DB_HOST}" ]; then
   done
 fi
 
+# 带参数启动时直接执行该命令（如 docker-compose 中的 mailer 服务），迁移由 api 服务负责
+if [ "$#" -gt 0 ]; then
+  exec "$@"
+fi
+
 echo "Running migrations..."
 python manage.py migrate --noinput
 
+# 首次部署（或索引表为空）时建立商品搜索索引，之后由后台写商品时增量维护
+echo "Building search index if empty..."
+python manage.py rebuild_search_index --if-empty
+
 if [ "${AUTO_INIT_ADMIN:-0}" = "1" ]; then
   echo "Initializing admin user..."
   python manage.py init_admin
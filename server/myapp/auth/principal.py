@@ -0,0 +1,63 @@
+# -*- coding:utf-8 -*-
+"""后台令牌 -> 管理员信息
+
+resolve(request) 每个请求只解析一次（结果挂在请求上，认证和演示帐号判断共用），
+跨请求按 token 缓存在 cache_ns.NS_ADMIN，有效期不超过 ADMIN_PRINCIPAL_CACHE_SECONDS，
+也不超过令牌本身的 exp。登录换发令牌、改密码、修改或删除帐号时调用 revoke() 作废。
+查不到的令牌不缓存，避免被随机令牌刷满缓存。
+"""
+from django.conf import settings
+
+from myapp import cache_ns, utils
+from myapp.models import User
+
+_MISSING = object()
+
+
+def _load(token):
+    row = User.objects.filter(admin_token=token).values('id', 'username', 'role', 'status', 'exp').first()
+    if row is None:
+        return None
+    try:
+        row['exp'] = int(row['exp'] or 0)
+    except (TypeError, ValueError):
+        row['exp'] = 0
+    return row
+
+
+def get(token):
+    """返回未过期令牌对应的 {id, username, role, status, exp}，否则 None"""
+    if not token:
+        return None
+    now = utils.get_timestamp()
+    principal = cache_ns.get(cache_ns.NS_ADMIN, token)
+    if principal is None:
+        principal = _load(token)
+        if principal is None:
+            return None
+        ttl = min(getattr(settings, 'ADMIN_PRINCIPAL_CACHE_SECONDS', 300), (principal['exp'] - now) // 1000)
+        if ttl > 0:
+            cache_ns.put(cache_ns.NS_ADMIN, token, principal, ttl)
+    if principal['exp'] < now:
+        return None
+    return principal
+
+
+def resolve(request):
+    """当前请求的管理员信息（每个请求只查一次）"""
+    principal = getattr(request, 'admin_principal', _MISSING)
+    if principal is _MISSING:
+        principal = get(request.META.get('HTTP_ADMINTOKEN'))
+        # DRF 的 Request 会把属性读取转发给底层 HttpRequest，挂在底层上两边都能读到
+        setattr(getattr(request, '_request', request), 'admin_principal', principal)
+    return principal
+
+
+def revoke(*tokens):
+    tokens = [t for t in tokens if t]
+    if tokens:
+        cache_ns.delete_many(cache_ns.NS_ADMIN, tokens)
+
+
+def revoke_users(user_ids):
+    revoke(*User.objects.filter(id__in=user_ids).values_list('admin_token', flat=True))
@@ -0,0 +1,149 @@
+"""带命名空间与标签失效的缓存封装
+
+所有 worker 共用 settings.CACHES['default']（默认本机文件缓存）。
+每条缓存记录所依赖标签的版本号（应在计算数据之前用 versions() 取得），读取时比对当前版本，
+任一标签被 invalidate_tags() 升级后该条缓存即视为未命中。
+这样编辑产品只会让依赖 'thing' 的缓存失效，不会波及其它键。
+"""
+import uuid
+
+from django.core.cache import cache
+
+# 命名空间
+NS_SECTION = 'section'  # 前台 section 接口
+NS_SITEMAP = 'sitemap'
+NS_I18N = 'i18n'
+NS_COUNT = 'count'  # 列表总数缓存（myapp.pagination）
+NS_LISTING = 'listing'  # 前台商品列表快照（myapp.listing）
+NS_ORDER = 'order'  # 前台订单查询读模型（myapp.order_lookup）
+NS_ADMIN = 'admin'  # 后台令牌 -> 管理员信息（myapp.auth.principal）
+
+# 标签（一般与被编辑的数据类型对应）
+TAG_THING = 'thing'
+TAG_CATEGORY = 'category'
+TAG_NEWS = 'news'
+TAG_CASE = 'case'
+TAG_FAQ = 'faq'
+TAG_DOWNLOAD = 'download'
+TAG_COMMENT = 'comment'
+TAG_ADVANTAGE = 'advantage'
+TAG_INQUIRY = 'inquiry'
+TAG_SITE = 'site'  # BasicSite/BasicTdk/BasicBanner/BasicGlobal/BasicAdditional/About/ShopSettings
+TAG_I18N = 'i18n'
+TAG_I18N_DELETE = 'i18n.delete'  # 仅在删除译文时升级，触发译文包全量重建
+TAG_USER = 'user'
+
+# clear_namespaces() 默认清理的内容类命名空间（不含后台令牌）
+CONTENT_NAMESPACES = (NS_SECTION, NS_SITEMAP, NS_I18N, NS_COUNT, NS_LISTING)
+
+
+def make_key(namespace, key):
+    return f"{namespace}:{key}"
+
+
+def _tag_key(tag):
+    return f"tag:{tag}"
+
+
+def _ns_tag(namespace):
+    return f"ns.{namespace}"
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def tag_versions(tags):
+    """返回 {tag: version}，不存在的标签会被初始化"""
+    tags = list(tags)
+    if not tags:
+        return {}
+    keys = [_tag_key(t) for t in tags]
+    found = cache.get_many(keys)
+    versions = {}
+    for tag, k in zip(tags, keys):
+        v = found.get(k)
+        if v is None:
+            cache.add(k, _new_version(), None)
+            v = cache.get(k)
+        versions[tag] = v
+    return versions
+
+
+def tag_version(tag):
+    return tag_versions([tag])[tag]
+
+
+def get(namespace, key, default=None):
+    entry = cache.get(make_key(namespace, key))
+    if entry is None:
+        return default
+    try:
+        versions, value = entry
+    except (TypeError, ValueError):
+        return default
+    if versions and tag_versions(versions.keys()) != versions:
+        return default
+    return value
+
+
+def versions(namespace, tags=()):
+    """
+    在计算要缓存的数据之前调用，把结果作为 token 传给 put()/put_many()。
+    计算期间若有标签被升级，写入的条目带的是旧版本，下次读取即失效，
+    不会把按旧数据算出的结果登记在新版本下
+    """
+    return tag_versions([_ns_tag(namespace)] + [t for t in tags if t])
+
+
+def put(namespace, key, value, timeout, tags=(), token=None):
+    token = token if token is not None else versions(namespace, tags)
+    cache.set(make_key(namespace, key), (token, value), timeout)
+
+
+def get_many(namespace, keys):
+    """批量读取，返回 {key: value}，只包含命中且版本有效的条目"""
+    keys = list(keys)
+    if not keys:
+        return {}
+    found = cache.get_many([make_key(namespace, k) for k in keys])
+    entries = {}
+    tags = {}
+    for k in keys:
+        entry = found.get(make_key(namespace, k))
+        try:
+            versions, value = entry
+        except (TypeError, ValueError):
+            continue
+        entries[k] = (versions, value)
+        tags.update(versions or {})
+    current = tag_versions(tags.keys())
+    return {
+        k: value for k, (versions, value) in entries.items()
+        if all(current.get(t) == v for t, v in (versions or {}).items())
+    }
+
+
+def put_many(namespace, mapping, timeout, tags=(), token=None):
+    if not mapping:
+        return
+    token = token if token is not None else versions(namespace, tags)
+    cache.set_many({make_key(namespace, k): (token, v) for k, v in mapping.items()}, timeout)
+
+
+def delete(namespace, key):
+    cache.delete(make_key(namespace, key))
+
+
+def delete_many(namespace, keys):
+    cache.delete_many([make_key(namespace, k) for k in keys])
+
+
+def invalidate_tags(*tags):
+    for tag in tags:
+        if tag:
+            cache.set(_tag_key(tag), _new_version(), None)
+
+
+def clear_namespaces(*namespaces):
+    invalidate_tags(*[_ns_tag(ns) for ns in (namespaces or CONTENT_NAMESPACES)])
@@ -0,0 +1,82 @@
+# -*- coding:utf-8 -*-
+"""进程内分类树
+
+一次 Category 全表扫描构建出整棵树，预先算好子分类顺序、层级和所有后代 id，
+替代原来逐层递归查库的 get_all_category_ids 和 CategorySerializer.get_children。
+树按 TAG_CATEGORY 版本号缓存在每个 worker 内，admin 增删改分类后下一次访问重建，
+重建完成后整体替换引用，读者不会看到半成品。
+"""
+import threading
+
+from myapp import cache_ns
+from myapp.models import Category
+
+ROOT_PID = -1
+
+_FIELDS = ('id', 'pid', 'title', 'sort', 'cover')
+
+
+class CategoryTree(object):
+
+    def __init__(self, rows):
+        self.nodes = {r['id']: r for r in rows}
+
+        # 子分类按 (sort, -id) 排序，与原 CategorySerializer 一致
+        self.children = {}
+        for r in sorted(rows, key=lambda x: (x['sort'], -x['id'])):
+            self.children.setdefault(r['pid'], []).append(r['id'])
+
+        # 从根向下遍历，得到层级和后代集合；挂在不存在父分类下的孤儿节点不可达，与原逻辑一致
+        self.depth = {}
+        self.descendants = {}
+        order = []
+        stack = [(cid, 1) for cid in reversed(self.children.get(ROOT_PID, []))]
+        while stack:
+            cid, d = stack.pop()
+            if cid in self.depth:
+                continue  # 防御 pid 成环的脏数据
+            self.depth[cid] = d
+            order.append(cid)
+            stack.extend((sub, d + 1) for sub in reversed(self.children.get(cid, [])))
+        for cid in reversed(order):
+            ids = {cid}
+            for sub in self.children.get(cid, []):
+                ids |= self.descendants.get(sub, {sub})
+            self.descendants[cid] = frozenset(ids)
+
+    def descendant_ids(self, category_id):
+        """分类自身及其所有子孙分类的 id"""
+        try:
+            category_id = int(category_id)
+        except (TypeError, ValueError):
+            return []
+        return list(self.descendants.get(category_id, (category_id,)))
+
+    def children_of(self, pid=ROOT_PID):
+        """有序的直接子分类，返回新的 dict，调用方可以随意修改"""
+        return [dict(self.nodes[cid]) for cid in self.children.get(pid, [])]
+
+    def serialize(self, pid=ROOT_PID):
+        """嵌套结构，字段与 CategorySerializer 一致，没有子分类时 children 为 None"""
+        result = []
+        for item in self.children_of(pid):
+            item['children'] = self.serialize(item['id']) or None
+            result.append(item)
+        return result
+
+
+_tree = None
+_tree_version = None
+_lock = threading.Lock()
+
+
+def get_tree():
+    global _tree, _tree_version
+    version = cache_ns.tag_version(cache_ns.TAG_CATEGORY)
+    if _tree is not None and version == _tree_version:
+        return _tree
+    with _lock:
+        if _tree is None or version != _tree_version:
+            tree = CategoryTree(list(Category.objects.values(*_FIELDS)))
+            _tree, _tree_version = tree, version
+        return _tree
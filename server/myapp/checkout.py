@@ -0,0 +1,284 @@
+# -*- coding:utf-8 -*-
+"""下单计价
+
+price_cart() 用两次 in_bulk 取回购物车里所有商品和 SKU，在内存里校验上下架/库存并用 Decimal 计价，
+返回 (quote, err)；不写库，前台试算、后台代客报价都可以直接调用。
+create_order() 把报价在一个事务里落库：一条 Order + 一次 bulk_create 全部 OrderItem，并预占库存。
+finalize_paid_order() / mark_payment_failed() 记录支付结果，支付接口、回跳确认和 webhook 事件处理共用。
+"""
+import json
+import random
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.db import transaction
+
+from myapp import inventory, order_lookup
+from myapp.models import Order, OrderItem, Payment, Thing, ThingSku
+from myapp.utils import md5value
+
+CURRENCIES = ['USD', 'EUR', 'GBP', 'CNY']
+CENT = Decimal('0.01')
+
+
+def parse_decimal(value, default=Decimal('0')):
+    if value is None:
+        return default
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError, TypeError):
+        return default
+
+
+def _money(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_qty(value):
+    try:
+        qty = int(value or 1)
+    except Exception:
+        qty = 1
+    return qty if qty > 0 else 1
+
+
+def gen_order_no():
+    # 18~22 位左右的可读订单号
+    return f"OD{md5value(str(random.random()))[:10].upper()}{random.randint(1000, 9999)}"
+
+
+class Quote(object):
+
+    def __init__(self, currency, lines, shipping_fee):
+        self.currency = currency
+        self.lines = lines
+        self.subtotal = _money(sum((line['line_total'] for line in lines), Decimal('0')))
+        self.shipping_fee = _money(shipping_fee)
+        self.total = self.subtotal + self.shipping_fee
+
+    def to_dict(self):
+        return {
+            'currency': self.currency,
+            'subtotal': str(self.subtotal),
+            'shippingFee': str(self.shipping_fee),
+            'total': str(self.total),
+            'items': [{
+                'thingId': line['thing'].id,
+                'skuId': line['sku'].id if line['sku'] else None,
+                'title': line['title_snapshot'],
+                'cover': line['cover_snapshot'],
+                'unitPrice': str(line['unit_price']),
+                'quantity': line['quantity'],
+                'lineTotal': str(line['line_total']),
+            } for line in self.lines],
+        }
+
+
+def price_cart(items, currency='USD', shipping_fee=None):
+    """
+    items: [{"thingId": 1, "skuId": 2, "quantity": 3}]
+    返回 (quote, err)
+    """
+    if not isinstance(items, list) or len(items) == 0:
+        return None, 'items不能为空'
+
+    currency = (currency or 'USD').upper()
+    if currency not in CURRENCIES:
+        currency = 'USD'
+
+    rows = []
+    for it in items:
+        if not isinstance(it, dict):
+            return None, 'items格式错误'
+        raw_thing_id = it.get('thingId') or it.get('id')
+        raw_sku_id = it.get('skuId')
+        rows.append((raw_thing_id, _parse_id(raw_thing_id), raw_sku_id, _parse_id(raw_sku_id) if raw_sku_id else None,
+                     _parse_qty(it.get('quantity'))))
+
+    things = Thing.objects.in_bulk([r[1] for r in rows if r[1] is not None])
+    skus = ThingSku.objects.in_bulk([r[3] for r in rows if r[3] is not None])
+
+    # 同一商品/SKU 出现在多行时按总数量校验库存
+    wanted = {}
+    for _raw_thing_id, thing_id, _raw_sku_id, sku_id, qty in rows:
+        key = (thing_id, sku_id)
+        wanted[key] = wanted.get(key, 0) + qty
+
+    lines = []
+    for raw_thing_id, thing_id, raw_sku_id, sku_id, qty in rows:
+        thing = things.get(thing_id)
+        if thing is None:
+            return None, f'产品不存在: {raw_thing_id}'
+
+        sku = None
+        if raw_sku_id:
+            sku = skus.get(sku_id)
+            if sku is None or sku.thing_id != thing.id:
+                return None, f'SKU不存在: {raw_sku_id}'
+
+        # 下单时库存预校验（支付扣减时仍会二次校验）
+        if str(thing.track_stock) == '1':
+            need = wanted[(thing_id, sku_id)]
+            if sku:
+                if sku.status != '0':
+                    return None, 'SKU已下架'
+                if int(sku.stock or 0) < need:
+                    return None, '库存不足'
+            elif int(thing.stock or 0) < need:
+                return None, '库存不足'
+
+        unit_price = _money(parse_decimal(sku.price if sku and sku.price is not None else thing.price))
+        lines.append({
+            'thing': thing,
+            'sku': sku,
+            'sku_snapshot': sku.attrs if sku and sku.attrs is not None else None,
+            'title_snapshot': thing.title,
+            'cover_snapshot': (sku.cover if sku and sku.cover else thing.cover),
+            'unit_price': unit_price,
+            'quantity': qty,
+            'line_total': _money(unit_price * qty),
+        })
+
+    return Quote(currency, lines, parse_decimal(shipping_fee)), None
+
+
+def create_order(quote, email='', phone=''):
+    """
+    报价落库，Order、全部 OrderItem 与库存预占在同一个事务里写入
+    返回 (order, err)
+    """
+    order_no = gen_order_no()
+    try:
+        order = _create_order(quote, order_no, email, phone)
+    except inventory.OutOfStock as e:
+        return None, e.msg
+    return order, None
+
+
+def _create_order(quote, order_no, email, phone):
+    with transaction.atomic():
+        order = Order.objects.create(
+            order_no=order_no,
+            status='pending',
+            currency=quote.currency,
+            subtotal=quote.subtotal,
+            shipping_fee=quote.shipping_fee,
+            total=quote.total,
+            customer_email=email,
+            customer_phone=phone,
+            query_token=md5value(order_no),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                thing=line['thing'],
+                sku=line['sku'],
+                sku_snapshot=str(line['sku_snapshot']) if line['sku_snapshot'] is not None else None,
+                title_snapshot=line['title_snapshot'],
+                cover_snapshot=line['cover_snapshot'],
+                unit_price=line['unit_price'],
+                quantity=line['quantity'],
+                line_total=line['line_total'],
+            ) for line in quote.lines
+        ])
+        inventory.reserve_for_order(order, [(line['thing'], line['sku'], line['quantity']) for line in quote.lines])
+    return order
+
+
+def mark_payment_failed(order_id, provider: str, provider_ref: str = None, msg: str = None, raw_data=None):
+    raw_text = None
+    if raw_data is not None:
+        try:
+            raw_text = json.dumps(raw_data)
+        except Exception:
+            raw_text = str(raw_data)
+
+    if msg:
+        try:
+            raw_obj = {'msg': msg, 'raw': raw_data}
+            raw_text = json.dumps(raw_obj)
+        except Exception:
+            pass
+
+    with transaction.atomic():
+        try:
+            order = Order.objects.select_for_update().get(pk=order_id)
+        except Order.DoesNotExist:
+            return
+
+        qs = Payment.objects.filter(order=order, provider=provider)
+        if provider_ref:
+            qs = qs.filter(provider_ref=provider_ref)
+
+        updated = qs.update(status='failed', raw=raw_text)
+        if updated == 0:
+            if provider_ref:
+                Payment.objects.get_or_create(
+                    order=order,
+                    provider=provider,
+                    provider_ref=provider_ref,
+                    defaults={'status': 'failed', 'raw': raw_text},
+                )
+            else:
+                Payment.objects.get_or_create(
+                    order=order,
+                    provider=provider,
+                    defaults={'status': 'failed', 'raw': raw_text},
+                )
+
+
+def finalize_paid_order(order_id, provider: str, provider_ref: str = None, raw_data=None):
+    """Idempotent finalization.
+
+    - Lock order row.
+    - Mark payment paid.
+    - Deduct inventory once.
+    - Mark order paid.
+    """
+
+    raw_text = None
+    if raw_data is not None:
+        try:
+            raw_text = json.dumps(raw_data)
+        except Exception:
+            raw_text = str(raw_data)
+
+    with transaction.atomic():
+        order = Order.objects.select_for_update().get(pk=order_id)
+
+        if provider_ref:
+            updated = Payment.objects.filter(order=order, provider=provider, provider_ref=provider_ref).update(status='paid', raw=raw_text)
+            if updated == 0:
+                Payment.objects.get_or_create(
+                    order=order,
+                    provider=provider,
+                    provider_ref=provider_ref,
+                    defaults={'status': 'paid', 'raw': raw_text},
+                )
+        else:
+            updated = Payment.objects.filter(order=order, provider=provider).update(status='paid', raw=raw_text)
+            if updated == 0:
+                Payment.objects.get_or_create(
+                    order=order,
+                    provider=provider,
+                    defaults={'status': 'paid', 'raw': raw_text},
+                )
+
+        if order.status == 'paid':
+            return True, None
+
+        ok, msg = inventory.commit_for_order(order.id)
+        # 无论库存扣减成功与否，都保持订单 paid（库存问题交给商家处理）
+        order.status = 'paid'
+        order.save(update_fields=['status', 'update_time'])
+        order_lookup.invalidate(order.order_no)
+        if not ok:
+            return False, msg or '库存扣减失败'
+
+        return True, None
@@ -0,0 +1,212 @@
+# -*- coding:utf-8 -*-
+"""大文件分片上传（可断点续传）
+
+协议（都走后台令牌认证）：
+1. init：告知文件名、总大小、类型（file / video），服务端按 UPLOAD_CHUNK_SIZE 切分，
+   在 MEDIA_ROOT/.partial/ 下预分配同样大小的目标文件，返回 uploadId、chunkSize、chunks
+2. chunk：请求体就是第 index 片的原始字节（application/octet-stream），可带 X-Chunk-Sha256。
+   边读边用 pwrite 写到目标文件的对应偏移，同时计算 sha256，不在内存/临时文件里攒整片，
+   更不会整文件缓冲；校验不过的分片不记为已收到，重传即可覆盖
+3. status：返回已收到的分片号，断线后据此只补传缺的分片
+4. complete：所有分片到齐后按顺序流式计算整个文件的 sha256（客户端给了就比对），
+   交给 media_store 按内容寻址 rename 到 upload/file/（同一文件系统，不再复制一遍；内容重复时只加引用）
+
+每个分片收到后单独写一个标记文件（内容为该片 sha256），多个 worker 并发收同一上传的不同分片互不影响。
+超过 UPLOAD_SESSION_HOURS 未完成的上传在下次 init 时清理。
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+from django.conf import settings
+
+from myapp import media_store
+
+READ_BLOCK = 1024 * 1024
+
+KINDS = {
+    # 类型: (允许的扩展名, 大小上限配置名)
+    'file': (('.jpg', '.jpeg', '.png', '.docx', '.pdf', '.zip', '.rar'), 'CDN_FILE_UPLOAD_SIZE'),
+    'video': (('.mp4',), 'CDN_VIDEO_UPLOAD_SIZE'),
+}
+
+
+class UploadError(Exception):
+    pass
+
+
+def _partial_root():
+    return os.path.join(settings.MEDIA_ROOT, '.partial')
+
+
+def _chunk_size():
+    return max(getattr(settings, 'UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024), 64 * 1024)
+
+
+def _session_dir(upload_id):
+    # uploadId 来自客户端，只接受 uuid hex，防止路径穿越
+    if not upload_id or len(upload_id) != 32 or any(c not in '0123456789abcdef' for c in upload_id):
+        raise UploadError('uploadId不正确')
+    return os.path.join(_partial_root(), upload_id)
+
+
+def _load(upload_id):
+    directory = _session_dir(upload_id)
+    try:
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            return directory, json.load(f)
+    except (OSError, ValueError):
+        raise UploadError('上传不存在或已过期')
+
+
+def _preallocate(path, size):
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if size and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(fd, 0, size)
+                return
+            except OSError:
+                pass
+        os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+
+
+def purge_stale():
+    root = _partial_root()
+    if not os.path.isdir(root):
+        return 0
+    expire_before = time.time() - getattr(settings, 'UPLOAD_SESSION_HOURS', 24) * 3600
+    removed = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if os.path.getmtime(path) < expire_before:
+                # 目录是分片上传会话，文件是 media_store 中断留下的临时文件
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def init(filename, size, kind='file'):
+    """返回会话信息 dict，参数不合法抛 UploadError"""
+    if kind not in KINDS:
+        raise UploadError('type只支持file/video')
+    extensions, limit_setting = KINDS[kind]
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext not in extensions:
+        raise UploadError('非法文件格式')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('size不正确')
+    if size <= 0:
+        raise UploadError('size不正确')
+    if size > getattr(settings, limit_setting):
+        raise UploadError('文件太大')
+
+    purge_stale()
+    chunk_size = _chunk_size()
+    upload_id = uuid.uuid4().hex
+    directory = _session_dir(upload_id)
+    os.makedirs(os.path.join(directory, 'chunks'))
+    _preallocate(os.path.join(directory, 'data'), size)
+    meta = {
+        'uploadId': upload_id,
+        'kind': kind,
+        'ext': ext,
+        'size': size,
+        'chunkSize': chunk_size,
+        'chunks': (size + chunk_size - 1) // chunk_size,
+    }
+    with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return meta
+
+
+def write_chunk(upload_id, index, stream, content_length, expected_sha256=None):
+    """把一个分片从 stream 写到目标文件对应位置，返回该片 sha256"""
+    directory, meta = _load(upload_id)
+    try:
+        index = int(index)
+    except (TypeError, ValueError):
+        raise UploadError('index不正确')
+    if index < 0 or index >= meta['chunks']:
+        raise UploadError('index超出范围')
+
+    offset = index * meta['chunkSize']
+    length = min(meta['chunkSize'], meta['size'] - offset)
+    if content_length != length:
+        raise UploadError(f'第{index}片应为{length}字节')
+
+    # 重传同一片时先撤掉旧标记：写入中途失败或校验不通过，这一片就算没收到，complete 不会用到半新半旧的数据
+    marker = os.path.join(directory, 'chunks', str(index))
+    try:
+        os.remove(marker)
+    except FileNotFoundError:
+        pass
+
+    digest = hashlib.sha256()
+    received = 0
+    fd = os.open(os.path.join(directory, 'data'), os.O_WRONLY)
+    try:
+        while received < length:
+            block = stream.read(min(READ_BLOCK, length - received))
+            if not block:
+                break
+            os.pwrite(fd, block, offset + received)
+            digest.update(block)
+            received += len(block)
+    finally:
+        os.close(fd)
+
+    if received != length:
+        raise UploadError('分片数据不完整')
+    sha256 = digest.hexdigest()
+    if expected_sha256 and expected_sha256.lower() != sha256:
+        raise UploadError('分片校验失败')
+
+    with open(f'{marker}.tmp', 'w') as f:
+        f.write(sha256)
+    os.replace(f'{marker}.tmp', marker)
+    # 刷新会话目录的修改时间，进行中的上传不会被当作过期清理
+    os.utime(directory)
+    return sha256
+
+
+def received_chunks(upload_id):
+    directory, meta = _load(upload_id)
+    names = os.listdir(os.path.join(directory, 'chunks'))
+    return meta, sorted(int(n) for n in names if n.isdigit())
+
+
+def complete(upload_id, expected_sha256=None):
+    """校验并把文件登记到 upload/file/，返回文件名"""
+    meta, done = received_chunks(upload_id)
+    missing = meta['chunks'] - len(done)
+    if missing:
+        raise UploadError(f'还有{missing}个分片未上传')
+
+    directory = _session_dir(upload_id)
+    data_path = os.path.join(directory, 'data')
+    # 整文件 sha256 既用于校验，也决定按内容寻址的文件名
+    digest = hashlib.sha256()
+    with open(data_path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK), b''):
+            digest.update(block)
+    sha256 = digest.hexdigest()
+    if expected_sha256 and sha256 != expected_sha256.lower():
+        raise UploadError('文件校验失败')
+
+    blob, _ = media_store.save_path(data_path, 'file', meta['ext'], sha256)
+    shutil.rmtree(directory, ignore_errors=True)
+    return blob.name
@@ -0,0 +1,65 @@
+# -*- coding:utf-8 -*-
+"""固定窗口计数器（接口限流、后台登录失败次数与锁定）
+
+计数放在数据库 b_rate_counter 表里：文件缓存的 add + incr 是"读-改-写"，多个 worker
+同时命中时会丢失计数；这里在行锁内用 F() 自增，所有进程、容器看到的是同一个数。
+- hit(key, seconds)：窗口内计数加一并返回新值，窗口过期后从 1 重新开始
+- get(key)：返回 (count, expire_time)，没有记录或已过期时为 (0, None)
+- reset(*keys)：删除计数
+新建记录时顺带清理过期一段时间的旧记录，表的大小只与近期活跃的 key 数量有关。
+"""
+import datetime
+import hashlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from myapp.models import RateCounter
+
+KEY_LENGTH = 191
+PURGE_AFTER = datetime.timedelta(hours=1)
+
+
+def _key(key):
+    # 超长的 key（例如带很长的 path）截断后拼上摘要，保证唯一
+    if len(key) <= KEY_LENGTH:
+        return key
+    return f'{key[:KEY_LENGTH - 41]}:{hashlib.sha1(key.encode("utf-8")).hexdigest()}'
+
+
+def hit(key, seconds):
+    key = _key(key)
+    for _ in range(2):
+        now = timezone.now()
+        expire_time = now + datetime.timedelta(seconds=seconds)
+        with transaction.atomic():
+            row = RateCounter.objects.select_for_update().filter(key=key).first()
+            if row is not None:
+                if row.expire_time <= now:
+                    RateCounter.objects.filter(id=row.id).update(count=1, expire_time=expire_time)
+                    return 1
+                RateCounter.objects.filter(id=row.id).update(count=F('count') + 1)
+                row.refresh_from_db(fields=['count'])
+                return row.count
+
+            try:
+                with transaction.atomic():
+                    RateCounter.objects.create(key=key, count=1, expire_time=expire_time)
+            except IntegrityError:
+                # 并发请求已建好这条记录，重新进入循环在行锁内加一
+                continue
+        RateCounter.objects.filter(expire_time__lt=now - PURGE_AFTER).delete()
+        return 1
+    raise IntegrityError(f'rate counter {key} 计数失败')
+
+
+def get(key):
+    row = RateCounter.objects.filter(key=_key(key), expire_time__gt=timezone.now()).first()
+    if row is None:
+        return 0, None
+    return row.count, row.expire_time
+
+
+def reset(*keys):
+    RateCounter.objects.filter(key__in=[_key(k) for k in keys]).delete()
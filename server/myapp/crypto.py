@@ -1,25 +1,46 @@
 import base64
 import hashlib
 import os
+import threading
 
 from cryptography.fernet import Fernet
 from django.conf import settings as django_settings
 
 
-def _fernet_key():
-    raw = os.getenv('PAYMENT_CONFIG_KEY') or os.getenv('DJANGO_SECRET_KEY') or getattr(django_settings, 'SECRET_KEY', '')
-    raw = (raw or '').encode('utf-8')
+def _raw_key():
+    return os.getenv('PAYMENT_CONFIG_KEY') or os.getenv('DJANGO_SECRET_KEY') or getattr(django_settings, 'SECRET_KEY', '') or ''
+
+
+def _fernet_key(raw=None):
+    raw = (_raw_key() if raw is None else raw).encode('utf-8')
     digest = hashlib.sha256(raw).digest()
     return base64.urlsafe_b64encode(digest)
 
 
+# 派生出的 Fernet 实例按原始密钥缓存，密钥不变时不再重复 SHA-256 和构造对象
+_fernet_cache = {}
+_fernet_lock = threading.Lock()
+
+
+def _fernet():
+    raw = _raw_key()
+    f = _fernet_cache.get(raw)
+    if f is None:
+        with _fernet_lock:
+            f = _fernet_cache.get(raw)
+            if f is None:
+                _fernet_cache.clear()
+                f = _fernet_cache[raw] = Fernet(_fernet_key(raw))
+    return f
+
+
 def encrypt_text(value: str):
     if value is None:
         return None
     v = str(value)
     if v == '':
         return ''
-    f = Fernet(_fernet_key())
+    f = _fernet()
     return f.encrypt(v.encode('utf-8')).decode('utf-8')
 
 
@@ -29,5 +50,5 @@ def decrypt_text(value: str):
     v = str(value)
     if v == '':
         return ''
-    f = Fernet(_fernet_key())
+    f = _fernet()
     return f.decrypt(v.encode('utf-8')).decode('utf-8')
@@ -0,0 +1,76 @@
+# -*- coding:utf-8 -*-
+"""HyperLogLog 基数估计（统计 UV 用）
+
+p=12 时 4096 个寄存器，标准误差约 1.6%；基数较小时走线性计数，结果基本精确。
+同精度的两个 sketch 可以逐寄存器取最大值合并，所以按小时存 sketch，
+按天/按任意区间的 UV 都能由小时 sketch 合并得出，不用再扫访问日志去重。
+序列化为 zlib 压缩后的寄存器数组，低流量时段只有几十字节。
+"""
+import hashlib
+import math
+import zlib
+
+DEFAULT_PRECISION = 12
+_HASH_BITS = 64
+
+
+def _hash64(value):
+    if not isinstance(value, bytes):
+        value = str(value).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), 'big')
+
+
+class HyperLogLog(object):
+
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+        if len(self.registers) != self.m:
+            raise ValueError('registers length does not match precision')
+
+    def add(self, value):
+        x = _hash64(value)
+        idx = x >> (_HASH_BITS - self.p)
+        rest_bits = _HASH_BITS - self.p
+        rest = x & ((1 << rest_bits) - 1)
+        # 剩余位中第一个 1 的位置（从 1 开始）
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def update(self, values):
+        for v in values:
+            self.add(v)
+        return self
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError('cannot merge sketches of different precision')
+        regs = self.registers
+        for i, r in enumerate(other.registers):
+            if r > regs[i]:
+                regs[i] = r
+        return self
+
+    def count(self):
+        m = self.m
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return bytes([self.p]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data:
+            return cls()
+        data = bytes(data)
+        return cls(precision=data[0], registers=zlib.decompress(data[1:]))
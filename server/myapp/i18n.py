@@ -1,9 +1,180 @@
 from __future__ import annotations
 
+import datetime
+import threading
+import time
+from collections import OrderedDict
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
+from django.conf import settings
+from django.db.models import Q
+
+from myapp import cache_ns
 from myapp.models import I18nText
 
+Key = Tuple[str, str, str]
+
+# 每种语言的热点译文 LRU：{lang: OrderedDict[(model, object_id, field)] -> value|None}
+# None 表示确认过没有译文（负缓存），版本号跟随 admin/i18n/upsert、delete 的 TAG_I18N
+_LRU_SIZE = getattr(settings, 'I18N_LRU_SIZE', 5000)
+_lru: Dict[str, OrderedDict] = {}
+_lru_version = None
+_lru_lock = threading.Lock()
+
+
+class TranslationBundles(object):
+    """
+    I18nText 按语言、模型编译成常驻 worker 内存的字典：{lang: {model: {(object_id, field): value}}}
+    - 首次使用时全量加载
+    - admin/i18n/upsert 升级 TAG_I18N：按 update_time 增量加载
+    - admin/i18n/delete 额外升级 TAG_I18N_DELETE：全量重建（增量无法感知删除）
+    - 条数超过 max_entries 时停用常驻，回退到请求级批量查询 + LRU；
+      停用后只在删除译文或每隔 retry_interval 秒先 COUNT 一次，回到阈值以内才重新加载
+    """
+
+    def __init__(self, max_entries=200000, retry_interval=600):
+        self.max_entries = int(max_entries)
+        self.retry_interval = retry_interval
+        self._disabled_at = 0
+        self._bundles = None
+        self._versions = None
+        self._last_seen = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+        # 计数器
+        self.entries = 0
+        self.value_bytes = 0
+        self.full_loads = 0
+        self.incremental_loads = 0
+        self.last_reload_ms = 0
+
+    def lookup(self, lang: str) -> Optional[Dict[str, Dict[Tuple[str, str], str]]]:
+        """返回该语言的译文字典；停用或加载失败时返回 None"""
+        versions = cache_ns.tag_versions([cache_ns.TAG_I18N, cache_ns.TAG_I18N_DELETE])
+        if versions != self._versions:
+            with self._lock:
+                if versions != self._versions:
+                    self._refresh(versions)
+        bundles = self._bundles
+        if bundles is None:
+            return None
+        return bundles.get(lang, {})
+
+    def stats(self):
+        bundles = self._bundles or {}
+        return {
+            'enabled': self._bundles is not None,
+            'disabled': self._disabled,
+            'languages': sorted(bundles.keys()),
+            'entries': self.entries,
+            'valueBytes': self.value_bytes,
+            'maxEntries': self.max_entries,
+            'fullLoads': self.full_loads,
+            'incrementalLoads': self.incremental_loads,
+            'lastReloadMs': self.last_reload_ms,
+        }
+
+    def _refresh(self, versions):
+        start = time.time()
+        deleted = self._versions is None or versions[cache_ns.TAG_I18N_DELETE] != self._versions[cache_ns.TAG_I18N_DELETE]
+        if self._disabled and not self._should_retry(deleted):
+            # 停用期间只有删除译文或过了重试间隔才可能回到阈值以内，其余的升级不必重新扫描
+            self._versions = versions
+            return
+        full = self._bundles is None or deleted
+        try:
+            if full:
+                self._full_load()
+            else:
+                self._incremental_load()
+        except Exception as e:
+            # 不记录版本号，下一个请求重试
+            print('i18n bundle 加载失败：', e)
+            self._bundles = None
+            return
+        self._versions = versions
+        self.last_reload_ms = round((time.time() - start) * 1000)
+
+    def _should_retry(self, deleted):
+        """停用状态下是否值得重新全量加载：先用 COUNT 判断条数，不扫描译文内容"""
+        if not deleted and time.time() - self._disabled_at < self.retry_interval:
+            return False
+        self._disabled_at = time.time()
+        return I18nText.objects.exclude(value__isnull=True).count() <= self.max_entries
+
+    def _full_load(self):
+        self.full_loads += 1
+        self._disabled = False
+        bundles: Dict[str, Dict[str, Dict[Tuple[str, str], str]]] = {}
+        entries = 0
+        value_bytes = 0
+        last_seen = None
+        qs = I18nText.objects.exclude(value__isnull=True).values_list(
+            'model', 'object_id', 'field', 'lang', 'value', 'update_time')
+        for model, obj_id, field, lang, value, update_time in qs.iterator(chunk_size=2000):
+            entries += 1
+            if entries > self.max_entries:
+                self._disable()
+                return
+            bundles.setdefault(lang, {}).setdefault(model, {})[(obj_id, field)] = value
+            value_bytes += len(value)
+            if update_time and (last_seen is None or update_time > last_seen):
+                last_seen = update_time
+        self._bundles = bundles
+        self._last_seen = last_seen
+        self.entries = entries
+        self.value_bytes = value_bytes
+
+    def _incremental_load(self):
+        self.incremental_loads += 1
+        qs = I18nText.objects.all()
+        if self._last_seen is not None:
+            # 留 1 秒重叠，重复应用同一行是幂等的
+            qs = qs.filter(update_time__gte=self._last_seen - datetime.timedelta(seconds=1))
+        # 写时复制：读请求可能正拿着旧的 per-lang / per-model dict，只复制本次变动涉及的，
+        # 改完后一次赋值换上，读者要么看到全部旧数据，要么看到全部新数据
+        bundles = dict(self._bundles)
+        copied = set()
+        entries, value_bytes, last_seen = self.entries, self.value_bytes, self._last_seen
+        for model, obj_id, field, lang, value, update_time in qs.values_list(
+                'model', 'object_id', 'field', 'lang', 'value', 'update_time').iterator(chunk_size=2000):
+            if lang not in copied:
+                bundles[lang] = dict(bundles.get(lang, {}))
+                copied.add(lang)
+            if (lang, model) not in copied:
+                bundles[lang][model] = dict(bundles[lang].get(model, {}))
+                copied.add((lang, model))
+            per_model = bundles[lang][model]
+            old = per_model.pop((obj_id, field), None)
+            if old is not None:
+                entries -= 1
+                value_bytes -= len(old)
+            if value is not None:
+                per_model[(obj_id, field)] = value
+                entries += 1
+                value_bytes += len(value)
+            if update_time and (last_seen is None or update_time > last_seen):
+                last_seen = update_time
+        if entries > self.max_entries:
+            self._disable()
+            return
+        self._bundles = bundles
+        self._last_seen = last_seen
+        self.entries = entries
+        self.value_bytes = value_bytes
+
+    def _disable(self):
+        self._disabled = True
+        self._disabled_at = time.time()
+        self._bundles = None
+        self._last_seen = None
+        self.entries = 0
+        self.value_bytes = 0
+
+
+bundles = TranslationBundles(max_entries=getattr(settings, 'I18N_BUNDLE_MAX_ENTRIES', 200000))
+
 
 def get_lang_from_request(request) -> str:
     try:
@@ -13,58 +184,140 @@ def get_lang_from_request(request) -> str:
         return 'en'
 
 
-def _load_map(lang: str, keys: Sequence[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], str]:
+def _query_map(lang: str, keys: Iterable[Key]) -> Dict[Key, Optional[str]]:
+    """按 (model, object_id, field) 精确匹配查询，一次 SQL 取回"""
+    # 同一个 model 下字段集合相同的对象合并成一个条件，避免跨 model 的笛卡尔积
+    by_model: Dict[str, Dict[str, set]] = {}
+    for model, obj_id, field in keys:
+        by_model.setdefault(model, {}).setdefault(obj_id, set()).add(field)
+
+    cond = Q()
+    for model, objs in by_model.items():
+        groups: Dict[frozenset, List[str]] = {}
+        for obj_id, fields in objs.items():
+            groups.setdefault(frozenset(fields), []).append(obj_id)
+        for fields, obj_ids in groups.items():
+            cond |= Q(model=model, object_id__in=sorted(obj_ids), field__in=sorted(fields))
+
+    wanted = set(keys)
+    m: Dict[Key, Optional[str]] = {k: None for k in wanted}
+    rows = I18nText.objects.filter(cond, lang=lang).values_list('model', 'object_id', 'field', 'value')
+    for model, obj_id, field, value in rows:
+        k = (model, obj_id, field)
+        if k in wanted and value is not None:
+            m[k] = value
+    return m
+
+
+def _load_map(lang: str, keys: Sequence[Key]) -> Dict[Key, str]:
+    global _lru_version
     if not keys:
         return {}
 
-    models = sorted({k[0] for k in keys})
-    obj_ids = sorted({k[1] for k in keys})
-    fields = sorted({k[2] for k in keys})
+    # 常驻内存的译文包可用时不查库
+    bundle = bundles.lookup(lang)
+    if bundle is not None:
+        result: Dict[Key, str] = {}
+        for k in keys:
+            v = bundle.get(k[0], {}).get((k[1], k[2]))
+            if v is not None:
+                result[k] = v
+        return result
 
-    qs = I18nText.objects.filter(lang=lang, model__in=models, object_id__in=obj_ids, field__in=fields)
+    version = cache_ns.tag_version(cache_ns.TAG_I18N)
+    result = {}
+    missing = set()
 
-    m: Dict[Tuple[str, str, str], str] = {}
-    for t in qs:
-        if t.value is None:
-            continue
-        m[(t.model, t.object_id, t.field)] = t.value
-    return m
+    with _lru_lock:
+        if version != _lru_version:
+            _lru.clear()
+            _lru_version = version
+        lru = _lru.setdefault(lang, OrderedDict())
+        for k in keys:
+            if k in lru:
+                lru.move_to_end(k)
+                v = lru[k]
+                if v is not None:
+                    result[k] = v
+            else:
+                missing.add(k)
 
+    if not missing:
+        return result
 
-def apply_translations_for_list(lang: str, model: str, items: List[dict], fields: Sequence[str], id_key: str = 'id') -> None:
-    if not lang or lang == 'en' or not items:
-        return
-
-    keys: List[Tuple[str, str, str]] = []
-    for it in items:
-        obj_id = str(it.get(id_key) or '')
-        if not obj_id:
-            continue
-        for f in fields:
-            keys.append((model, obj_id, f))
-
-    mapping = _load_map(lang, keys)
-    for it in items:
-        obj_id = str(it.get(id_key) or '')
-        if not obj_id:
-            continue
-        for f in fields:
-            v = mapping.get((model, obj_id, f))
-            if v is not None and v != '':
-                it[f] = v
+    fetched = _query_map(lang, missing)
 
+    with _lru_lock:
+        if version == _lru_version:
+            lru = _lru.setdefault(lang, OrderedDict())
+            for k, v in fetched.items():
+                lru[k] = v
+            while len(lru) > _LRU_SIZE:
+                lru.popitem(last=False)
 
-def apply_translations_for_obj(lang: str, model: str, obj: dict, fields: Sequence[str], object_id: Optional[str] = None) -> None:
-    if not obj or not lang or lang == 'en':
-        return
+    for k, v in fetched.items():
+        if v is not None:
+            result[k] = v
+    return result
 
-    obj_id = object_id or str(obj.get('id') or '')
-    if not obj_id:
-        return
 
-    keys: List[Tuple[str, str, str]] = [(model, obj_id, f) for f in fields]
-    mapping = _load_map(lang, keys)
+def _fill(mapping: Dict[Key, str], model: str, obj: dict, obj_id: str, fields: Sequence[str]) -> None:
     for f in fields:
         v = mapping.get((model, obj_id, f))
         if v is not None and v != '':
             obj[f] = v
+
+
+class TranslationContext(object):
+    """
+    请求级翻译上下文
+    先用 add_obj/add_list 登记需要翻译的数据，apply() 时一次查询取回全部译文并回填，
+    用法：
+        tr = TranslationContext(lang)
+        tr.add_obj('BasicTdk', seoData, fields=[...], object_id=...)
+        tr.add_list('Thing', items, fields=['title'])
+        tr.apply()
+    """
+
+    def __init__(self, lang: str):
+        self.lang = lang
+        self.enabled = bool(lang) and lang != 'en'
+        self._targets: List[Tuple[str, dict, str, Sequence[str]]] = []
+
+    def add_obj(self, model: str, obj: dict, fields: Sequence[str], object_id: Optional[str] = None) -> None:
+        if not self.enabled or not obj:
+            return
+        obj_id = object_id or str(obj.get('id') or '')
+        if obj_id:
+            self._targets.append((model, obj, obj_id, fields))
+
+    def add_list(self, model: str, items: List[dict], fields: Sequence[str], id_key: str = 'id') -> None:
+        if not self.enabled or not items:
+            return
+        for it in items:
+            obj_id = str(it.get(id_key) or '')
+            if obj_id:
+                self._targets.append((model, it, obj_id, fields))
+
+    def apply(self) -> None:
+        if not self._targets:
+            return
+        keys = []
+        for model, _obj, obj_id, fields in self._targets:
+            keys.extend((model, obj_id, f) for f in fields)
+        mapping = _load_map(self.lang, keys)
+        for model, obj, obj_id, fields in self._targets:
+            _fill(mapping, model, obj, obj_id, fields)
+        self._targets = []
+
+
+def apply_translations_for_list(lang: str, model: str, items: List[dict], fields: Sequence[str], id_key: str = 'id') -> None:
+    tr = TranslationContext(lang)
+    tr.add_list(model, items, fields, id_key=id_key)
+    tr.apply()
+
+
+def apply_translations_for_obj(lang: str, model: str, obj: dict, fields: Sequence[str], object_id: Optional[str] = None) -> None:
+    tr = TranslationContext(lang)
+    tr.add_obj(model, obj, fields, object_id=object_id)
+    tr.apply()
@@ -0,0 +1,171 @@
+# -*- coding:utf-8 -*-
+"""上传图片的响应式衍生图
+
+upload_img 保存原图后调用 schedule()，由进程池在请求之外生成：
+- IMAGE_VARIANT_WIDTHS 中每个不超过原图宽度的宽度，各出一份 WebP 和 JPEG
+- 一张十几像素宽的模糊占位图（base64 data URI，前端可先铺底再换清晰图）
+结果写在 upload/img/_v/<原图名>/ 下，manifest.json 记录原图尺寸、各衍生图文件和占位图。
+序列化器通过 variants() 读 manifest，返回相对 upload/img/ 的文件路径，与 cover 字段的用法一致。
+
+子进程只做 Pillow 运算和写文件，参数全部由父进程传入，不碰数据库和 Django 配置，
+进程池用 spawn 方式启动，不继承 gunicorn worker 里的线程和连接。
+"""
+import base64
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+VARIANT_DIR = '_v'
+MANIFEST_NAME = 'manifest.json'
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+PLACEHOLDER_WIDTH = 16
+
+
+def _img_root():
+    return os.path.join(settings.MEDIA_ROOT, 'img')
+
+
+def _widths():
+    raw = getattr(settings, 'IMAGE_VARIANT_WIDTHS', '320,640,1280')
+    return sorted({int(w) for w in str(raw).split(',') if w.strip().isdigit() and int(w) > 0})
+
+
+def _formats():
+    raw = getattr(settings, 'IMAGE_VARIANT_FORMATS', 'webp,jpeg')
+    return [f for f in (x.strip().lower() for x in str(raw).split(',')) if f in ('webp', 'jpeg')]
+
+
+def supported(name):
+    return bool(name) and os.path.splitext(name)[1].lower() in SOURCE_EXTENSIONS and '/' not in name
+
+
+def _save(image, path, fmt, quality):
+    tmp = f'{path}.tmp'
+    if fmt == 'jpeg' and image.mode not in ('RGB', 'L'):
+        # JPEG 不支持透明，铺白底
+        from PIL import Image
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.convert('RGBA').split()[-1])
+        image = background
+    image.save(tmp, format=fmt.upper(), quality=quality, optimize=True)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def render(source_path, out_dir, rel_dir, widths, formats, quality):
+    """生成衍生图和 manifest（在子进程中执行），返回 manifest"""
+    from PIL import Image, ImageFilter, ImageOps, features
+
+    # Pillow 编译时没带 libwebp 的环境只出 JPEG
+    formats = [f for f in formats if f != 'webp' or features.check('webp')]
+    os.makedirs(out_dir, exist_ok=True)
+    with Image.open(source_path) as opened:
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('P', 'LA') else 'RGB')
+    width, height = image.size
+
+    targets = [w for w in widths if w < width] or [width]
+    manifest = {'width': width, 'height': height, 'placeholder': None}
+    for fmt in formats:
+        manifest[fmt] = []
+    for w in targets:
+        h = max(int(round(height * w / width)), 1)
+        resized = image if w == width else image.resize((w, h), Image.LANCZOS)
+        for fmt in formats:
+            ext = 'jpg' if fmt == 'jpeg' else fmt
+            name = f'{w}.{ext}'
+            size = _save(resized, os.path.join(out_dir, name), fmt, quality)
+            manifest[fmt].append({'w': w, 'h': h, 'file': f'{rel_dir}/{name}', 'bytes': size})
+
+    tiny_h = max(int(round(height * PLACEHOLDER_WIDTH / width)), 1)
+    tiny = image.convert('RGB').resize((PLACEHOLDER_WIDTH, tiny_h), Image.BILINEAR).filter(ImageFilter.GaussianBlur(1))
+    buf = io.BytesIO()
+    tiny.save(buf, format='JPEG', quality=40)
+    manifest['placeholder'] = 'data:image/jpeg;base64,' + base64.b64encode(buf.getvalue()).decode('ascii')
+
+    tmp = os.path.join(out_dir, f'{MANIFEST_NAME}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST_NAME))
+    return manifest
+
+
+def _job_args(name):
+    rel_dir = f'{VARIANT_DIR}/{name}'
+    return (os.path.join(_img_root(), name), os.path.join(_img_root(), VARIANT_DIR, name), rel_dir,
+            _widths(), _formats(), getattr(settings, 'IMAGE_VARIANT_QUALITY', 80))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=max(getattr(settings, 'IMAGE_WORKERS', 2), 1),
+                                            mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def _log_failure(name):
+    def callback(future):
+        err = future.exception()
+        if err is not None:
+            print(f'image variants failed for {name}: {err}')
+    return callback
+
+
+def schedule(name):
+    """为 upload/img/<name> 排队生成衍生图，不等待结果；返回 Future（不支持的格式返回 None）"""
+    if not supported(name) or not getattr(settings, 'IMAGE_VARIANTS_ENABLED', True):
+        return None
+    future = _get_pool().submit(render, *_job_args(name))
+    future.add_done_callback(_log_failure(name))
+    return future
+
+
+def build(name):
+    """在当前进程同步生成并返回 manifest"""
+    return render(*_job_args(name))
+
+
+def load_manifest(name):
+    try:
+        with open(os.path.join(_img_root(), VARIANT_DIR, name, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+_manifests = {}
+
+
+def variants(cover):
+    """
+    cover 字段（'#' 分隔的多张图）-> 与之一一对应的衍生图信息列表，还没生成的为 None
+    manifest 生成后不再变化，读到后在进程内缓存
+    """
+    result = []
+    for name in (cover or '').split('#'):
+        if not supported(name):
+            result.append(None)
+            continue
+        manifest = _manifests.get(name)
+        if manifest is None:
+            manifest = load_manifest(name)
+            if manifest is not None:
+                if len(_manifests) >= 5000:
+                    _manifests.clear()
+                _manifests[name] = manifest
+        result.append(manifest)
+    return result if cover else []
@@ -0,0 +1,161 @@
+# -*- coding:utf-8 -*-
+"""库存扣减与预占
+
+所有扣减都是条件更新：UPDATE ... SET stock = stock - q WHERE id = ? AND stock >= q，
+受影响行数为 0 即库存不足，不需要先 SELECT ... FOR UPDATE 再保存。
+同一批扣减按 (SKU 在前, id 升序) 的固定顺序执行，并发事务之间不会互相死锁；
+任何一行失败都会回滚整批，不会出现部分扣减。
+
+流程：
+- 下单 reserve_for_order()：扣减库存并记 StockReservation(held, expire_time)
+- 支付 commit_for_order()：held 转 committed；没有预占（或已超时释放）时现扣
+- 超时 release_expired()：未支付订单的 held 转 released 并把库存加回
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from myapp.models import Order, OrderItem, StockReservation, Thing, ThingSku
+
+SKU = 'sku'
+THING = 'thing'
+
+
+class OutOfStock(Exception):
+
+    def __init__(self, msg='库存不足'):
+        super().__init__(msg)
+        self.msg = msg
+
+
+def _needs_from_lines(lines):
+    """lines: [(thing, sku, qty)] -> {(kind, id): qty}，只统计开启库存跟踪的商品"""
+    needs = {}
+    for thing, sku, qty in lines:
+        qty = int(qty or 0)
+        if not thing or qty <= 0 or str(getattr(thing, 'track_stock', '2')) != '1':
+            continue
+        key = (SKU, sku.id) if sku else (THING, thing.id)
+        needs[key] = needs.get(key, 0) + qty
+    return needs
+
+
+def _ordered(needs):
+    # 固定加锁顺序：先 SKU 后商品，各自按 id 升序
+    return sorted(needs.items(), key=lambda kv: (0 if kv[0][0] == SKU else 1, kv[0][1]))
+
+
+def _decrement(needs):
+    """按固定顺序条件扣减，任何一行不足则抛 OutOfStock（调用方须在事务内）"""
+    now = timezone.now()
+    for (kind, pk), qty in _ordered(needs):
+        if kind == SKU:
+            updated = ThingSku.objects.filter(pk=pk, status='0', stock__gte=qty) \
+                .update(stock=F('stock') - qty, update_time=now)
+            if not updated:
+                if ThingSku.objects.filter(pk=pk).exclude(status='0').exists():
+                    raise OutOfStock('SKU已下架')
+                raise OutOfStock()
+        else:
+            updated = Thing.objects.filter(pk=pk, stock__gte=qty).update(stock=F('stock') - qty)
+            if not updated:
+                raise OutOfStock()
+
+
+def _increment(needs):
+    now = timezone.now()
+    for (kind, pk), qty in _ordered(needs):
+        if kind == SKU:
+            ThingSku.objects.filter(pk=pk).update(stock=F('stock') + qty, update_time=now)
+        else:
+            Thing.objects.filter(pk=pk).update(stock=F('stock') + qty)
+
+
+def reserve_for_order(order, lines):
+    """
+    下单时预占库存，lines: [(thing, sku, qty)]
+    须在创建订单的事务内调用，库存不足时抛 OutOfStock 让整个下单回滚
+    """
+    minutes = getattr(settings, 'STOCK_RESERVATION_MINUTES', 30)
+    if minutes <= 0:
+        return
+    needs = _needs_from_lines(lines)
+    if not needs:
+        return
+    _decrement(needs)
+    expire_time = timezone.now() + datetime.timedelta(minutes=minutes)
+    StockReservation.objects.bulk_create([
+        StockReservation(
+            order=order,
+            thing_id=pk if kind == THING else None,
+            sku_id=pk if kind == SKU else None,
+            quantity=qty,
+            expire_time=expire_time,
+        ) for (kind, pk), qty in _ordered(needs)
+    ])
+
+
+def commit_for_order(order_id):
+    """
+    支付成功后确认库存扣减，幂等
+    返回 (ok, msg)
+    """
+    try:
+        with transaction.atomic():
+            # 只锁订单本身，保证同一订单的并发回调只扣一次
+            try:
+                order = Order.objects.select_for_update().get(pk=order_id)
+            except Order.DoesNotExist:
+                return False, '订单不存在'
+
+            if str(getattr(order, 'inventory_deducted', '2')) == '1':
+                return True, None
+
+            held = StockReservation.objects.filter(order=order, status='held').update(
+                status='committed', update_time=timezone.now())
+            if not held:
+                items = OrderItem.objects.select_related('thing', 'sku').filter(order=order)
+                _decrement(_needs_from_lines([(it.thing, it.sku if it.sku_id else None, it.quantity) for it in items]))
+
+            order.inventory_deducted = '1'
+            order.save(update_fields=['inventory_deducted', 'update_time'])
+            return True, None
+    except OutOfStock as e:
+        return False, e.msg
+
+
+def release_order(order_id):
+    """释放订单仍在预占中的库存，返回释放的条数"""
+    with transaction.atomic():
+        # 与 commit_for_order 一样先锁订单，支付确认和超时释放不会交错执行
+        order = Order.objects.select_for_update().filter(pk=order_id).first()
+        if order is None or order.status == 'paid':
+            return 0
+        qs = StockReservation.objects.filter(order_id=order_id, status='held')
+        rows = list(qs.values_list('thing_id', 'sku_id', 'quantity'))
+        qs.update(status='released', update_time=timezone.now())
+        needs = {}
+        for thing_id, sku_id, qty in rows:
+            if sku_id:
+                key = (SKU, sku_id)
+            elif thing_id:
+                key = (THING, thing_id)
+            else:
+                continue  # 商品已删除
+            needs[key] = needs.get(key, 0) + qty
+        _increment(needs)
+        return len(needs)
+
+
+def release_expired(limit=500):
+    """释放已超时且订单仍未支付的预占，返回处理的订单数"""
+    now = timezone.now()
+    order_ids = list(StockReservation.objects.filter(status='held', expire_time__lt=now)
+                     .exclude(order__status='paid')
+                     .values_list('order_id', flat=True).distinct()[:limit])
+    for order_id in order_ids:
+        release_order(order_id)
+    return len(order_ids)
@@ -0,0 +1,228 @@
+# -*- coding:utf-8 -*-
+"""前台商品列表快照
+
+index/thing/section 每次请求都要重新查询精选商品、分类商品并逐行序列化。这里把
+上架商品物化成两部分，放在共享缓存里：
+- 排序快照：[(create_time, id, category_id, featured), ...]，按 create_time、id 倒序
+  各分类（含子分类）的 id 列表在 worker 内按快照版本 + 分类树版本派生并缓存
+- 行缓存：每个商品一条 ListThingSerializer 输出（不含 cover_variants，读取时附上），按 id 批量读取
+
+翻页只是对 id 列表切片（游标翻页在快照上按 (create_time, id) 二分定位），再批量取行。
+admin 写商品后调用 things_changed() 增量修补：
+重新读取变动商品，在快照中删除/按时间插回，并清掉对应的行缓存。
+拿不到快照（未构建、其它进程正在重建）时返回 None，调用方回退到 ORM 查询。
+"""
+import bisect
+import datetime
+import threading
+import uuid
+
+from django.core.cache import cache
+
+from myapp import cache_ns, category_tree, imaging, pagination
+from myapp.models import Thing
+from myapp.serializers import ListThingSerializer
+
+SNAPSHOT_TIMEOUT = 86400
+ROW_TIMEOUT = 86400
+LOCK_TIMEOUT = 30
+
+_VERSION_KEY = 'version'
+_BASE_KEY = 'base'
+_LOCK_KEY = cache_ns.make_key(cache_ns.NS_LISTING, 'lock')
+# 拿不到锁的写入方在这里换一个新值，持锁方发布后发现它变了就作废自己刚发布的快照
+_DIRTY_KEY = cache_ns.make_key(cache_ns.NS_LISTING, 'dirty')
+
+# 快照依赖分类（删除分类会把商品的 category 置空；分类标题出现在行数据里）
+_TAGS = (cache_ns.TAG_CATEGORY,)
+
+_MIN_TIME = datetime.datetime.min
+
+
+def _row_key(thing_id):
+    return f'row:{thing_id}'
+
+
+def _sort_key(entry):
+    # 倒序排列：时间新的在前，时间相同按 id 大的在前，没有时间的排最后
+    ts, pk = entry[0], entry[1]
+    return (ts or _MIN_TIME, pk)
+
+
+def _entries_for(queryset):
+    return [
+        (ts, pk, category_id, bool(dimension and 'feature' in dimension.lower()))
+        for ts, pk, category_id, dimension in
+        queryset.filter(status='0').values_list('create_time', 'id', 'category_id', 'dimension')
+    ]
+
+
+class Snapshot(object):
+
+    def __init__(self, version, entries):
+        self.version = version
+        self.entries = entries
+        self._by_category = {}
+        self._tree = None
+
+    def _subset(self, category_id):
+        """分类（含子分类）下的快照条目，按分类缓存为 {'entries', 'ids', 'keys'}"""
+        if category_id is None:
+            key = None
+        else:
+            tree = category_tree.get_tree()
+            if tree is not self._tree:
+                self._tree = tree
+                self._by_category = {}
+            key = str(category_id)
+        subset = self._by_category.get(key)
+        if subset is None:
+            if key is None:
+                entries = self.entries
+            else:
+                wanted = set(self._tree.descendant_ids(category_id))
+                entries = [e for e in self.entries if e[2] in wanted]
+            subset = {'entries': entries, 'ids': [e[1] for e in entries], 'keys': None}
+            self._by_category[key] = subset
+        return subset
+
+    def ids(self, category_id=None):
+        """分类（含子分类）下的上架商品 id，category_id 为空时返回全部"""
+        return self._subset(category_id)['ids']
+
+    def page_after(self, category_id, cursor, size):
+        """
+        游标翻页，返回 (本页 id 列表, 下一页 cursor)；cursor 与 MyPageNumberPagination 的
+        (create_time, id) 游标格式和排序一致（倒序，没有时间的排最后）
+        """
+        subset = self._subset(category_id)
+        entries = subset['entries']
+        start = 0
+        if cursor:
+            if subset['keys'] is None:
+                # 升序副本，供 bisect 使用
+                subset['keys'] = [_sort_key(e) for e in reversed(entries)]
+            ts, pk = pagination.decode_cursor(cursor)
+            # 排在游标之后的条目即排序键小于游标的条目，它们位于倒序列表的末尾
+            start = len(entries) - bisect.bisect_left(subset['keys'], (ts or _MIN_TIME, pk))
+        page = entries[start:start + size]
+        next_cursor = None
+        if page and start + size < len(entries):
+            next_cursor = pagination.encode_cursor(page[-1][0], page[-1][1])
+        return [e[1] for e in page], next_cursor
+
+    def featured_ids(self, limit):
+        return [e[1] for e in self.entries if e[3]][:limit]
+
+
+_local = None
+_local_lock = threading.Lock()
+
+
+def _build():
+    entries = _entries_for(Thing.objects.all())
+    entries.sort(key=_sort_key, reverse=True)
+    return entries
+
+
+def _publish(entries, dirty):
+    """
+    发布快照；dirty 是持锁后、读库前读到的 _DIRTY_KEY。
+    发布后 _DIRTY_KEY 变了，说明期间有写入没能拿到锁、其改动可能不在这份快照里，立即作废
+    """
+    version = uuid.uuid4().hex
+    cache_ns.put(cache_ns.NS_LISTING, _BASE_KEY, (version, entries), SNAPSHOT_TIMEOUT, tags=_TAGS)
+    cache_ns.put(cache_ns.NS_LISTING, _VERSION_KEY, version, SNAPSHOT_TIMEOUT, tags=_TAGS)
+    if cache.get(_DIRTY_KEY) != dirty:
+        cache_ns.delete(cache_ns.NS_LISTING, _VERSION_KEY)
+    return version
+
+
+def _load_shared():
+    version = cache_ns.get(cache_ns.NS_LISTING, _VERSION_KEY)
+    if version is None:
+        return None, None
+    base = cache_ns.get(cache_ns.NS_LISTING, _BASE_KEY)
+    if not base or base[0] != version:
+        return version, None
+    return version, base[1]
+
+
+def get_snapshot():
+    """返回当前快照；未命中时尝试重建，拿不到重建锁则返回 None"""
+    global _local
+    version = cache_ns.get(cache_ns.NS_LISTING, _VERSION_KEY)
+    local = _local
+    if version is not None and local is not None and local.version == version:
+        return local
+
+    with _local_lock:
+        version, entries = _load_shared()
+        if entries is None:
+            if not cache.add(_LOCK_KEY, 1, LOCK_TIMEOUT):
+                return None
+            try:
+                dirty = cache.get(_DIRTY_KEY)
+                entries = _build()
+                version = _publish(entries, dirty)
+            finally:
+                cache.delete(_LOCK_KEY)
+        _local = Snapshot(version, entries)
+        return _local
+
+
+def rows(thing_ids):
+    """按顺序返回商品的列表行数据，缺失的行一次查询补齐并写回缓存"""
+    thing_ids = list(thing_ids)
+    found = cache_ns.get_many(cache_ns.NS_LISTING, [_row_key(i) for i in thing_ids])
+    result = {i: found[_row_key(i)] for i in thing_ids if _row_key(i) in found}
+
+    missing = [i for i in thing_ids if i not in result]
+    if missing:
+        token = cache_ns.versions(cache_ns.NS_LISTING, _TAGS)
+        things = Thing.objects.filter(id__in=missing).select_related('category')
+        fresh = {row['id']: dict(row) for row in ListThingSerializer(things, many=True).data}
+        for row in fresh.values():
+            row.pop('cover_variants', None)
+        cache_ns.put_many(
+            cache_ns.NS_LISTING,
+            {_row_key(pk): row for pk, row in fresh.items()},
+            ROW_TIMEOUT,
+            token=token,
+        )
+        result.update(fresh)
+
+    # 衍生图在后台生成，生成前后行数据不变：不放进行缓存，读取时按 manifest 附上（imaging 在进程内缓存已生成的）
+    return [dict(result[i], cover_variants=imaging.variants(result[i].get('cover'))) for i in thing_ids if i in result]
+
+
+def things_changed(thing_ids):
+    """admin 写商品后调用：修补快照并清理对应的行缓存"""
+    thing_ids = {int(i) for i in thing_ids if str(i).isdigit()}
+    if not thing_ids:
+        return
+    cache_ns.delete_many(cache_ns.NS_LISTING, [_row_key(i) for i in thing_ids])
+
+    if not cache.add(_LOCK_KEY, 1, LOCK_TIMEOUT):
+        # 另一个进程正在修补/重建，它可能已读过改动前的数据：先标记 dirty（持锁方发布后会检查），
+        # 再作废当前快照，两步的顺序保证无论对方何时发布，旧数据都不会留在快照里
+        cache.set(_DIRTY_KEY, uuid.uuid4().hex, None)
+        cache_ns.delete(cache_ns.NS_LISTING, _VERSION_KEY)
+        return
+    try:
+        dirty = cache.get(_DIRTY_KEY)
+        _version, entries = _load_shared()
+        if entries is None:
+            return
+        entries = [e for e in entries if e[1] not in thing_ids]
+        keys = [_sort_key(e) for e in reversed(entries)]  # 升序副本，供 bisect 使用
+        for e in _entries_for(Thing.objects.filter(id__in=thing_ids)):
+            pos = bisect.bisect_left(keys, _sort_key(e))
+            keys.insert(pos, _sort_key(e))
+            entries.insert(len(entries) - pos, e)
+        _publish(entries, dirty)
+    except Exception as e:
+        print('商品列表快照修补失败：', e)
+        cache_ns.delete(cache_ns.NS_LISTING, _VERSION_KEY)
+    finally:
+        cache.delete(_LOCK_KEY)
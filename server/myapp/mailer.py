@@ -0,0 +1,154 @@
+# -*- coding:utf-8 -*-
+"""邮件发件箱
+
+请求里只调用 enqueue() 写一行 b_mail_outbox，真正的 SMTP 投递由
+manage.py send_mail_outbox 完成：同一个 SMTP 会话连续发送多封，失败按指数退避重试，
+每封邮件的状态、重试次数和最后一次错误都记录在表里。
+"""
+import datetime
+import smtplib
+from email.header import Header
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from django.conf import settings
+from django.utils import timezone
+
+from myapp.models import MailOutbox
+
+RETRY_CAP_SECONDS = 3600
+# 'sending' 状态超过这个时间视为投递进程中途退出，重新放回队列
+STALE_SENDING_SECONDS = 600
+
+
+def enqueue(subject, receivers, content):
+    """写入发件箱，返回 MailOutbox 对象"""
+    if isinstance(receivers, str):
+        receivers = [receivers]
+    receivers = [r.strip() for r in (receivers or []) if r and r.strip()]
+    return MailOutbox.objects.create(
+        subject=(subject or '')[0:200],
+        receivers=', '.join(receivers)[0:500],
+        content=content,
+        next_attempt_time=timezone.now(),
+    )
+
+
+def build_message(subject, sender_email, receivers, content):
+    msg = MIMEMultipart()
+    msg["Subject"] = Header(subject, 'utf-8')
+    msg["From"] = sender_email
+    msg["To"] = ', '.join(receivers)
+    msg.attach(MIMEText(content, 'html', 'utf-8'))
+    return msg
+
+
+class SMTPSession(object):
+    """可复用的 SMTP 连接，断线时自动重连一次"""
+
+    def __init__(self, server=None, port=None, sender_email=None, sender_pass=None,
+                 use_ssl=None, starttls=None, timeout=None):
+        self.server = server or settings.SMTP_SERVER
+        self.port = port or settings.SMTP_PORT
+        self.sender_email = sender_email or settings.SENDER_EMAIL
+        self.sender_pass = sender_pass if sender_pass is not None else settings.SENDER_PASS
+        self.use_ssl = settings.SMTP_USE_SSL if use_ssl is None else use_ssl
+        self.starttls = settings.SMTP_STARTTLS if starttls is None else starttls
+        self.timeout = timeout or settings.SMTP_TIMEOUT
+        self._smtp = None
+
+    def _connect(self):
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.server, self.port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        smtp.ehlo()
+        if not self.use_ssl and self.starttls:
+            smtp.starttls()
+            smtp.ehlo()
+        if self.sender_pass:
+            smtp.login(self.sender_email, self.sender_pass)
+        self._smtp = smtp
+
+    def send(self, subject, receivers, content):
+        msg = build_message(subject, self.sender_email, receivers, content)
+        for retry in (True, False):
+            if self._smtp is None:
+                self._connect()
+            try:
+                self._smtp.sendmail(self.sender_email, receivers, msg.as_string())
+                return
+            except smtplib.SMTPServerDisconnected:
+                # 长连接被服务端断开，重连后再试一次
+                self._smtp = None
+                if not retry:
+                    raise
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+
+# 只影响单封邮件的错误，会话本身仍然可用
+_MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+def _retry_delay(attempts):
+    base = max(getattr(settings, 'MAIL_RETRY_BASE_SECONDS', 60), 1)
+    return min(base * (2 ** max(attempts - 1, 0)), RETRY_CAP_SECONDS)
+
+
+def release_stale():
+    """把中途中断的 'sending' 放回队列"""
+    stale_before = timezone.now() - datetime.timedelta(seconds=STALE_SENDING_SECONDS)
+    return MailOutbox.objects.filter(status='sending', update_time__lt=stale_before) \
+        .update(status='pending', next_attempt_time=timezone.now())
+
+
+def deliver_due(session, batch_size=50):
+    """投递一批到期的邮件，返回 (sent, failed)"""
+    now = timezone.now()
+    due_ids = list(MailOutbox.objects.filter(status='pending', next_attempt_time__lte=now)
+                   .order_by('id').values_list('id', flat=True)[:batch_size])
+    max_attempts = getattr(settings, 'MAIL_MAX_ATTEMPTS', 6)
+
+    sent = failed = 0
+    for mail_id in due_ids:
+        # 先抢占，避免多个投递进程重复发送
+        if not MailOutbox.objects.filter(id=mail_id, status='pending').update(status='sending', update_time=timezone.now()):
+            continue
+        mail = MailOutbox.objects.get(id=mail_id)
+        receivers = [r.strip() for r in (mail.receivers or '').split(',') if r.strip()]
+        try:
+            if not receivers:
+                raise smtplib.SMTPRecipientsRefused({})
+            session.send(mail.subject or '', receivers, mail.content or '')
+        except Exception as e:
+            mail.attempts += 1
+            mail.last_error = str(e)[0:500]
+            # 收件人被拒属于永久错误，不再重试
+            if isinstance(e, smtplib.SMTPRecipientsRefused) or mail.attempts >= max_attempts:
+                mail.status = 'failed'
+            else:
+                mail.status = 'pending'
+                mail.next_attempt_time = timezone.now() + datetime.timedelta(seconds=_retry_delay(mail.attempts))
+            mail.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_time', 'update_time'])
+            failed += 1
+            if not isinstance(e, _MESSAGE_ERRORS):
+                # 连接/登录层面的错误：丢弃当前会话，本批剩余邮件等下一轮
+                session.close()
+                break
+            continue
+
+        mail.attempts += 1
+        mail.status = 'sent'
+        mail.sent_time = timezone.now()
+        mail.last_error = None
+        mail.save(update_fields=['attempts', 'status', 'sent_time', 'last_error', 'update_time'])
+        sent += 1
+
+    return sent, failed
@@ -0,0 +1,30 @@
+import os
+from concurrent.futures import as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from myapp import imaging
+
+
+class Command(BaseCommand):
+    help = 'Generate resized WebP/JPEG variants and blur placeholders for images already in upload/img'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='regenerate even if a manifest already exists')
+
+    def handle(self, *args, **options):
+        root = os.path.join(settings.MEDIA_ROOT, 'img')
+        names = sorted(n for n in os.listdir(root) if imaging.supported(n) and os.path.isfile(os.path.join(root, n)))
+        if not options['force']:
+            names = [n for n in names if imaging.load_manifest(n) is None]
+
+        futures = {imaging.schedule(n): n for n in names}
+        done = failed = 0
+        for future in as_completed([f for f in futures if f is not None]):
+            if future.exception() is None:
+                done += 1
+            else:
+                failed += 1
+                self.stderr.write(f'{futures[future]}: {future.exception()}')
+        self.stdout.write(f'{done} images processed, {failed} failed')
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from myapp import sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Write sitemap shards (.xml.gz) and sitemap_index.xml, rewriting only shards whose content changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='keep running, rebuilding whenever products/categories/news/cases changed')
+        parser.add_argument('--interval', type=float, default=60, help='seconds between checks in loop mode')
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            result = sitemaps.rebuild_if_stale(force=True)
+            if result is None:
+                self.stdout.write('another process is rebuilding the sitemap, skipped')
+                return
+            self.stdout.write(f"{result['shards']} shards, {result['written']} rewritten in {sitemaps.sitemap_dir()}")
+            return
+
+        while True:
+            close_old_connections()
+            try:
+                result = sitemaps.rebuild_if_stale()
+                if result is not None and result['written']:
+                    self.stdout.write(f"{result['shards']} shards, {result['written']} rewritten")
+            except Exception as e:
+                self.stderr.write(f'build_sitemaps error: {e}')
+            time.sleep(options['interval'])
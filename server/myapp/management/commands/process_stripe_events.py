@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils.dateparse import parse_datetime
+
+from myapp import stripe_events
+
+
+class Command(BaseCommand):
+    help = 'Process stored Stripe webhook events from b_stripe_event in arrival order'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='keep polling instead of exiting after one pass')
+        parser.add_argument('--interval', type=float, default=2, help='seconds between polls when idle')
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--replay', nargs='+', metavar='EVENT_ID', help='put these Stripe event ids back in the queue')
+        parser.add_argument('--replay-failed', action='store_true', help='put all failed events back in the queue')
+        parser.add_argument('--replay-since', help='put events received since this time (YYYY-MM-DD HH:MM:SS) back in the queue')
+
+    def handle(self, *args, **options):
+        if options['replay'] or options['replay_failed'] or options['replay_since']:
+            since = None
+            if options['replay_since']:
+                since = parse_datetime(options['replay_since'])
+                if since is None:
+                    self.stderr.write('invalid --replay-since')
+                    return
+            count = stripe_events.replay(
+                event_ids=options['replay'],
+                status='failed' if options['replay_failed'] else None,
+                since=since,
+            )
+            self.stdout.write(f'requeued {count} events')
+
+        while True:
+            close_old_connections()
+            try:
+                stripe_events.release_stale()
+                result = stripe_events.process_due(batch_size=max(options['batch_size'], 1))
+            except Exception as e:
+                # 数据库暂时不可用等情况，下一轮再试
+                self.stderr.write(f'process_stripe_events error: {e}')
+                result = {}
+
+            if result:
+                self.stdout.write(', '.join(f'{k} {v}' for k, v in sorted(result.items())))
+                continue  # 可能还有积压，立即取下一批
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from myapp import oplog_retention
+
+
+class Command(BaseCommand):
+    help = 'Archive and delete op logs older than OPLOG_RETENTION_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='keep running instead of exiting after one pass')
+        parser.add_argument('--interval', type=float, default=3600, help='seconds between passes in loop mode')
+        parser.add_argument('--days', type=int, help='override OPLOG_RETENTION_DAYS')
+        parser.add_argument('--no-archive', action='store_true', help='delete without writing the NDJSON archive')
+        parser.add_argument('--pause', type=float, default=0, help='seconds to sleep between delete batches')
+
+    def handle(self, *args, **options):
+        archive = False if options['no_archive'] else None
+        while True:
+            close_old_connections()
+            try:
+                for day, deleted, path in oplog_retention.purge_expired(
+                        days=options['days'], archive=archive, pause=options['pause']):
+                    self.stdout.write(f'{day}: deleted {deleted}' + (f', archived to {path}' if path else ''))
+            except Exception as e:
+                self.stderr.write(f'purge_op_logs error: {e}')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from myapp import search
+from myapp.models import Thing, ThingSearchTerm
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product search index (b_thing_search) from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--if-empty', action='store_true',
+                            help='only build when the index has no rows yet (used by entrypoint.sh on every start)')
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        if options['if_empty'] and ThingSearchTerm.objects.exists():
+            self.stdout.write('Search index already built, skipped')
+            return
+
+        # 先清掉已经不存在的商品残留
+        ThingSearchTerm.objects.exclude(thing_id__in=Thing.objects.values('id')).delete()
+
+        things = 0
+        rows = 0
+        last_id = 0
+        while True:
+            ids = list(Thing.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            rows += search.reindex_things(ids)
+            things += len(ids)
+            last_id = ids[-1]
+            self.stdout.write(f'indexed {things} things')
+
+        self.stdout.write(f'Done: {things} things, {rows} index rows')
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from myapp import inventory
+
+
+class Command(BaseCommand):
+    help = 'Return stock held by unpaid orders whose reservation has expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='keep running instead of exiting after one pass')
+        parser.add_argument('--interval', type=float, default=60, help='seconds between passes in loop mode')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            try:
+                released = inventory.release_expired()
+                while released:
+                    self.stdout.write(f'released {released} orders')
+                    released = inventory.release_expired()
+            except Exception as e:
+                self.stderr.write(f'release_expired_reservations error: {e}')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils.dateparse import parse_date
+
+from myapp import stats
+
+
+class Command(BaseCommand):
+    help = 'Maintain the hourly/daily rollups behind the admin overview dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='keep running instead of exiting after one pass')
+        parser.add_argument('--interval', type=float, default=60, help='seconds between passes in loop mode')
+        parser.add_argument('--since', help='recompute everything from this date (YYYY-MM-DD), e.g. to backfill')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since_date = parse_date(options['since'])
+            if since_date is None:
+                raise CommandError('--since must be YYYY-MM-DD')
+            since = stats.day_start(since_date)
+
+        while True:
+            close_old_connections()
+            try:
+                days = stats.refresh(since=since)
+                if since is not None:
+                    self.stdout.write(f'rolled up {days} days')
+                since = None
+            except Exception as e:
+                self.stderr.write(f'rollup_stats error: {e}')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
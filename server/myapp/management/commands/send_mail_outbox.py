@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from myapp import mailer
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from b_mail_outbox over a reused SMTP session'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='keep polling instead of exiting after one pass')
+        parser.add_argument('--interval', type=float, default=5, help='seconds between polls when idle')
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--idle-close', type=float, default=60,
+                            help='close the SMTP session after this many idle seconds')
+
+    def handle(self, *args, **options):
+        session = mailer.SMTPSession()
+        idle_since = time.time()
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    mailer.release_stale()
+                    sent, failed = mailer.deliver_due(session, batch_size=max(options['batch_size'], 1))
+                except Exception as e:
+                    # 数据库暂时不可用等情况，下一轮再试
+                    self.stderr.write(f'send_mail_outbox error: {e}')
+                    sent, failed = 0, 0
+                    session.close()
+
+                if sent or failed:
+                    self.stdout.write(f'sent {sent}, failed {failed}')
+                if sent:
+                    idle_since = time.time()
+                    continue  # 可能还有积压，立即取下一批
+
+                if not options['loop']:
+                    break
+                if time.time() - idle_since > options['idle_close']:
+                    session.close()
+                time.sleep(options['interval'])
+        finally:
+            session.close()
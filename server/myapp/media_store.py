@@ -0,0 +1,125 @@
+# -*- coding:utf-8 -*-
+"""按内容寻址的上传文件存储
+
+- 上传边写临时文件边算 sha256，文件名取 sha256 前 32 位 + 扩展名，同样的内容永远得到同一个 URL
+- upload/<dir>/ 下相同内容只保留一份：已存在时删掉临时文件，只给 MediaBlob.upload_count 加一
+- MediaBlob 记录大小、mime、图片宽高、sha256 和上传次数（upload_count 只是统计，不是引用计数）
+- 是否可删由媒体库按实际引用（商品/SKU/分类/新闻/案例的封面、视频和富文本）判断，
+  同样内容的多次上传共用一个文件名，引用检查天然覆盖所有上传者；release() 只负责删除
+- 临时文件放在 MEDIA_ROOT/.partial/（与分片上传共用，同一文件系统，最后 rename 不复制）
+
+早先按时间戳命名的文件没有 MediaBlob 记录，保持原样，删除时按旧逻辑直接删。
+"""
+import hashlib
+import mimetypes
+import os
+import shutil
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from myapp import imaging
+from myapp.models import MediaBlob
+
+DIRS = ('img', 'file')
+READ_BLOCK = 1024 * 1024
+NAME_HASH_LENGTH = 32
+
+
+def _dir_path(rel_dir):
+    if rel_dir not in DIRS:
+        raise ValueError(f'invalid dir: {rel_dir}')
+    return os.path.join(settings.MEDIA_ROOT, rel_dir)
+
+
+def _temp_path():
+    root = os.path.join(settings.MEDIA_ROOT, '.partial')
+    os.makedirs(root, exist_ok=True)
+    return os.path.join(root, f'{uuid.uuid4().hex}.upload')
+
+
+def _probe(path, ext):
+    """返回 (mime, width, height)，非图片或读不出尺寸时宽高为 None"""
+    mime = mimetypes.guess_type(f'x{ext}')[0]
+    width = height = None
+    if mime and mime.startswith('image/'):
+        try:
+            from PIL import Image
+            with Image.open(path) as image:
+                width, height = image.size
+        except Exception:
+            pass
+    return mime, width, height
+
+
+def _finalize(temp_path, rel_dir, ext, sha256, size):
+    """把临时文件登记为 blob，返回 (blob, created)；内容已存在时删除临时文件只加上传计数"""
+    ext = ext.lower()
+    for _ in range(2):
+        with transaction.atomic():
+            # 加引用与 release() 的删除都在行锁内完成，二者不会交错
+            blob = MediaBlob.objects.select_for_update().filter(dir=rel_dir, sha256=sha256).first()
+            if blob is not None:
+                MediaBlob.objects.filter(id=blob.id).update(upload_count=F('upload_count') + 1)
+                blob.refresh_from_db()
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return blob, False
+
+            name = f'{sha256[:NAME_HASH_LENGTH]}{ext}'
+            target_dir = _dir_path(rel_dir)
+            os.makedirs(target_dir, exist_ok=True)
+            mime, width, height = _probe(temp_path, ext)
+            try:
+                with transaction.atomic():
+                    blob = MediaBlob.objects.create(dir=rel_dir, name=name, sha256=sha256, size=size,
+                                                    mime=mime, width=width, height=height)
+            except IntegrityError:
+                # 并发上传了同样的内容，对方已登记；重新进入循环，在行锁内加计数
+                continue
+            # 同名文件内容必然相同，并发时覆盖也无妨
+            os.replace(temp_path, os.path.join(target_dir, name))
+            return blob, True
+    raise IntegrityError(f'media blob {rel_dir}/{sha256} 登记失败')
+
+
+def save_upload(uploaded_file, rel_dir, ext):
+    """保存 Django 上传文件，返回 (blob, created)"""
+    temp_path = _temp_path()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, 'wb') as f:
+            for chunk in uploaded_file.chunks(READ_BLOCK):
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        return _finalize(temp_path, rel_dir, ext, digest.hexdigest(), size)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def save_path(path, rel_dir, ext, sha256):
+    """登记一个已在 MEDIA_ROOT 所在文件系统上的完整文件（分片上传合并后），sha256 由调用方算好"""
+    return _finalize(path, rel_dir, ext, sha256, os.path.getsize(path))
+
+
+def release(rel_dir, name):
+    """
+    删除文件（调用方已确认没有商品/SKU/新闻等仍在引用它）：删除记录、文件和衍生图，
+    与上传过几次无关。没有记录的旧文件直接删除。返回 'deleted' / 'missing'
+    """
+    path = os.path.join(_dir_path(rel_dir), name)
+    with transaction.atomic():
+        # 与 _finalize 抢同一行锁：正在登记同样内容的上传要么先完成（随后文件被删，需重新上传），
+        # 要么等删除提交后重新建记录和文件
+        MediaBlob.objects.select_for_update().filter(dir=rel_dir, name=name).delete()
+        if not os.path.isfile(path):
+            return 'missing'
+        os.remove(path)
+    if rel_dir == 'img':
+        shutil.rmtree(os.path.join(_dir_path('img'), imaging.VARIANT_DIR, name), ignore_errors=True)
+    return 'deleted'
@@ -1,38 +1,17 @@
 # -*- coding:utf-8 -*-
 import time
-import json
 
 from django.utils.deprecation import MiddlewareMixin
 
 from myapp import utils
-from myapp.serializers import OpLogSerializer
+from myapp import oplog
 
 
 class OpLogs(MiddlewareMixin):
 
-    def __init__(self, *args):
-        super(OpLogs, self).__init__(*args)
-
-        self.start_time = None  # 开始时间
-        self.end_time = None  # 响应时间
-        self.data = {}  # dict数据
-
     def process_request(self, request):
-
-        self.start_time = time.time()  # 开始时间
-
-        re_ip = utils.get_ip(request)
-        re_method = request.method
-
-        self.data.update(
-            {
-                're_url': request.path,
-                're_method': re_method,
-                're_ip': re_ip,
-                # 're_content': re_content,
-            }
-        )
-        # print(self.data)
+        # 开始时间挂在 request 上，中间件实例在线程间共享
+        request._oplog_start_time = time.time()
 
     def process_response(self, request, response):
 
@@ -41,14 +20,15 @@ class OpLogs(MiddlewareMixin):
             return response
 
         # 耗时毫秒/ms
-        self.end_time = time.time()  # 响应时间
-        access_time = self.end_time - self.start_time
-        self.data['access_time'] = round(access_time * 1000)
-        self.data['re_url'] = request.path
-
-        # 入库
-        serializer = OpLogSerializer(data=self.data)
-        if serializer.is_valid():
-            serializer.save()
+        start_time = getattr(request, '_oplog_start_time', None)
+        access_time = (time.time() - start_time) if start_time else 0
+
+        # 写入缓冲区，由后台线程批量入库
+        oplog.buffer.append(oplog.make_record(
+            re_ip=utils.get_ip(request),
+            re_method=request.method,
+            re_url=request.path,
+            access_time=round(access_time * 1000),
+        ))
 
         return response
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0053_inquiry_b2b_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThingSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('token', models.CharField(max_length=32)),
+                ('weight', models.IntegerField(default=0)),
+                ('thing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='myapp.thing')),
+            ],
+            options={
+                'db_table': 'b_thing_search',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='thingsearchterm',
+            constraint=models.UniqueConstraint(fields=('token', 'thing'), name='uniq_thing_search_token'),
+        ),
+    ]
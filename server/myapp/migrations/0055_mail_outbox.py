@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0054_thing_search_term'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailOutbox',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('subject', models.CharField(blank=True, max_length=200, null=True)),
+                ('receivers', models.CharField(blank=True, max_length=500, null=True)),
+                ('content', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', '待发送'), ('sending', '发送中'), ('sent', '已发送'), ('failed', '发送失败')], default='pending', max_length=10)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_time', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.CharField(blank=True, max_length=500, null=True)),
+                ('sent_time', models.DateTimeField(blank=True, null=True)),
+                ('create_time', models.DateTimeField(auto_now_add=True, null=True)),
+                ('update_time', models.DateTimeField(auto_now=True, null=True)),
+            ],
+            options={
+                'db_table': 'b_mail_outbox',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='mailoutbox',
+            index=models.Index(fields=['status', 'next_attempt_time'], name='idx_mail_outbox_due'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0055_mail_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('quantity', models.IntegerField(default=0)),
+                ('status', models.CharField(choices=[('held', '预占'), ('committed', '已扣减'), ('released', '已释放')], default='held', max_length=10)),
+                ('expire_time', models.DateTimeField(blank=True, null=True)),
+                ('create_time', models.DateTimeField(auto_now_add=True, null=True)),
+                ('update_time', models.DateTimeField(auto_now=True, null=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='myapp.order')),
+                ('sku', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='myapp.thingsku')),
+                ('thing', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='myapp.thing')),
+            ],
+            options={
+                'db_table': 'b_stock_reservation',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stockreservation',
+            index=models.Index(fields=['status', 'expire_time'], name='idx_stock_resv_expire'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0056_stock_reservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StripeEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('event_id', models.CharField(max_length=255, unique=True)),
+                ('event_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('order_no', models.CharField(blank=True, db_index=True, max_length=64, null=True)),
+                ('payload', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', '待处理'), ('processing', '处理中'), ('done', '已处理'), ('failed', '处理失败'), ('skipped', '无需处理')], default='pending', max_length=12)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_time', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.CharField(blank=True, max_length=500, null=True)),
+                ('stripe_created', models.DateTimeField(blank=True, null=True)),
+                ('processed_time', models.DateTimeField(blank=True, null=True)),
+                ('create_time', models.DateTimeField(auto_now_add=True, null=True)),
+                ('update_time', models.DateTimeField(auto_now=True, null=True)),
+            ],
+            options={
+                'db_table': 'b_stripe_event',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stripeevent',
+            index=models.Index(fields=['status', 'next_attempt_time'], name='idx_stripe_event_due'),
+        ),
+    ]
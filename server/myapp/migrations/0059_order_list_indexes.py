@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0058_order_lookup_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['create_time'], name='idx_order_time'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'create_time'], name='idx_order_status_time'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['create_time'], name='idx_payment_time'),
+        ),
+    ]
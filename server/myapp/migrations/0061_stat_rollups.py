@@ -0,0 +1,51 @@
+# Generated by Django 3.2.11 on 2026-10-18 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0060_inquiry_time_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatDaily',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField(unique=True)),
+                ('pv', models.IntegerField(default=0)),
+                ('uv', models.IntegerField(default=0)),
+                ('uv_sketch', models.BinaryField(blank=True, null=True)),
+                ('order_count', models.IntegerField(default=0)),
+                ('order_paid_count', models.IntegerField(default=0)),
+                ('order_pending_count', models.IntegerField(default=0)),
+                ('payment_count', models.IntegerField(default=0)),
+                ('inquiry_count', models.IntegerField(default=0)),
+                ('update_time', models.DateTimeField(auto_now=True, null=True)),
+            ],
+            options={
+                'db_table': 'b_stat_daily',
+            },
+        ),
+        migrations.CreateModel(
+            name='StatHourly',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('hour', models.DateTimeField(unique=True)),
+                ('pv', models.IntegerField(default=0)),
+                ('uv', models.IntegerField(default=0)),
+                ('uv_sketch', models.BinaryField(blank=True, null=True)),
+                ('order_count', models.IntegerField(default=0)),
+                ('order_paid_count', models.IntegerField(default=0)),
+                ('order_pending_count', models.IntegerField(default=0)),
+                ('payment_count', models.IntegerField(default=0)),
+                ('inquiry_count', models.IntegerField(default=0)),
+                ('update_time', models.DateTimeField(auto_now=True, null=True)),
+            ],
+            options={
+                'db_table': 'b_stat_hourly',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+def blank_tokens_to_null(apps, schema_editor):
+    # 唯一索引允许多个 NULL，但不允许多个空串
+    User = apps.get_model('myapp', 'User')
+    User.objects.filter(admin_token='').update(admin_token=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0061_stat_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(blank_tokens_to_null, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='admin_token',
+            field=models.CharField(blank=True, max_length=32, null=True, unique=True),
+        ),
+    ]
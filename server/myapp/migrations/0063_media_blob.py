@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0062_user_admin_token_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('dir', models.CharField(max_length=10)),
+                ('name', models.CharField(max_length=100)),
+                ('sha256', models.CharField(max_length=64)),
+                ('size', models.BigIntegerField(default=0)),
+                ('mime', models.CharField(blank=True, max_length=100, null=True)),
+                ('width', models.IntegerField(blank=True, null=True)),
+                ('height', models.IntegerField(blank=True, null=True)),
+                ('ref_count', models.IntegerField(default=1)),
+                ('create_time', models.DateTimeField(auto_now_add=True, null=True)),
+                ('update_time', models.DateTimeField(auto_now=True, null=True)),
+            ],
+            options={
+                'db_table': 'b_media_blob',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='mediablob',
+            constraint=models.UniqueConstraint(fields=('dir', 'sha256'), name='uniq_media_blob_hash'),
+        ),
+        migrations.AddConstraint(
+            model_name='mediablob',
+            constraint=models.UniqueConstraint(fields=('dir', 'name'), name='uniq_media_blob_name'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0063_media_blob'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='mediablob',
+            old_name='ref_count',
+            new_name='upload_count',
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0064_media_blob_upload_count'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='oplog',
+            name='re_time',
+            field=models.DateTimeField(default=django.utils.timezone.now, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0065_oplog_re_time_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateCounter',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=191, unique=True)),
+                ('count', models.IntegerField(default=0)),
+                ('expire_time', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'b_rate_counter',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ratecounter',
+            index=models.Index(fields=['expire_time'], name='idx_rate_counter_expire'),
+        ),
+    ]
@@ -1,5 +1,56 @@
+import copy
+
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
+from django.utils import timezone
+
+from myapp import cache_ns
+
+# 单例配置的进程内快照 {model_class: (version, instance)}
+_solo_snapshot = {}
+
+
+class SingletonModel(models.Model):
+    """
+    单例配置表基类
+    get_solo() 返回进程内快照的副本，版本号存放在共享缓存里，
+    save()/delete() 升级版本号后各 worker 在下一次读取时重新加载
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_solo(cls):
+        # 先取版本号再加载，加载期间如有写入，下次读取会因版本不一致而重新加载
+        version = cache_ns.tag_version(cache_ns.TAG_SITE)
+        entry = _solo_snapshot.get(cls)
+        if entry is None or entry[0] != version:
+            entry = (version, cls._load_solo())
+            _solo_snapshot[cls] = entry
+        return copy.copy(entry[1])
+
+    @classmethod
+    def _load_solo(cls):
+        try:
+            return cls.objects.get()
+        except ObjectDoesNotExist:
+            obj = cls.objects.first()
+            if obj is not None:
+                return obj
+            return cls.objects.create()
+
+    def save(self, *args, **kwargs):
+        if not self.pk and type(self).objects.exists():
+            raise ValueError("There can only be one instance.")
+        result = super().save(*args, **kwargs)
+        cache_ns.invalidate_tags(cache_ns.TAG_SITE)
+        return result
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        cache_ns.invalidate_tags(cache_ns.TAG_SITE)
+        return result
 
 
 class User(models.Model):
@@ -18,7 +69,7 @@ class User(models.Model):
     email = models.CharField(max_length=50, blank=True, null=True)
     description = models.TextField(max_length=200, null=True)
     create_time = models.DateTimeField(auto_now_add=True, null=True)
-    admin_token = models.CharField(max_length=32, blank=True, null=True)
+    admin_token = models.CharField(max_length=32, blank=True, null=True, unique=True)
     token = models.CharField(max_length=32, blank=True, null=True)
     exp = models.CharField(max_length=32, blank=True, null=True)
 
@@ -88,6 +139,20 @@ class ThingSku(models.Model):
         db_table = 'b_thing_sku'
 
 
+class ThingSearchTerm(models.Model):
+    # 商品搜索倒排索引：每个 (token, thing) 一行，weight 为各字段权重之和，由 myapp.search 维护
+    id = models.BigAutoField(primary_key=True)
+    token = models.CharField(max_length=32)
+    thing = models.ForeignKey(Thing, on_delete=models.CASCADE, related_name='search_terms')
+    weight = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'b_thing_search'
+        constraints = [
+            models.UniqueConstraint(fields=['token', 'thing'], name='uniq_thing_search_token')
+        ]
+
+
 class News(models.Model):
     STATUS_CHOICES = (
         ('0', '上架'),
@@ -168,6 +233,36 @@ class Inquiry(models.Model):
 
     class Meta:
         db_table = "b_inquiry"
+        indexes = [
+            models.Index(fields=['create_time'], name='idx_inquiry_time'),
+        ]
+
+
+class MailOutbox(models.Model):
+    # 待发送邮件，由 manage.py send_mail_outbox 投递
+    STATUS_CHOICES = (
+        ('pending', '待发送'),
+        ('sending', '发送中'),
+        ('sent', '已发送'),
+        ('failed', '发送失败'),
+    )
+    id = models.BigAutoField(primary_key=True)
+    subject = models.CharField(max_length=200, blank=True, null=True)
+    receivers = models.CharField(max_length=500, blank=True, null=True)  # 逗号分隔
+    content = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_time = models.DateTimeField(blank=True, null=True)
+    last_error = models.CharField(max_length=500, blank=True, null=True)
+    sent_time = models.DateTimeField(blank=True, null=True)
+    create_time = models.DateTimeField(auto_now_add=True, null=True)
+    update_time = models.DateTimeField(auto_now=True, null=True)
+
+    class Meta:
+        db_table = "b_mail_outbox"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_time'], name='idx_mail_outbox_due'),
+        ]
 
 
 class Download(models.Model):
@@ -188,7 +283,7 @@ class Download(models.Model):
         db_table = "b_download"
 
 
-class BasicSite(models.Model):
+class BasicSite(SingletonModel):
     id = models.BigAutoField(primary_key=True)
     status = models.CharField(max_length=2, default='1')  # 网站状态(1开启 2关闭)
     site_name = models.CharField(max_length=100, blank=True, null=True)  # 网站名称
@@ -218,23 +313,8 @@ class BasicSite(models.Model):
     class Meta:
         db_table = "b_basic_site"
 
-    @classmethod
-    def get_solo(cls):
-        try:
-            return cls.objects.get()
-        except ObjectDoesNotExist:
-            obj = cls.objects.first()
-            if obj is not None:
-                return obj
-            return cls.objects.create()
-
-    def save(self, *args, **kwargs):
-        if not self.pk and BasicSite.objects.exists():
-            raise ValueError("There can only be one instance.")
-        return super().save(*args, **kwargs)
-
 
-class BasicTdk(models.Model):
+class BasicTdk(SingletonModel):
     id = models.BigAutoField(primary_key=True)
     tdk_home_title = models.CharField(max_length=100, blank=True, null=True)
     tdk_home_keywords = models.CharField(max_length=200, blank=True, null=True)
@@ -264,23 +344,8 @@ class BasicTdk(models.Model):
     class Meta:
         db_table = "b_basic_tdk"
 
-    @classmethod
-    def get_solo(cls):
-        try:
-            return cls.objects.get()
-        except ObjectDoesNotExist:
-            obj = cls.objects.first()
-            if obj is not None:
-                return obj
-            return cls.objects.create()
-
-    def save(self, *args, **kwargs):
-        if not self.pk and BasicTdk.objects.exists():
-            raise ValueError("There can only be one instance.")
-        return super().save(*args, **kwargs)
-
 
-class BasicBanner(models.Model):
+class BasicBanner(SingletonModel):
     id = models.BigAutoField(primary_key=True)
     banner_home = models.CharField(max_length=300, blank=True, null=True)
     banner_product = models.CharField(max_length=100, blank=True, null=True)
@@ -294,23 +359,8 @@ class BasicBanner(models.Model):
     class Meta:
         db_table = "b_basic_banner"
 
-    @classmethod
-    def get_solo(cls):
-        try:
-            return cls.objects.get()
-        except ObjectDoesNotExist:
-            obj = cls.objects.first()
-            if obj is not None:
-                return obj
-            return cls.objects.create()
-
-    def save(self, *args, **kwargs):
-        if not self.pk and BasicBanner.objects.exists():
-            raise ValueError("There can only be one instance.")
-        return super().save(*args, **kwargs)
-
 
-class BasicGlobal(models.Model):
+class BasicGlobal(SingletonModel):
     id = models.BigAutoField(primary_key=True)
     global_phone = models.CharField(max_length=100, blank=True, null=True)
     global_email = models.CharField(max_length=100, blank=True, null=True)
@@ -328,23 +378,8 @@ class BasicGlobal(models.Model):
     class Meta:
         db_table = "b_basic_global"
 
-    @classmethod
-    def get_solo(cls):
-        try:
-            return cls.objects.get()
-        except ObjectDoesNotExist:
-            obj = cls.objects.first()
-            if obj is not None:
-                return obj
-            return cls.objects.create()
-
-    def save(self, *args, **kwargs):
-        if not self.pk and BasicGlobal.objects.exists():
-            raise ValueError("There can only be one instance.")
-        return super().save(*args, **kwargs)
-
 
-class BasicAdditional(models.Model):
+class BasicAdditional(SingletonModel):
     id = models.BigAutoField(primary_key=True)
     additional_mission = models.CharField(max_length=1000, blank=True, null=True)
     additional_about = models.CharField(max_length=1000, blank=True, null=True)
@@ -370,21 +405,6 @@ class BasicAdditional(models.Model):
     class Meta:
         db_table = "b_basic_additional"
 
-    @classmethod
-    def get_solo(cls):
-        try:
-            return cls.objects.get()
-        except ObjectDoesNotExist:
-            obj = cls.objects.first()
-            if obj is not None:
-                return obj
-            return cls.objects.create()
-
-    def save(self, *args, **kwargs):
-        if not self.pk and BasicAdditional.objects.exists():
-            raise ValueError("There can only be one instance.")
-        return super().save(*args, **kwargs)
-
 
 class Comment(models.Model):
     id = models.BigAutoField(primary_key=True)
@@ -407,7 +427,7 @@ class Advantage(models.Model):
         db_table = "b_advantage"
 
 
-class About(models.Model):
+class About(SingletonModel):
     id = models.BigAutoField(primary_key=True)
     about_introduction = models.CharField(max_length=1000, blank=True, null=True)
     about_cover = models.CharField(max_length=100, blank=True, null=True)
@@ -415,23 +435,8 @@ class About(models.Model):
     class Meta:
         db_table = "b_about"
 
-    @classmethod
-    def get_solo(cls):
-        try:
-            return cls.objects.get()
-        except ObjectDoesNotExist:
-            obj = cls.objects.first()
-            if obj is not None:
-                return obj
-            return cls.objects.create()
-
-    def save(self, *args, **kwargs):
-        if not self.pk and About.objects.exists():
-            raise ValueError("There can only be one instance.")
-        return super().save(*args, **kwargs)
-
 
-class ShopSettings(models.Model):
+class ShopSettings(SingletonModel):
     SWITCH_CHOICES = (
         ('1', '开启'),
         ('2', '关闭'),
@@ -454,21 +459,6 @@ class ShopSettings(models.Model):
     class Meta:
         db_table = 'b_shop_settings'
 
-    @classmethod
-    def get_solo(cls):
-        try:
-            return cls.objects.get()
-        except ObjectDoesNotExist:
-            obj = cls.objects.first()
-            if obj is not None:
-                return obj
-            return cls.objects.create()
-
-    def save(self, *args, **kwargs):
-        if not self.pk and ShopSettings.objects.exists():
-            raise ValueError('There can only be one instance.')
-        return super().save(*args, **kwargs)
-
 
 class Order(models.Model):
     id = models.BigAutoField(primary_key=True)
@@ -487,6 +477,12 @@ class Order(models.Model):
 
     class Meta:
         db_table = "b_order"
+        indexes = [
+            models.Index(fields=['order_no', 'query_token'], name='idx_order_lookup'),
+            # 后台订单列表按创建时间倒序，可按状态筛选
+            models.Index(fields=['create_time'], name='idx_order_time'),
+            models.Index(fields=['status', 'create_time'], name='idx_order_status_time'),
+        ]
 
 
 class OrderItem(models.Model):
@@ -506,6 +502,30 @@ class OrderItem(models.Model):
         db_table = "b_order_item"
 
 
+class StockReservation(models.Model):
+    # 下单时预占的库存：held 预占中（已从 stock 扣除）/ committed 支付后转正 / released 超时释放（已加回 stock）
+    STATUS_CHOICES = (
+        ('held', '预占'),
+        ('committed', '已扣减'),
+        ('released', '已释放'),
+    )
+    id = models.BigAutoField(primary_key=True)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='reservations')
+    thing = models.ForeignKey(Thing, on_delete=models.SET_NULL, blank=True, null=True)
+    sku = models.ForeignKey(ThingSku, on_delete=models.SET_NULL, blank=True, null=True)
+    quantity = models.IntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='held')
+    expire_time = models.DateTimeField(blank=True, null=True)
+    create_time = models.DateTimeField(auto_now_add=True, null=True)
+    update_time = models.DateTimeField(auto_now=True, null=True)
+
+    class Meta:
+        db_table = "b_stock_reservation"
+        indexes = [
+            models.Index(fields=['status', 'expire_time'], name='idx_stock_resv_expire'),
+        ]
+
+
 class Payment(models.Model):
     id = models.BigAutoField(primary_key=True)
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='payments')
@@ -518,12 +538,46 @@ class Payment(models.Model):
 
     class Meta:
         db_table = "b_payment"
+        indexes = [
+            models.Index(fields=['create_time'], name='idx_payment_time'),
+        ]
+
+
+class StripeEvent(models.Model):
+    # 已验签的 Stripe webhook 事件，webhook 只负责落库，由 manage.py process_stripe_events 处理
+    STATUS_CHOICES = (
+        ('pending', '待处理'),
+        ('processing', '处理中'),
+        ('done', '已处理'),
+        ('failed', '处理失败'),
+        ('skipped', '无需处理'),
+    )
+    id = models.BigAutoField(primary_key=True)
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100, blank=True, null=True)
+    order_no = models.CharField(max_length=64, blank=True, null=True, db_index=True)
+    payload = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_time = models.DateTimeField(blank=True, null=True)
+    last_error = models.CharField(max_length=500, blank=True, null=True)
+    stripe_created = models.DateTimeField(blank=True, null=True)  # 事件在 Stripe 侧的产生时间
+    processed_time = models.DateTimeField(blank=True, null=True)
+    create_time = models.DateTimeField(auto_now_add=True, null=True)
+    update_time = models.DateTimeField(auto_now=True, null=True)
+
+    class Meta:
+        db_table = "b_stripe_event"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_time'], name='idx_stripe_event_due'),
+        ]
 
 
 class OpLog(models.Model):
     id = models.BigAutoField(primary_key=True)
     re_ip = models.CharField(max_length=100, blank=True, null=True)
-    re_time = models.DateTimeField(auto_now_add=True, null=True)
+    # 不用 auto_now_add：异步批量写入时由 make_record 记下请求时刻，auto_now_add 会在 bulk_create 时覆盖成入库时刻
+    re_time = models.DateTimeField(default=timezone.now, null=True)
     re_url = models.CharField(max_length=200, blank=True, null=True)
     re_method = models.CharField(max_length=10, blank=True, null=True)
     re_content = models.CharField(max_length=200, blank=True, null=True)
@@ -536,6 +590,78 @@ class OpLog(models.Model):
         ]
 
 
+class MediaBlob(models.Model):
+    # 上传文件按内容寻址：文件名由 sha256 决定，相同内容只存一份（myapp.media_store）
+    id = models.BigAutoField(primary_key=True)
+    dir = models.CharField(max_length=10)  # img / file
+    name = models.CharField(max_length=100)
+    sha256 = models.CharField(max_length=64)
+    size = models.BigIntegerField(default=0)
+    mime = models.CharField(max_length=100, blank=True, null=True)
+    width = models.IntegerField(blank=True, null=True)
+    height = models.IntegerField(blank=True, null=True)
+    upload_count = models.IntegerField(default=1)  # 同样内容被上传的次数，仅作统计；能否删除看实际引用（views/admin/media.py）
+    create_time = models.DateTimeField(auto_now_add=True, null=True)
+    update_time = models.DateTimeField(auto_now=True, null=True)
+
+    class Meta:
+        db_table = "b_media_blob"
+        constraints = [
+            models.UniqueConstraint(fields=['dir', 'sha256'], name='uniq_media_blob_hash'),
+            models.UniqueConstraint(fields=['dir', 'name'], name='uniq_media_blob_name'),
+        ]
+
+
+class RateCounter(models.Model):
+    # 固定窗口计数（接口限流、后台登录失败/锁定），由 myapp.counters 在行锁内原子增减，多进程/多容器共用
+    id = models.BigAutoField(primary_key=True)
+    key = models.CharField(max_length=191, unique=True)
+    count = models.IntegerField(default=0)
+    expire_time = models.DateTimeField()  # 当前窗口结束时刻，过期后下一次计数从 1 重新开始
+
+    class Meta:
+        db_table = "b_rate_counter"
+        indexes = [
+            models.Index(fields=['expire_time'], name='idx_rate_counter_expire'),
+        ]
+
+
+class StatHourly(models.Model):
+    # 后台概览的小时汇总，由 manage.py rollup_stats 增量维护
+    id = models.BigAutoField(primary_key=True)
+    hour = models.DateTimeField(unique=True)
+    pv = models.IntegerField(default=0)
+    uv = models.IntegerField(default=0)
+    uv_sketch = models.BinaryField(blank=True, null=True)  # HyperLogLog，按天合并求 UV
+    order_count = models.IntegerField(default=0)
+    order_paid_count = models.IntegerField(default=0)
+    order_pending_count = models.IntegerField(default=0)
+    payment_count = models.IntegerField(default=0)
+    inquiry_count = models.IntegerField(default=0)
+    update_time = models.DateTimeField(auto_now=True, null=True)
+
+    class Meta:
+        db_table = "b_stat_hourly"
+
+
+class StatDaily(models.Model):
+    # 由当天的 StatHourly 合并而来
+    id = models.BigAutoField(primary_key=True)
+    day = models.DateField(unique=True)
+    pv = models.IntegerField(default=0)
+    uv = models.IntegerField(default=0)
+    uv_sketch = models.BinaryField(blank=True, null=True)
+    order_count = models.IntegerField(default=0)
+    order_paid_count = models.IntegerField(default=0)
+    order_pending_count = models.IntegerField(default=0)
+    payment_count = models.IntegerField(default=0)
+    inquiry_count = models.IntegerField(default=0)
+    update_time = models.DateTimeField(auto_now=True, null=True)
+
+    class Meta:
+        db_table = "b_stat_daily"
+
+
 class ErrorLog(models.Model):
     id = models.BigAutoField(primary_key=True)
     ip = models.CharField(max_length=100, blank=True, null=True)
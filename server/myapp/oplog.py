@@ -0,0 +1,144 @@
+# -*- coding:utf-8 -*-
+"""访问日志(OpLog)异步批量写入
+
+中间件只把精简后的记录追加到进程内环形缓冲区，由后台线程按
+"满 N 条" 或 "每 T 毫秒" 两个条件之一触发 bulk_create 批量入库，
+请求链路上不再有 INSERT。缓冲区满时丢弃最旧的记录并计数。
+"""
+import atexit
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from myapp.models import OpLog
+
+
+class OpLogBuffer(object):
+
+    def __init__(self, capacity=10000, batch_size=200, interval_ms=1000, async_mode=True):
+        self.capacity = max(int(capacity), 1)
+        self.batch_size = max(int(batch_size), 1)
+        self.interval = max(int(interval_ms), 10) / 1000.0
+        self.async_mode = async_mode
+
+        self._queue = deque(maxlen=self.capacity)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+
+        # 计数器
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def append(self, record):
+        with self._lock:
+            if len(self._queue) >= self.capacity:
+                # 背压：环形缓冲区已满，deque 会挤掉最旧的一条
+                self.dropped += 1
+            self._queue.append(record)
+            self.enqueued += 1
+            size = len(self._queue)
+
+        if not self.async_mode:
+            self.flush()
+            return
+
+        self._ensure_worker()
+        if size >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """把缓冲区中的记录全部写入数据库，返回写入条数"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    break
+                try:
+                    OpLog.objects.bulk_create([OpLog(**r) for r in batch], batch_size=self.batch_size)
+                except Exception as e:
+                    with self._lock:
+                        self.failed += len(batch)
+                    print('OpLog批量写入失败：', e)
+                    break
+                written += len(batch)
+
+            with self._lock:
+                self.written += written
+                self.flushes += 1
+        return written
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._queue),
+                'capacity': self.capacity,
+                'batchSize': self.batch_size,
+                'intervalMs': int(self.interval * 1000),
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'flushes': self.flushes,
+            }
+
+    def _drain(self, limit):
+        with self._lock:
+            n = min(limit, len(self._queue))
+            return [self._queue.popleft() for _ in range(n)]
+
+    def _ensure_worker(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            if self._pid is not None:
+                # fork 之后子进程不继承父进程的线程，也不接管父进程未写入的记录
+                self._queue.clear()
+            self._pid = pid
+            t = threading.Thread(target=self._run, name='oplog-flusher', daemon=True)
+            t.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if not self._queue:
+                continue
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+def make_record(re_ip, re_method, re_url, access_time):
+    # 按 OpLog 字段长度截断，bulk_create 不经过 serializer 校验
+    # re_time 取请求时刻，不能留给入库时再取：缓冲区里的记录可能几秒后才写入
+    return {
+        're_time': timezone.now(),
+        're_ip': (re_ip or '')[0:100],
+        're_method': (re_method or '')[0:10],
+        're_url': (re_url or '')[0:200],
+        'access_time': str(access_time)[0:10],
+    }
+
+
+buffer = OpLogBuffer(
+    capacity=getattr(settings, 'OPLOG_BUFFER_SIZE', 10000),
+    batch_size=getattr(settings, 'OPLOG_FLUSH_BATCH', 200),
+    interval_ms=getattr(settings, 'OPLOG_FLUSH_INTERVAL_MS', 1000),
+    async_mode=getattr(settings, 'OPLOG_ASYNC', True),
+)
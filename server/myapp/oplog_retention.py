@@ -0,0 +1,89 @@
+# -*- coding:utf-8 -*-
+"""访问日志(OpLog)保留期清理与归档
+
+manage.py purge_op_logs 定期执行 purge_expired()：
+- re_time 早于 OPLOG_RETENTION_DAYS 天的日志按天处理，最旧的一天先处理
+- 先把这一天导出为 OPLOG_ARCHIVE_DIR/oplog-YYYY-MM-DD.ndjson.gz（先写临时文件再改名，
+  已存在的归档不会重写），再按 re_time 索引分批删除；每批一条短 DELETE，不会长时间锁表
+- 归档目录默认在 MEDIA_ROOT 之外（upload/ 对外公开访问，访问日志里有 IP，不能放进去）
+
+后台"清空"也改为分批删除。
+"""
+import datetime
+import os
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from myapp import exporter
+from myapp.models import OpLog
+
+ARCHIVE_FIELDS = ('id', 're_time', 're_ip', 're_method', 're_url', 're_content', 'access_time')
+
+
+def archive_dir():
+    return getattr(settings, 'OPLOG_ARCHIVE_DIR', '') or os.path.join(settings.BASE_DIR, 'backup', 'oplog')
+
+
+def _batch_size():
+    return max(getattr(settings, 'OPLOG_PURGE_BATCH', 5000), 1)
+
+
+def _day_start(d):
+    return datetime.datetime.combine(d, datetime.time.min)
+
+
+def archive_day(day):
+    """把某一天的日志写成 gzip 压缩的 NDJSON，返回文件路径；当天没有日志返回 None"""
+    start, end = _day_start(day), _day_start(day + datetime.timedelta(days=1))
+    path = os.path.join(archive_dir(), f'oplog-{day.isoformat()}.ndjson.gz')
+    if os.path.exists(path):
+        return path
+
+    qs = OpLog.objects.filter(re_time__gte=start, re_time__lt=end)
+    if not qs.exists():
+        return None
+
+    os.makedirs(archive_dir(), exist_ok=True)
+    tmp = f'{path}.tmp'
+    chunks = exporter.iter_chunks(qs, 're_time', ARCHIVE_FIELDS, size=_batch_size())
+    with open(tmp, 'wb') as f:
+        for data in exporter.gzip_stream(exporter.ndjson_lines(chunks)):
+            f.write(data)
+    os.replace(tmp, path)
+    return path
+
+
+def purge(queryset, batch_size=None, pause=0):
+    """按主键分批删除 queryset 中的日志，返回删除条数"""
+    batch_size = batch_size or _batch_size()
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by().values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += OpLog.objects.filter(id__in=ids).delete()[0]
+        if pause:
+            time.sleep(pause)
+
+
+def purge_expired(days=None, archive=None, pause=0):
+    """清理超过保留期的日志，返回 [(日期, 删除条数, 归档路径)]"""
+    days = getattr(settings, 'OPLOG_RETENTION_DAYS', 90) if days is None else days
+    if days <= 0:
+        return []
+    archive = getattr(settings, 'OPLOG_ARCHIVE', True) if archive is None else archive
+    cutoff = _day_start(timezone.now().date() - datetime.timedelta(days=days))
+
+    result = []
+    while True:
+        oldest = OpLog.objects.filter(re_time__lt=cutoff).order_by('re_time').values_list('re_time', flat=True).first()
+        if oldest is None:
+            break
+        day = oldest.date()
+        path = archive_day(day) if archive else None
+        start, end = _day_start(day), _day_start(day + datetime.timedelta(days=1))
+        deleted = purge(OpLog.objects.filter(re_time__gte=start, re_time__lt=end), pause=pause)
+        result.append((day, deleted, path))
+    return result
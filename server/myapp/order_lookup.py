@@ -0,0 +1,103 @@
+# -*- coding:utf-8 -*-
+"""前台订单查询
+
+shop/order/query 以及 Stripe/PayPal 的下单、确认接口都按 (orderNo, token) 找订单。
+find() 把订单和明细序列化成一份读模型放在共享缓存里，顾客在支付结果页反复轮询时
+不再查 b_order_item；订单状态变化后调用 invalidate()（事务提交后删除）。
+未支付订单的状态每次都按主键回库核对，支付完成或超时取消后顾客立即看到新状态。
+
+token 用 hmac.compare_digest 比对；缓存未命中时按 (order_no, query_token) 联合索引查询。
+"""
+import hmac
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from myapp import cache_ns
+from myapp.models import Order, OrderItem
+
+CACHE_TIMEOUT = 600
+# 未支付订单缓存时间更短；其状态每次读取都回库核对（见 find），缓存只省去订单明细的查询
+PENDING_CACHE_TIMEOUT = 30
+
+_ITEM_FIELDS = ('id', 'thing_id', 'title_snapshot', 'cover_snapshot', 'unit_price', 'quantity', 'line_total')
+
+
+def _serialize(order):
+    items = list(OrderItem.objects.filter(order=order).values(*_ITEM_FIELDS))
+    for it in items:
+        it['unit_price'] = str(it['unit_price'])
+        it['line_total'] = str(it['line_total'])
+    return {
+        'id': order.id,
+        'orderNo': order.order_no,
+        'token': order.query_token,
+        'status': order.status,
+        'currency': order.currency,
+        'subtotal': str(order.subtotal),
+        'shippingFee': str(order.shipping_fee),
+        'total': str(order.total),
+        'email': order.customer_email,
+        'phone': order.customer_phone,
+        'items': items,
+        'createTime': order.create_time.strftime('%Y-%m-%d %H:%M:%S') if order.create_time else None,
+    }
+
+
+def find(order_no, token):
+    """返回订单读模型（dict），订单不存在或 token 不正确时返回 None"""
+    order_no = str(order_no or '').strip()
+    token = str(token or '').strip()
+    if not order_no or not token:
+        return None
+
+    data = cache_ns.get(cache_ns.NS_ORDER, order_no)
+    if data is not None and data['status'] == 'pending':
+        # 支付回调、超时释放在别的进程里改状态，不能只靠缓存失效；按主键只取 status 一列核对
+        status = Order.objects.filter(id=data['id']).values_list('status', flat=True).first()
+        if status != 'pending':
+            data = None
+    if data is None:
+        order = Order.objects.filter(order_no=order_no, query_token=token).first()
+        if order is None:
+            return None
+        data = _serialize(order)
+        timeout = PENDING_CACHE_TIMEOUT if order.status == 'pending' else CACHE_TIMEOUT
+        cache_ns.put(cache_ns.NS_ORDER, order_no, data, timeout)
+
+    if not hmac.compare_digest(str(data['token']), token):
+        return None
+    return data
+
+
+def get_order(order_no, token):
+    """
+    返回 Order 对象（由读模型构造，只含读模型里的字段，其余字段访问时才查库），找不到返回 None
+    对它 save() 只会写回已加载的字段；需要加锁修改时仍应 select_for_update() 重新读取
+    """
+    data = find(order_no, token)
+    if data is None:
+        return None
+    loaded = {
+        'id': data['id'],
+        'order_no': data['orderNo'],
+        'query_token': data['token'],
+        'status': data['status'],
+        'currency': data['currency'],
+        'subtotal': Decimal(data['subtotal']),
+        'shipping_fee': Decimal(data['shippingFee']),
+        'total': Decimal(data['total']),
+        'customer_email': data['email'],
+        'customer_phone': data['phone'],
+        'create_time': parse_datetime(data['createTime']) if data['createTime'] else None,
+    }
+    # from_db 要求取值按模型字段顺序排列
+    names = [f.attname for f in Order._meta.concrete_fields if f.attname in loaded]
+    return Order.from_db('default', names, [loaded[n] for n in names])
+
+
+def invalidate(order_no):
+    """订单状态变化后调用；在事务内调用时等提交后再删，避免并发读把旧状态写回缓存"""
+    if order_no:
+        transaction.on_commit(lambda: cache_ns.delete(cache_ns.NS_ORDER, order_no))
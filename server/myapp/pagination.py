@@ -0,0 +1,151 @@
+# -*- coding:utf-8 -*-
+"""列表分页
+
+同一个分页器支持两种模式：
+- 页码：?page=N&pageSize=M，OFFSET 分页，总数只在 paginator 内部 COUNT 一次
+- 游标：?cursor=&pageSize=M（首页 cursor 留空），按 (时间字段, id) 倒序做 keyset 分页，
+  不再 OFFSET，深翻页耗时不随页码增长；响应里的 nextCursor 用于取下一页
+
+count_cache_ttl > 0 时总数走缓存（近似值，最多滞后 ttl 秒或到相关标签失效），
+适合 OpLog 这类 COUNT(*) 本身就很慢的大表。
+调用方已经知道总数时（例如从分组统计里得到）可以设置 count_hint，分页器不再 COUNT。
+queryset 可以是 .values() 的结果，游标模式要求其中包含 cursor_field 和 id。
+"""
+import base64
+import hashlib
+
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+
+from myapp import cache_ns
+
+
+def cached_count(queryset, ttl, tags=()):
+    """按 SQL 缓存 COUNT 结果"""
+    try:
+        sql = str(queryset.query)
+    except Exception:
+        return queryset.count()
+    key = f"{queryset.model._meta.db_table}:{hashlib.md5(sql.encode('utf-8')).hexdigest()}"
+    total = cache_ns.get(cache_ns.NS_COUNT, key)
+    if total is None:
+        token = cache_ns.versions(cache_ns.NS_COUNT, tags)
+        total = queryset.count()
+        cache_ns.put(cache_ns.NS_COUNT, key, total, ttl, token=token)
+    return total
+
+
+def encode_cursor(ts, pk):
+    raw = f"{ts.isoformat() if ts else ''}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """返回 (ts, pk)；格式不对时抛 NotFound，与页码越界的表现一致"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        ts_str, pk_str = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8').split('|', 1)
+        ts = parse_datetime(ts_str) if ts_str else None
+        if ts_str and ts is None:
+            raise ValueError(ts_str)
+        return ts, int(pk_str)
+    except Exception:
+        raise NotFound('无效的 cursor')
+
+
+class MyPageNumberPagination(PageNumberPagination):
+    page_size = 10  # 每页的默认项
+    page_size_query_param = 'pageSize'  # 允许通过 URL 参数设置每页的大小
+    max_page_size = 100  # 最大页尺寸
+    cursor_query_param = 'cursor'
+    cursor_field = 'create_time'  # keyset 排序字段，按 (cursor_field, id) 倒序
+    count_cache_ttl = 0
+    count_cache_tags = ()
+    count_hint = None
+
+    cursor_mode = False
+    next_cursor = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if self.cursor_query_param in request.query_params and isinstance(queryset, QuerySet):
+            return self._paginate_cursor(queryset, request)
+        if self.count_hint is not None:
+            self.django_paginator_class = self._fixed_count_paginator(self.count_hint)
+        elif self.count_cache_ttl:
+            self.django_paginator_class = self._cached_count_paginator()
+        return super().paginate_queryset(queryset, request, view=view)
+
+    @property
+    def total(self):
+        """总数：页码模式复用 paginator 已经算过的 count，游标模式按需（缓存）计算"""
+        if self.cursor_mode:
+            if self._total is None:
+                if self.count_hint is not None:
+                    self._total = self.count_hint
+                elif self.count_cache_ttl:
+                    self._total = cached_count(self._count_queryset, self.count_cache_ttl, self.count_cache_tags)
+                else:
+                    self._total = self._count_queryset.count()
+            return self._total
+        page = getattr(self, 'page', None)
+        return page.paginator.count if page is not None else 0
+
+    def _paginate_cursor(self, queryset, request):
+        self.cursor_mode = True
+        self._total = None
+        self._count_queryset = queryset.order_by()
+        page_size = self.get_page_size(request) or self.page_size
+
+        field = self.cursor_field
+        qs = queryset.order_by(f'-{field}', '-id')
+        cursor = (request.query_params.get(self.cursor_query_param) or '').strip()
+        if cursor:
+            ts, pk = decode_cursor(cursor)
+            # MySQL 倒序时 NULL 排在最后
+            if ts is None:
+                qs = qs.filter(**{f'{field}__isnull': True, 'id__lt': pk})
+            else:
+                qs = qs.filter(
+                    Q(**{f'{field}__lt': ts}) | Q(**{field: ts, 'id__lt': pk}) | Q(**{f'{field}__isnull': True})
+                )
+
+        rows = list(qs[:page_size + 1])
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            if isinstance(last, dict):
+                self.next_cursor = encode_cursor(last[field], last['id'])
+            else:
+                self.next_cursor = encode_cursor(getattr(last, field), last.pk)
+        else:
+            self.next_cursor = None
+        return rows
+
+    def _cached_count_paginator(self):
+        ttl = self.count_cache_ttl
+        tags = self.count_cache_tags
+
+        class CachedCountPaginator(DjangoPaginator):
+            @cached_property
+            def count(self):
+                if isinstance(self.object_list, QuerySet):
+                    return cached_count(self.object_list.order_by(), ttl, tags)
+                return super().count
+
+        return CachedCountPaginator
+
+    @staticmethod
+    def _fixed_count_paginator(count):
+
+        class FixedCountPaginator(DjangoPaginator):
+            @cached_property
+            def count(self):
+                return count
+
+        return FixedCountPaginator
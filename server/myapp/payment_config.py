@@ -0,0 +1,102 @@
+# -*- coding:utf-8 -*-
+"""支付配置（解密后）的进程内缓存
+
+Stripe/PayPal 的每个接口都要读 ShopSettings 并解密 4 个密文字段。这里按
+(ShopSettings.id, update_time) 缓存解密结果：配置没变时直接复用，不再做 Fernet 解密；
+后台保存配置后 update_time 变化，各 worker 下次读取时自动重新解密，
+保存配置的 worker 还会调用 invalidate() 立即作废。
+
+明文只保存在本进程内存里，不写入 Redis 等共享缓存；get() 每次返回副本，调用方修改不会影响缓存。
+"""
+import os
+import threading
+
+from myapp.crypto import decrypt_text
+from myapp.models import ShopSettings
+
+_ENCRYPTED_FIELDS = (
+    ('stripe_key', 'stripe_secret_key_enc'),
+    ('stripe_webhook_secret', 'stripe_webhook_secret_enc'),
+    ('paypal_client_id', 'paypal_client_id_enc'),
+    ('paypal_client_secret', 'paypal_client_secret_enc'),
+)
+
+
+def _decrypt(s, field):
+    try:
+        return decrypt_text(getattr(s, field, None))
+    except Exception:
+        return None
+
+
+class PaymentConfigCache(object):
+
+    def __init__(self):
+        self._entry = None  # (key, config, decrypt_count)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.decrypts = 0
+        self.decrypts_avoided = 0
+
+    def get(self):
+        s = ShopSettings.get_solo()
+        key = (s.id, s.update_time) if s else None
+        entry = self._entry
+        if entry is None or key is None or entry[0] != key:
+            with self._lock:
+                entry = self._entry
+                if entry is None or key is None or entry[0] != key:
+                    entry = self._load(s, key)
+                    if key is not None:
+                        self._entry = entry
+        else:
+            self.hits += 1
+            self.decrypts_avoided += entry[2]
+        return dict(entry[1])
+
+    def _load(self, s, key):
+        self.loads += 1
+        plain = {}
+        decrypt_count = 0
+        for name, field in _ENCRYPTED_FIELDS:
+            plain[name] = None
+            if s and getattr(s, field, None):
+                plain[name] = _decrypt(s, field)
+                decrypt_count += 1
+        self.decrypts += decrypt_count
+
+        config = {
+            'enable_stripe': getattr(s, 'enable_stripe', '1') if s else '1',
+            'enable_paypal': getattr(s, 'enable_paypal', '1') if s else '1',
+            'stripe_key': plain['stripe_key'] or os.getenv('STRIPE_SECRET_KEY'),
+            'stripe_webhook_secret': plain['stripe_webhook_secret'] or os.getenv('STRIPE_WEBHOOK_SECRET'),
+            'paypal_env': (getattr(s, 'paypal_env', None) if s else None) or os.getenv('PAYPAL_ENV') or 'sandbox',
+            'paypal_client_id': plain['paypal_client_id'] or os.getenv('PAYPAL_CLIENT_ID'),
+            'paypal_client_secret': plain['paypal_client_secret'] or os.getenv('PAYPAL_CLIENT_SECRET'),
+        }
+        return key, config, decrypt_count
+
+    def invalidate(self):
+        with self._lock:
+            self._entry = None
+
+    def stats(self):
+        return {
+            'cached': self._entry is not None,
+            'hits': self.hits,
+            'loads': self.loads,
+            'decrypts': self.decrypts,
+            'decryptsAvoided': self.decrypts_avoided,
+        }
+
+
+config = PaymentConfigCache()
+
+
+def get():
+    return config.get()
+
+
+def invalidate():
+    config.invalidate()
@@ -0,0 +1,187 @@
+# -*- coding:utf-8 -*-
+"""PayPal REST 客户端
+
+- access token 按 (环境, client_id, secret) 缓存在进程内，遵循返回的 expires_in，
+  到期前 PAYPAL_TOKEN_REFRESH_SECONDS 秒提前刷新；同一组凭据同时只有一个线程去换 token，
+  其它线程等它换完直接复用（single-flight）
+- 所有请求共用一个 requests.Session（keep-alive 连接池），创建订单、capture 不再各自握手
+- 业务请求返回 401 时作废缓存的 token 重新获取并重试一次
+"""
+import hashlib
+import os
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+SANDBOX_API_BASE = 'https://api-m.sandbox.paypal.com'
+LIVE_API_BASE = 'https://api-m.paypal.com'
+
+NOT_CONFIGURED_MSG = 'PayPal 未配置（缺少 PAYPAL_CLIENT_ID / PAYPAL_CLIENT_SECRET）'
+TOKEN_FAILED_MSG = 'PayPal token 请求失败'
+
+
+def api_base(paypal_env=None):
+    override = getattr(settings, 'PAYPAL_API_BASE', '')
+    if override:
+        # 指向本地替身服务时使用
+        return override.rstrip('/')
+    paypal_env = (paypal_env or os.getenv('PAYPAL_ENV') or 'sandbox').lower()
+    return SANDBOX_API_BASE if paypal_env != 'live' else LIVE_API_BASE
+
+
+def _timeout():
+    return (getattr(settings, 'PAYPAL_CONNECT_TIMEOUT', 5), getattr(settings, 'PAYPAL_READ_TIMEOUT', 20))
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = getattr(settings, 'PAYPAL_POOL_SIZE', 10)
+                session = requests.Session()
+                session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=pool_size))
+                session.mount('http://', HTTPAdapter(pool_connections=2, pool_maxsize=pool_size))
+                _session = session
+    return _session
+
+
+class TokenCache(object):
+
+    def __init__(self):
+        self._tokens = {}  # key -> (token, expires_at)
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fetches = 0
+        self.failures = 0
+
+    @staticmethod
+    def _key(client_id, client_secret, paypal_env):
+        digest = hashlib.sha256(f'{client_id}:{client_secret}'.encode('utf-8')).hexdigest()
+        return f"{api_base(paypal_env)}|{digest}"
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _fresh(self, key):
+        entry = self._tokens.get(key)
+        if entry is None:
+            return None
+        token, expires_at = entry
+        margin = getattr(settings, 'PAYPAL_TOKEN_REFRESH_SECONDS', 300)
+        if time.time() >= expires_at - margin:
+            return None
+        return token
+
+    def get(self, client_id=None, client_secret=None, paypal_env=None, force=False, stale=None):
+        """
+        返回 (token, err)
+        force: 忽略缓存重新获取；stale: 调用方刚被拒绝的 token，缓存里仍是它时才重新获取
+        """
+        client_id = client_id or os.getenv('PAYPAL_CLIENT_ID')
+        client_secret = client_secret or os.getenv('PAYPAL_CLIENT_SECRET')
+        if not client_id or not client_secret:
+            return None, NOT_CONFIGURED_MSG
+
+        key = self._key(client_id, client_secret, paypal_env)
+        if not force:
+            token = self._fresh(key)
+            if token and token != stale:
+                self.hits += 1
+                return token, None
+
+        with self._key_lock(key):
+            # 等锁期间可能已经有线程换好了
+            if not force:
+                token = self._fresh(key)
+                if token and token != stale:
+                    self.hits += 1
+                    return token, None
+            return self._fetch(key, client_id, client_secret, paypal_env)
+
+    def _fetch(self, key, client_id, client_secret, paypal_env):
+        self.fetches += 1
+        try:
+            resp = get_session().post(
+                f"{api_base(paypal_env)}/v1/oauth2/token",
+                auth=(client_id, client_secret),
+                headers={'Content-Type': 'application/x-www-form-urlencoded'},
+                data={'grant_type': 'client_credentials'},
+                timeout=_timeout(),
+            )
+            if resp.status_code >= 300:
+                raise ValueError(resp.status_code)
+            data = resp.json()
+        except Exception:
+            self.failures += 1
+            self._tokens.pop(key, None)
+            return None, TOKEN_FAILED_MSG
+
+        token = data.get('access_token')
+        try:
+            expires_in = int(data.get('expires_in') or 0)
+        except (TypeError, ValueError):
+            expires_in = 0
+        if token and expires_in > 0:
+            self._tokens[key] = (token, time.time() + expires_in)
+        else:
+            self._tokens.pop(key, None)
+        return token, None
+
+    def stats(self):
+        return {
+            'cachedTokens': len(self._tokens),
+            'hits': self.hits,
+            'fetches': self.fetches,
+            'failures': self.failures,
+        }
+
+
+tokens = TokenCache()
+
+
+def get_access_token(client_id=None, client_secret=None, paypal_env=None, force=False, stale=None):
+    return tokens.get(client_id, client_secret, paypal_env, force=force, stale=stale)
+
+
+def api_post(path, client_id=None, client_secret=None, paypal_env=None, json=None):
+    """
+    带 token 调用 PayPal 接口
+    返回 (resp, err)，err 只表示拿不到 token 或网络失败；业务错误由调用方看 resp.status_code
+    """
+    token, err = get_access_token(client_id, client_secret, paypal_env)
+    if err:
+        return None, err
+    if not token:
+        return None, TOKEN_FAILED_MSG
+
+    url = f"{api_base(paypal_env)}{path}"
+    for retry in (True, False):
+        try:
+            resp = get_session().post(
+                url,
+                headers={'Content-Type': 'application/json', 'Authorization': f'Bearer {token}'},
+                json=json,
+                timeout=_timeout(),
+            )
+        except Exception:
+            return None, 'PayPal 请求失败'
+        if resp.status_code != 401 or not retry:
+            return resp, None
+        # token 被提前吊销：换一个新的再试一次
+        token, err = get_access_token(client_id, client_secret, paypal_env, stale=token)
+        if err or not token:
+            return None, err or TOKEN_FAILED_MSG
+    return resp, None
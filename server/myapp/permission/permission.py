@@ -1,18 +1,13 @@
 from functools import wraps
 
+from myapp.auth import principal
 from myapp.handler import APIResponse
-from myapp.models import User
 
 
 def isDemoAdminUser(request):
-    adminToken = request.META.get("HTTP_ADMINTOKEN")
-    users = User.objects.filter(admin_token=adminToken)
-    if len(users) > 0:
-        user = users[0]
-        if user.role == '3':  # （角色3）表示演示帐号
-            print('演示帐号-----是')
-            return True
-    return False
+    user = principal.resolve(request)
+    # （角色3）表示演示帐号
+    return bool(user) and user['role'] == '3'
 
 
 def check_if_demo(view_func):
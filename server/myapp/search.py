@@ -0,0 +1,149 @@
+# -*- coding:utf-8 -*-
+"""商品搜索倒排索引
+
+把 Thing 的 title/summary/properties、SKU 编码以及 I18nText 中各语言的译文切成 token，
+写入 b_thing_search(token, thing, weight)。搜索时按 token 精确命中索引，
+再按 SUM(weight) 排序，不再对 b_thing 做 LIKE '%q%' 全表扫描。
+
+切词规则：
+- 中日韩文字：单字 + 相邻二字（bigram）
+- 字母数字：按词切分，保存 2..N 的前缀（edge n-gram），支持输入前缀即可命中
+索引在 admin 商品 / SKU / 译文写入后增量更新，全量重建用 manage.py rebuild_search_index。
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from myapp.models import I18nText, Thing, ThingSearchTerm, ThingSku
+
+TOKEN_MAX_LEN = 32
+PREFIX_MIN_LEN = 2
+
+# 各字段权重，同一 token 出现在多个字段时累加
+FIELD_WEIGHTS = {
+    'title': 10,
+    'sku_code': 8,
+    'summary': 3,
+    'properties': 2,
+}
+# 译文权重略低于原文
+I18N_WEIGHTS = {
+    'title': 6,
+    'summary': 2,
+}
+
+MAX_RESULTS = getattr(settings, 'SEARCH_MAX_RESULTS', 1000)
+
+_CJK = '぀-ヿ㐀-䶿一-鿿가-힯'
+_RUN_RE = re.compile(r'[%s]+|[a-z0-9]+' % _CJK)
+_CJK_RE = re.compile(r'[%s]' % _CJK)
+
+
+def _runs(text):
+    text = unicodedata.normalize('NFKC', str(text or '')).lower()
+    return _RUN_RE.findall(text)
+
+
+def index_tokens(text):
+    """文档侧切词：CJK 单字 + bigram，英文数字词的前缀"""
+    tokens = set()
+    for run in _runs(text):
+        if _CJK_RE.match(run):
+            tokens.update(run)
+            tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            word = run[:TOKEN_MAX_LEN]
+            if len(word) < PREFIX_MIN_LEN:
+                tokens.add(word)
+            else:
+                tokens.update(word[:n] for n in range(PREFIX_MIN_LEN, len(word) + 1))
+    return tokens
+
+
+def query_tokens(text):
+    """查询侧切词：CJK 用 bigram（单字时用单字），英文数字词整体作为前缀"""
+    tokens = set()
+    for run in _runs(text):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.add(run)
+            else:
+                tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.add(run[:TOKEN_MAX_LEN])
+    return tokens
+
+
+def _build_rows(thing_ids):
+    weights = {}  # {(token, thing_id): weight}
+
+    def add(thing_id, text, weight):
+        for t in index_tokens(text):
+            k = (t, thing_id)
+            weights[k] = weights.get(k, 0) + weight
+
+    for row in Thing.objects.filter(id__in=thing_ids).values('id', 'title', 'summary', 'properties'):
+        for field in ('title', 'summary', 'properties'):
+            add(row['id'], row[field], FIELD_WEIGHTS[field])
+
+    for thing_id, sku_code in ThingSku.objects.filter(thing_id__in=thing_ids).values_list('thing_id', 'sku_code'):
+        add(thing_id, sku_code, FIELD_WEIGHTS['sku_code'])
+
+    str_ids = {str(i): i for i in thing_ids}
+    texts = I18nText.objects.filter(
+        model='Thing', object_id__in=list(str_ids.keys()), field__in=list(I18N_WEIGHTS.keys())
+    ).values_list('object_id', 'field', 'value')
+    for object_id, field, value in texts:
+        add(str_ids[object_id], value, I18N_WEIGHTS[field])
+
+    return [ThingSearchTerm(token=t, thing_id=tid, weight=w) for (t, tid), w in weights.items()]
+
+
+def reindex_things(thing_ids):
+    """重建指定商品的索引行，已删除的商品只清理索引，返回写入行数"""
+    thing_ids = sorted({int(i) for i in thing_ids if str(i).isdigit()})
+    if not thing_ids:
+        return 0
+    with transaction.atomic():
+        rows = _build_rows(thing_ids)
+        ThingSearchTerm.objects.filter(thing_id__in=thing_ids).delete()
+        ThingSearchTerm.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def reindex_things_quietly(thing_ids):
+    """供 admin 写操作调用，索引失败不影响保存本身"""
+    try:
+        reindex_things(thing_ids)
+    except Exception as e:
+        print('搜索索引更新失败：', e)
+
+
+_index_ready = False
+
+
+def index_ready():
+    """索引表里是否已经有数据；一旦有数据就在进程内记住，不再每次查询"""
+    global _index_ready
+    if not _index_ready:
+        _index_ready = ThingSearchTerm.objects.exists()
+    return _index_ready
+
+
+def search_thing_ids(query, limit=MAX_RESULTS):
+    """
+    返回按相关度排序的上架商品 id 列表，所有查询 token 都要命中；
+    查询里没有可用 token 或索引还没建（表为空）时返回 None，调用方自行回退
+    """
+    tokens = query_tokens(query)
+    if not tokens or not index_ready():
+        return None
+    rows = ThingSearchTerm.objects.filter(token__in=tokens, thing__status='0') \
+        .values('thing_id') \
+        .annotate(score=Sum('weight'), hits=Count('token')) \
+        .filter(hits=len(tokens)) \
+        .order_by('-score', '-thing_id')[:limit]
+    return [r['thing_id'] for r in rows]
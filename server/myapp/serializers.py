@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from myapp import category_tree, imaging
 from myapp.models import Thing, Category, User, OpLog, ErrorLog, News, Case, Faq, Inquiry, Download, BasicSite, \
     BasicTdk, BasicBanner, BasicGlobal, BasicAdditional, Comment, About, Advantage
 
@@ -8,20 +9,29 @@ class ThingSerializer(serializers.ModelSerializer):
     create_time = serializers.DateTimeField(format='%Y-%m-%d %H:%M:%S', required=False)
     # 额外字段
     category_title = serializers.ReadOnlyField(source='category.title')
+    # 与 cover 中每张图一一对应的衍生图（myapp.imaging）
+    cover_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Thing
         fields = '__all__'
 
+    def get_cover_variants(self, obj):
+        return imaging.variants(obj.cover)
+
 
 class ListThingSerializer(serializers.ModelSerializer):
     create_time = serializers.DateTimeField(format='%Y-%m-%d %H:%M:%S', required=False)
     # 额外字段
     category_title = serializers.ReadOnlyField(source='category.title')
+    cover_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Thing
-        fields = ('id', 'create_time', 'category_title', 'title', 'cover', 'price')
+        fields = ('id', 'create_time', 'category_title', 'title', 'cover', 'price', 'cover_variants')
+
+    def get_cover_variants(self, obj):
+        return imaging.variants(obj.cover)
 
 
 class DetailThingSerializer(serializers.ModelSerializer):
@@ -60,12 +70,8 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'pid', 'title', 'sort', 'cover', 'children']
 
     def get_children(self, obj):
-        # 获取当前类别的所有子类别，并根据 sort 排序
-        children = Category.objects.filter(pid=obj.id).order_by('sort', '-id')
-        # 如果有子类，继续序列化；如果没有则返回 None
-        if children.exists():
-            return CategorySerializer(children, many=True).data
-        return None  # 如果没有子类则返回 None
+        # 子类别取自进程内分类树（已按 sort 排序），没有子类则返回 None
+        return category_tree.get_tree().serialize(obj.id) or None
 
 
 class NewsSerializer(serializers.ModelSerializer):
@@ -78,10 +84,14 @@ class NewsSerializer(serializers.ModelSerializer):
 
 class NewsListSerializer(serializers.ModelSerializer):
     create_time = serializers.DateTimeField(format='%Y-%m-%d %H:%M:%S', required=False)
+    cover_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = News
-        fields = ('id', 'title', 'create_time', 'cover')
+        fields = ('id', 'title', 'create_time', 'cover', 'cover_variants')
+
+    def get_cover_variants(self, obj):
+        return imaging.variants(obj.cover)
 
 
 class FaqSerializer(serializers.ModelSerializer):
@@ -0,0 +1,208 @@
+# -*- coding:utf-8 -*-
+"""站点地图分片生成
+
+- 每类页面（固定页面、产品、分类、新闻、案例）按 id 区间切成不超过 SITEMAP_SHARD_SIZE 条 URL 的分片，
+  写成 SITEMAP_DIR/sitemap-<类型>-<序号>.xml.gz，再生成 sitemap_index.xml 列出全部分片
+- 源数据只按 id 分批读取 (id, create_time) 两列，边读边写 gzip，不在内存里拼整棵 XML 树
+- 每个分片记录内容签名（manifest.json），签名没变的分片不重写；
+  只改了标题、描述之类不影响 URL/lastmod 的字段时，一个文件都不会重写
+- 文件先写临时文件（名字带进程号和随机串）再改名，nginx 随时读到的都是完整文件
+- 产品/分类/新闻/案例有改动后由 build_sitemaps --loop 在后台重建（rebuild_if_stale），
+  同一时间只有一个进程在建；前台请求只读现成的索引，仅在索引还不存在时才自己建一次
+"""
+import gzip
+import hashlib
+import json
+import os
+import uuid
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from myapp import cache_ns
+from myapp.models import Case, Category, News, Thing
+
+NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+INDEX_FILE = 'sitemap_index.xml'
+MANIFEST_FILE = 'manifest.json'
+READ_CHUNK = 5000
+LOCK_TIMEOUT = 600
+
+_BUILT_KEY = 'built'
+_LOCK_KEY = cache_ns.make_key(cache_ns.NS_SITEMAP, 'lock')
+_TAGS = (cache_ns.TAG_THING, cache_ns.TAG_CATEGORY, cache_ns.TAG_NEWS, cache_ns.TAG_CASE)
+
+STATIC_PAGES = (
+    ('/', 1.0),
+    ('/about', 0.9),
+    ('/contact', 0.9),
+    ('/product', 0.9),
+    ('/news', 0.9),
+    ('/case', 0.9),
+    ('/faq', 0.9),
+)
+
+# (类型, queryset, 路径模板, priority)
+SOURCES = (
+    ('thing', lambda: Thing.objects.filter(status='0'), '/product/{}', 0.9),
+    ('category', lambda: Category.objects.all(), '/product/category/{}', 0.7),
+    ('news', lambda: News.objects.filter(status='0'), '/news/{}', 0.9),
+    ('case', lambda: Case.objects.filter(status='0'), '/case/{}', 0.8),
+)
+
+
+def sitemap_dir():
+    return getattr(settings, 'SITEMAP_DIR', '') or os.path.join(settings.MEDIA_ROOT, 'sitemap')
+
+
+def _shard_size():
+    # 协议上限 50000 条
+    return min(max(getattr(settings, 'SITEMAP_SHARD_SIZE', 50000), 1), 50000)
+
+
+def _base_url():
+    return settings.BASE_HOST_URL.rstrip('/')
+
+
+def _url_xml(loc, lastmod, priority):
+    parts = [f'<url><loc>{escape(loc)}</loc>']
+    if lastmod:
+        parts.append(f'<lastmod>{lastmod}</lastmod>')
+    parts.append(f'<changefreq>weekly</changefreq><priority>{priority}</priority></url>\n')
+    return ''.join(parts)
+
+
+def _iter_rows(queryset):
+    """按 id 分批读取 (id, create_time)"""
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', 'create_time')[:READ_CHUNK])
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1][0]
+
+
+def _iter_entries():
+    """产出 (类型, 分片号, url 的 XML 片段)；按 id 区间分片，删改一条只影响它所在的分片"""
+    base = _base_url()
+    size = _shard_size()
+    for loc, priority in STATIC_PAGES:
+        yield 'pages', 1, _url_xml(f'{base}{loc}', None, priority)
+    for kind, queryset, path, priority in SOURCES:
+        for pk, create_time in _iter_rows(queryset()):
+            lastmod = create_time.strftime('%Y-%m-%d') if create_time else None
+            yield kind, pk // size + 1, _url_xml(f'{base}{path.format(pk)}', lastmod, priority)
+
+
+def _iter_shards():
+    """产出 (文件名, [url 片段])，每个分片最多 SITEMAP_SHARD_SIZE 条"""
+    current, urls = None, []
+    for kind, seq, xml in _iter_entries():
+        if (kind, seq) != current:
+            if urls:
+                yield 'sitemap-%s-%s.xml.gz' % current, urls
+            current, urls = (kind, seq), []
+        urls.append(xml)
+    if urls:
+        yield 'sitemap-%s-%s.xml.gz' % current, urls
+
+
+def _atomic_write(path, data_chunks, compress=False):
+    # 临时文件名各进程不同，并发写入不会写进同一个文件
+    tmp = f'{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp'
+    opener = (lambda p: gzip.open(p, 'wb', compresslevel=6)) if compress else (lambda p: open(p, 'wb'))
+    try:
+        with opener(tmp) as f:
+            for chunk in data_chunks:
+                f.write(chunk.encode('utf-8'))
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build():
+    """增量生成全部分片和索引，返回 {'shards': 分片数, 'written': 重写的分片数}"""
+    directory = sitemap_dir()
+    os.makedirs(directory, exist_ok=True)
+    old = _load_manifest(directory)
+    manifest = {}
+    written = 0
+    today = timezone.now().strftime('%Y-%m-%d')
+
+    for name, urls in _iter_shards():
+        digest = hashlib.sha1()
+        for xml in urls:
+            digest.update(xml.encode('utf-8'))
+        signature = digest.hexdigest()
+        prev = old.get(name)
+        path = os.path.join(directory, name)
+        if prev and prev.get('signature') == signature and os.path.exists(path):
+            manifest[name] = prev
+            continue
+        _atomic_write(path, [f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{NS}">\n', *urls, '</urlset>\n'],
+                      compress=True)
+        manifest[name] = {'signature': signature, 'urls': len(urls), 'lastmod': today}
+        written += 1
+
+    if written or set(old) != set(manifest) or not os.path.exists(os.path.join(directory, INDEX_FILE)):
+        _atomic_write(os.path.join(directory, INDEX_FILE), _index_lines(manifest))
+        _atomic_write(os.path.join(directory, MANIFEST_FILE), [json.dumps(manifest, indent=1)])
+
+    # 不再需要的分片：新索引已经换上后才删除，旧索引在任何时刻都不会指向已删除的分片
+    for name in set(old) - set(manifest):
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+    return {'shards': len(manifest), 'written': written}
+
+
+def _index_lines(manifest):
+    base = _base_url()
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{NS}">\n'
+    for name in manifest:
+        yield f'<sitemap><loc>{escape(base)}/{name}</loc><lastmod>{manifest[name]["lastmod"]}</lastmod></sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def read_index():
+    try:
+        with open(os.path.join(sitemap_dir(), INDEX_FILE), 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def is_stale():
+    """上次生成之后产品/分类/新闻/案例是否有改动（或从未生成）"""
+    return not cache_ns.get(cache_ns.NS_SITEMAP, _BUILT_KEY) or read_index() is None
+
+
+def rebuild_if_stale(force=False):
+    """
+    有改动时重建，返回 build() 的结果；没有改动或别的进程正在重建时返回 None。
+    标签版本在读库之前取得，重建期间再有改动，下一轮仍会重建
+    """
+    if not force and not is_stale():
+        return None
+    if not cache.add(_LOCK_KEY, 1, LOCK_TIMEOUT):
+        return None
+    try:
+        token = cache_ns.versions(cache_ns.NS_SITEMAP, _TAGS)
+        result = build()
+        cache_ns.put(cache_ns.NS_SITEMAP, _BUILT_KEY, True, None, token=token)
+        return result
+    finally:
+        cache.delete(_LOCK_KEY)
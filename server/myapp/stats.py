@@ -0,0 +1,174 @@
+# -*- coding:utf-8 -*-
+"""后台概览统计汇总（StatHourly / StatDaily）
+
+manage.py rollup_stats 定期调用 refresh()：
+- 访问量：只重算上次汇总到的小时往前 STATS_ROLLUP_LOOKBACK_HOURS 小时至今的 OpLog
+  （覆盖异步写日志的延迟），每小时记 PV、去重 IP 数以及 IP 的 HyperLogLog sketch
+- 订单/支付/询盘：订单状态当天还会变化，每次重算今天（及访问量窗口）内各小时的数量
+- 受影响的日期由小时行合并成 StatDaily：PV 等直接相加，UV 由小时 sketch 合并估计
+
+概览接口只读这两张表，不再扫 b_op_log。
+注意：OpLog 按保留期清理后不要再用 --since 重算那段时间，否则汇总会被清零。
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from myapp.hll import HyperLogLog
+from myapp.models import Inquiry, OpLog, Order, Payment, StatDaily, StatHourly
+
+TRAFFIC_FIELDS = ('pv', 'uv', 'uv_sketch')
+BUSINESS_FIELDS = ('order_count', 'order_paid_count', 'order_pending_count', 'payment_count', 'inquiry_count')
+SUM_FIELDS = ('pv',) + BUSINESS_FIELDS
+
+
+def hour_floor(dt):
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(d):
+    return datetime.datetime.combine(d, datetime.time.min)
+
+
+def _traffic(start, end):
+    """{hour: {pv, uv, uv_sketch}}"""
+    qs = OpLog.objects.filter(re_time__gte=start, re_time__lt=end).annotate(h=TruncHour('re_time'))
+    result = {}
+    for row in qs.values('h').annotate(pv=Count('id')).order_by():
+        result[row['h']] = {'pv': row['pv']}
+
+    ips = {}
+    for h, ip in qs.values_list('h', 're_ip').distinct().order_by():
+        if ip:
+            ips.setdefault(h, set()).add(ip)
+    for h, entry in result.items():
+        values = ips.get(h, ())
+        entry['uv'] = len(values)
+        entry['uv_sketch'] = HyperLogLog().update(values).to_bytes() if values else None
+    return result
+
+
+def _business(start, end):
+    """{hour: {order_count, ..., inquiry_count}}"""
+    result = {}
+
+    def bucket(h):
+        return result.setdefault(h, dict.fromkeys(BUSINESS_FIELDS, 0))
+
+    orders = Order.objects.filter(create_time__gte=start, create_time__lt=end) \
+        .annotate(h=TruncHour('create_time')).values('h', 'status').annotate(n=Count('id')).order_by()
+    for row in orders:
+        entry = bucket(row['h'])
+        entry['order_count'] += row['n']
+        if row['status'] == 'paid':
+            entry['order_paid_count'] += row['n']
+        elif row['status'] == 'pending':
+            entry['order_pending_count'] += row['n']
+
+    for model, field in ((Payment, 'payment_count'), (Inquiry, 'inquiry_count')):
+        rows = model.objects.filter(create_time__gte=start, create_time__lt=end) \
+            .annotate(h=TruncHour('create_time')).values('h').annotate(n=Count('id')).order_by()
+        for row in rows:
+            bucket(row['h'])[field] = row['n']
+    return result
+
+
+def _write_hours(start, end, fields, computed):
+    """把 [start, end) 内各小时的 fields 更新为 computed 中的值，没有数据的已有行清零"""
+    existing = {r.hour: r for r in StatHourly.objects.filter(hour__gte=start, hour__lt=end)}
+    to_update, to_create = [], []
+    for h in set(existing) | set(computed):
+        values = computed.get(h, {})
+        row = existing.get(h)
+        if row is None:
+            row = StatHourly(hour=h)
+            to_create.append(row)
+        else:
+            to_update.append(row)
+        for f in fields:
+            setattr(row, f, values.get(f, None if f == 'uv_sketch' else 0))
+    if to_create:
+        StatHourly.objects.bulk_create(to_create)
+    if to_update:
+        now = timezone.now()
+        for row in to_update:
+            row.update_time = now
+        StatHourly.objects.bulk_update(to_update, list(fields) + ['update_time'])
+
+
+def rollup_hours(start, end, traffic=True, business=True):
+    start = hour_floor(start)
+    if traffic:
+        _write_hours(start, end, TRAFFIC_FIELDS, _traffic(start, end))
+    if business:
+        _write_hours(start, end, BUSINESS_FIELDS, _business(start, end))
+
+
+def rollup_days(days):
+    """由小时行重建这些日期的 StatDaily"""
+    for day in sorted(set(days)):
+        start = day_start(day)
+        totals = dict.fromkeys(SUM_FIELDS, 0)
+        sketch = None
+        for row in StatHourly.objects.filter(hour__gte=start, hour__lt=start + datetime.timedelta(days=1)):
+            for f in SUM_FIELDS:
+                totals[f] += getattr(row, f)
+            if row.uv_sketch:
+                hll = HyperLogLog.from_bytes(row.uv_sketch)
+                sketch = hll if sketch is None else sketch.merge(hll)
+        totals['uv'] = sketch.count() if sketch else 0
+        totals['uv_sketch'] = sketch.to_bytes() if sketch else None
+        StatDaily.objects.update_or_create(day=day, defaults=totals)
+
+
+def _days_between(start, end):
+    d = start.date()
+    while day_start(d) < end:
+        yield d
+        d += datetime.timedelta(days=1)
+
+
+def refresh(since=None):
+    """
+    增量汇总，返回重算的天数
+    since: 从该时间起全部重算（首次部署回填用），默认从上次汇总到的小时往前 STATS_ROLLUP_LOOKBACK_HOURS 小时
+    """
+    now = timezone.now()
+    end = hour_floor(now) + datetime.timedelta(hours=1)
+    today_start = day_start(now.date())
+
+    if since is None:
+        last = StatHourly.objects.order_by('-hour').values_list('hour', flat=True).first()
+        if last is None:
+            # 第一次运行：从最早的访问日志开始回填
+            last = OpLog.objects.order_by('re_time').values_list('re_time', flat=True).first() or now
+        lookback = getattr(settings, 'STATS_ROLLUP_LOOKBACK_HOURS', 2)
+        traffic_start = min(hour_floor(last) - datetime.timedelta(hours=lookback), hour_floor(now))
+    else:
+        traffic_start = hour_floor(since)
+    business_start = min(traffic_start, today_start)
+
+    # 按天推进，回填很长一段时间时单次查询的数据量也有限
+    days = list(_days_between(business_start, end))
+    for d in days:
+        d_start = day_start(d)
+        d_end = min(d_start + datetime.timedelta(days=1), end)
+        if max(d_start, traffic_start) < d_end:
+            rollup_hours(max(d_start, traffic_start), d_end, traffic=True, business=False)
+        rollup_hours(d_start, d_end, traffic=False, business=True)
+    rollup_days(days)
+    return len(days)
+
+
+def visits(days):
+    """最近 days 天（含今天）每天的 PV/UV"""
+    since = (timezone.now() - datetime.timedelta(days=days)).date()
+    return list(StatDaily.objects.filter(day__gte=since).order_by('day').values('day', 'pv', 'uv'))
+
+
+def today_totals():
+    row = StatDaily.objects.filter(day=timezone.now().date()).values('uv', *SUM_FIELDS).first()
+    return row or dict.fromkeys(('uv',) + SUM_FIELDS, 0)
@@ -0,0 +1,197 @@
+# -*- coding:utf-8 -*-
+"""Stripe webhook 事件存储与处理
+
+webhook 验签通过后只调用 record() 把事件写入 b_stripe_event（event_id 唯一，重复投递直接忽略）
+并立即返回 2xx；锁订单、扣库存、写 Payment 都交给 manage.py process_stripe_events：
+- 按接收顺序处理；同一订单前面还有未处理完的事件时，后面的事件等它完成，
+  多个处理进程并存时同一订单也只会有一个事件在处理
+- 数据库异常等临时错误按指数退避重试，金额/币种校验失败等永久错误直接记为 failed
+- replay() 可以把事件重新放回队列（finalize_paid_order 本身幂等，重放已处理的事件是安全的）
+"""
+import datetime
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from myapp import checkout
+from myapp.models import Order, StripeEvent
+
+HANDLED_TYPES = ('checkout.session.completed',)
+
+RETRY_BASE_SECONDS = 30
+RETRY_CAP_SECONDS = 3600
+# 'processing' 状态超过这个时间视为处理进程中途退出，重新放回队列
+STALE_PROCESSING_SECONDS = 600
+
+UNRESOLVED = ('pending', 'processing')
+
+
+class PermanentError(Exception):
+    """重试也不会成功的错误"""
+
+
+def _session_order_no(session):
+    return (session.get('metadata') or {}).get('order_no') or session.get('client_reference_id')
+
+
+def record(event, payload):
+    """
+    保存已验签的事件，返回 (StripeEvent, created)
+    payload 为原始请求体，处理时按它重新解析，不依赖 stripe SDK 对象
+    """
+    event_id = event.get('id')
+    if not event_id:
+        return None, False
+
+    event_type = event.get('type')
+    order_no = None
+    if event_type in HANDLED_TYPES:
+        order_no = _session_order_no((event.get('data') or {}).get('object') or {})
+
+    stripe_created = None
+    try:
+        stripe_created = datetime.datetime.fromtimestamp(int(event.get('created')))
+    except (TypeError, ValueError):
+        pass
+
+    try:
+        with transaction.atomic():
+            evt = StripeEvent.objects.create(
+                event_id=event_id,
+                event_type=(event_type or '')[0:100],
+                order_no=str(order_no)[0:64] if order_no else None,
+                payload=payload,
+                status='pending' if event_type in HANDLED_TYPES else 'skipped',
+                next_attempt_time=timezone.now(),
+                stripe_created=stripe_created,
+            )
+        return evt, True
+    except IntegrityError:
+        # Stripe 重复投递
+        return StripeEvent.objects.filter(event_id=event_id).first(), False
+
+
+def _handle_checkout_completed(evt, data):
+    """返回处理备注（可为空），永久错误抛 PermanentError"""
+    session = (data.get('data') or {}).get('object') or {}
+    if session.get('payment_status') != 'paid':
+        return 'payment_status != paid'
+
+    order_no = _session_order_no(session)
+    session_id = session.get('id')
+    if not order_no or not session_id:
+        return 'missing order_no/session id'
+
+    order = Order.objects.filter(order_no=order_no).first()
+    if order is None:
+        raise PermanentError(f'order not found: {order_no}')
+
+    # 校验金额/币种
+    currency = (session.get('currency') or '').upper()
+    amount_total = session.get('amount_total')
+    expected_amount = int(order.total * 100)
+    if currency and currency != order.currency:
+        checkout.mark_payment_failed(order.id, provider='stripe', provider_ref=session_id, msg='币种校验失败', raw_data=session)
+        raise PermanentError('币种校验失败')
+    if amount_total is not None and int(amount_total) != expected_amount:
+        checkout.mark_payment_failed(order.id, provider='stripe', provider_ref=session_id, msg='金额校验失败', raw_data=session)
+        raise PermanentError('金额校验失败')
+
+    ok, msg = checkout.finalize_paid_order(order.id, provider='stripe', provider_ref=session_id, raw_data=session)
+    # 订单已记为 paid，库存问题交给商家处理，重试也不会改变结果
+    return None if ok else (msg or '库存扣减失败')
+
+
+_HANDLERS = {
+    'checkout.session.completed': _handle_checkout_completed,
+}
+
+
+def _retry_delay(attempts):
+    return min(RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), RETRY_CAP_SECONDS)
+
+
+def process_event(evt):
+    """处理一条已抢占（processing）的事件，返回最终状态"""
+    now = timezone.now()
+    evt.attempts += 1
+    try:
+        handler = _HANDLERS.get(evt.event_type)
+        if handler is None:
+            evt.status, evt.last_error = 'skipped', None
+        else:
+            note = handler(evt, json.loads(evt.payload or '{}'))
+            evt.status, evt.last_error = 'done', note[0:500] if note else None
+        evt.processed_time = timezone.now()
+    except PermanentError as e:
+        evt.status, evt.last_error = 'failed', str(e)[0:500]
+        evt.processed_time = timezone.now()
+    except Exception as e:
+        evt.last_error = str(e)[0:500]
+        if evt.attempts >= getattr(settings, 'STRIPE_EVENT_MAX_ATTEMPTS', 8):
+            evt.status = 'failed'
+        else:
+            evt.status = 'pending'
+            evt.next_attempt_time = now + datetime.timedelta(seconds=_retry_delay(evt.attempts))
+    evt.save(update_fields=['attempts', 'status', 'last_error', 'processed_time', 'next_attempt_time', 'update_time'])
+    return evt.status
+
+
+def release_stale():
+    """把中途中断的 'processing' 放回队列"""
+    stale_before = timezone.now() - datetime.timedelta(seconds=STALE_PROCESSING_SECONDS)
+    return StripeEvent.objects.filter(status='processing', update_time__lt=stale_before) \
+        .update(status='pending', next_attempt_time=timezone.now())
+
+
+def process_due(batch_size=50):
+    """处理一批到期事件，返回 {状态: 条数}"""
+    now = timezone.now()
+    due = list(StripeEvent.objects.filter(status='pending', next_attempt_time__lte=now)
+               .order_by('id').values_list('id', 'order_no')[:batch_size])
+
+    result = {}
+    for event_id, order_no in due:
+        # 同一订单更早的事件还没处理完（等待重试或其它进程正在处理），保持顺序，这条先不动
+        if order_no and StripeEvent.objects.filter(order_no=order_no, status__in=UNRESOLVED, id__lt=event_id).exists():
+            continue
+        # 先抢占，避免多个处理进程重复处理
+        if not StripeEvent.objects.filter(id=event_id, status='pending').update(status='processing', update_time=timezone.now()):
+            continue
+        status = process_event(StripeEvent.objects.get(id=event_id))
+        result[status] = result.get(status, 0) + 1
+    return result
+
+
+def replay(event_ids=None, status=None, since=None):
+    """把事件重新放回队列，返回条数"""
+    qs = StripeEvent.objects.exclude(status='processing')
+    if event_ids:
+        qs = qs.filter(event_id__in=event_ids)
+    if status:
+        qs = qs.filter(status=status)
+    if since:
+        qs = qs.filter(create_time__gte=since)
+    if not event_ids and not status and not since:
+        return 0
+    return qs.filter(event_type__in=HANDLED_TYPES).update(
+        status='pending', attempts=0, next_attempt_time=timezone.now(), last_error=None, processed_time=None)
+
+
+def lag_stats():
+    """积压与处理延迟"""
+    now = timezone.now()
+    backlog = StripeEvent.objects.filter(status__in=UNRESOLVED)
+    oldest = backlog.order_by('id').values_list('create_time', flat=True).first()
+    recent = list(StripeEvent.objects.filter(status='done', processed_time__isnull=False)
+                  .order_by('-id').values_list('create_time', 'processed_time')[:100])
+    delays = [(p - c).total_seconds() for c, p in recent if c and p]
+    return {
+        'backlog': backlog.count(),
+        'failed': StripeEvent.objects.filter(status='failed').count(),
+        'oldestPendingSeconds': round((now - oldest).total_seconds(), 1) if oldest else 0,
+        'recentAvgDelaySeconds': round(sum(delays) / len(delays), 2) if delays else None,
+        'recentMaxDelaySeconds': round(max(delays), 2) if delays else None,
+    }
@@ -61,6 +61,10 @@ urlpatterns = [
     path('admin/cdn/uploadImg', views.admin.cdn.upload_img),
     path('admin/cdn/uploadNormalFile', views.admin.cdn.upload_normal_file),
     path('admin/cdn/uploadFile', views.admin.cdn.upload_file),
+    path('admin/cdn/chunk/init', views.admin.upload.chunk_init),
+    path('admin/cdn/chunk/put', views.admin.upload.chunk_put),
+    path('admin/cdn/chunk/status', views.admin.upload.chunk_status),
+    path('admin/cdn/chunk/complete', views.admin.upload.chunk_complete),
     path('admin/category/list', views.admin.category.list_api),
     path('admin/category/create', views.admin.category.create),
     path('admin/category/update', views.admin.category.update),
@@ -80,6 +84,10 @@ urlpatterns = [
 
     path('admin/payment/list', views.admin.payment.list_api),
 
+    path('admin/export/orders', views.admin.export.export_orders),
+    path('admin/export/inquiries', views.admin.export.export_inquiries),
+    path('admin/export/opLogs', views.admin.export.export_op_logs),
+
     path('admin/shop/settings/get', views.admin.shop_settings.get_api),
     path('admin/shop/settings/update', views.admin.shop_settings.update_api),
     path('admin/shop/settings/testPayPal', views.admin.shop_settings.test_paypal),
@@ -92,6 +100,8 @@ urlpatterns = [
     path('admin/i18n/upsert', views.admin.i18n.upsert),
     path('admin/i18n/delete', views.admin.i18n.delete),
 
+    path('admin/metrics/stats', views.admin.metrics.stats),
+
 
     # 前台管理api
     path('index/thing/section', views.index.thing.section),
@@ -111,6 +121,7 @@ urlpatterns = [
 
     # 电商（shop）
     path('shop/order/create', views.shop.order.create),
+    path('shop/order/price', views.shop.order.price),
     path('shop/order/query', views.shop.order.query),
     path('shop/settings', views.shop.get_settings),
     path('shop/pay/stripe/createSession', views.shop.payment.stripe_create_session),
@@ -8,8 +8,9 @@ from email.mime.text import MIMEText
 from functools import wraps
 from smtplib import SMTP_SSL
 
-from django.core.cache import cache
+from django.utils.dateparse import parse_date
 
+from myapp import cache_ns, counters
 from myapp.serializers import ErrorLogSerializer
 from myapp.serializers import OpLogSerializer
 from myapp.handler import APIResponse
@@ -74,6 +75,19 @@ def get_monday():
     return monday.strftime('%Y-%m-%d %H:%M:%S.%f')[:10]
 
 
+def date_range_filter(queryset, request, field='create_time'):
+    """
+    按 startDate/endDate（YYYY-MM-DD，含首尾两天）筛选，转换成时间字段上的区间条件以便走索引
+    """
+    start = parse_date((request.GET.get('startDate') or '').strip())
+    end = parse_date((request.GET.get('endDate') or '').strip())
+    if start:
+        queryset = queryset.filter(**{f'{field}__gte': datetime.datetime.combine(start, datetime.time.min)})
+    if end:
+        queryset = queryset.filter(**{f'{field}__lt': datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min)})
+    return queryset
+
+
 def log_error(request, content):
     """
     记录错误日志
@@ -120,8 +134,8 @@ def rate_limit(key_prefix: str, limit: int, window_seconds: int):
             key = f"rl:{key_prefix}:{ip}:{request.path}"
 
             try:
-                cache.add(key, 0, timeout=window_seconds)
-                count = cache.incr(key)
+                # 计数在数据库里原子自增（myapp.counters），多个 worker 之间不会丢计数
+                count = counters.hit(key, window_seconds)
             except Exception:
                 return view_func(request, *args, **kwargs)
 
@@ -137,9 +151,8 @@ def rate_limit(key_prefix: str, limit: int, window_seconds: int):
 
 def clear_cache(request, response):
     try:
-        # 清除所有缓存
-        cache.clear()
-        print("缓存清空----success")
+        # 清除内容类缓存（不影响后台令牌等其它命名空间）
+        cache_ns.clear_namespaces()
         return True
     except Exception as e:
         # 记录异常信息
@@ -147,6 +160,19 @@ def clear_cache(request, response):
         return False, error_message
 
 
+def invalidate_cache(*tags):
+    """
+    生成 after_call 使用的回调，只让依赖这些标签的缓存失效
+    after_call(invalidate_cache(cache_ns.TAG_THING))
+    """
+
+    def _invalidate(request, response):
+        cache_ns.invalidate_tags(*tags)
+
+    _invalidate.__name__ = f"invalidate_cache[{','.join(tags)}]"
+    return _invalidate
+
+
 def after_call(*after_funcs):
     """
     用作装饰器，在视图执行后依次执行所有 after_func(request, response)
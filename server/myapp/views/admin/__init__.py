@@ -22,5 +22,8 @@ from myapp.views.admin.overview import *
 from myapp.views.admin.opLog import *
 from myapp.views.admin.errorLog import *
 from myapp.views.admin.cdn import *
+from myapp.views.admin.upload import *
 from myapp.views.admin.media import *
 from myapp.views.admin.i18n import *
+from myapp.views.admin.metrics import *
+from myapp.views.admin.export import *
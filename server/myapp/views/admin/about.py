@@ -3,12 +3,13 @@
 from rest_framework.decorators import api_view, authentication_classes
 from rest_framework.pagination import PageNumberPagination
 
+from myapp import cache_ns
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.models import About
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
 from myapp.serializers import AboutSerializer
-from myapp.utils import after_call, clear_cache
+from myapp.utils import after_call, invalidate_cache
 
 
 class MyPageNumberPagination(PageNumberPagination):
@@ -30,7 +31,7 @@ def list_api(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_SITE))
 def update(request):
 
     try:
@@ -2,12 +2,13 @@
 
 from rest_framework.decorators import api_view, authentication_classes
 
+from myapp import cache_ns
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.models import BasicAdditional
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
 from myapp.serializers import BasicAdditionalSerializer
-from myapp.utils import clear_cache, after_call
+from myapp.utils import invalidate_cache, after_call
 
 
 @api_view(['GET'])
@@ -25,7 +26,7 @@ def list_api(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_SITE))
 def update(request):
 
     try:
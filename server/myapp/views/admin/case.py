@@ -3,12 +3,13 @@
 from rest_framework.decorators import api_view, authentication_classes
 from rest_framework.pagination import PageNumberPagination
 
+from myapp import cache_ns
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.models import Case
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
 from myapp.serializers import CaseSerializer
-from myapp.utils import after_call, clear_cache
+from myapp.utils import after_call, invalidate_cache
 
 
 class MyPageNumberPagination(PageNumberPagination):
@@ -36,7 +37,7 @@ def list_api(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_CASE))
 def create(request):
 
     if not request.data.get('title', None):
@@ -56,7 +57,7 @@ def create(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_CASE))
 def update(request):
 
     try:
@@ -78,6 +79,7 @@ def update(request):
 @api_view(['POST'])
 @check_if_demo
 @authentication_classes([AdminTokenAuthtication])
+@after_call(invalidate_cache(cache_ns.TAG_CASE))
 def delete(request):
 
     try:
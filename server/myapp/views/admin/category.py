@@ -5,30 +5,28 @@ from django.db import connection
 from django.db.models import Q
 from rest_framework.decorators import api_view, authentication_classes
 
+from myapp import cache_ns, category_tree
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.models import Category
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
 from myapp.serializers import CategorySerializer
-from myapp.utils import dict_fetchall, after_call, clear_cache
+from myapp.utils import dict_fetchall, after_call, invalidate_cache
 
 
 @api_view(['GET'])
 @authentication_classes([AdminTokenAuthtication])
 def list_api(request):
     if request.method == 'GET':
-        # 获取所有顶级分类，并根据 sort 排序
-        top_level_categories = Category.objects.filter(pid=-1).order_by('sort', '-id')
-
-        # 序列化顶级分类
-        serializer = CategorySerializer(top_level_categories, many=True)
-        return APIResponse(code=0, msg='查询成功', data=serializer.data)
+        # 顶级分类及其子分类（按 sort 排序），直接取进程内分类树
+        data = category_tree.get_tree().serialize()
+        return APIResponse(code=0, msg='查询成功', data=data)
 
 
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_CATEGORY))
 def create(request):
 
     print('data-----', request.data)
@@ -48,7 +46,7 @@ def create(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_CATEGORY))
 def update(request):
 
     try:
@@ -68,7 +66,7 @@ def update(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_CATEGORY))
 def delete(request):
 
     try:
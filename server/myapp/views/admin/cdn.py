@@ -5,7 +5,7 @@ from django.core.files.storage import default_storage
 from django.http import JsonResponse
 from rest_framework.decorators import api_view, authentication_classes
 
-from myapp import utils
+from myapp import imaging, media_store
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.permission.permission import check_if_demo, isDemoAdminUser
@@ -153,18 +153,16 @@ def upload_img(request):
         if file_extension not in valid_extensions:
             return JsonResponse({"code": 1, "message": "非法文件格式"})
 
-        # 生成新文件名
-        new_name = f"{utils.get_timestamp()}{file_extension}"
-
-        # 拼接保存路径
-        save_path = os.path.join(MEDIA_ROOT, 'img', new_name)
-        print('save_path------------', save_path)
-
         # 保存文件
         try:
-            # 使用 Django 的默认存储来保存文件
-            full_path = default_storage.save(os.path.join('img', new_name), myfile)
-            print('File saved at:', full_path)
+            # 按内容寻址保存，文件名由 sha256 决定，相同图片只存一份
+            blob, created = media_store.save_upload(myfile, 'img', file_extension)
+            new_name = blob.name
+            print('File saved at:', new_name, 'new' if created else 'dedup')
+
+            # 衍生图在进程池里生成，不阻塞本次请求；重复的图片已有衍生图
+            if created:
+                imaging.schedule(new_name)
 
             resp_json = {
                 "code": 0,
@@ -205,18 +203,12 @@ def upload_normal_file(request):
         if file_extension not in valid_extensions:
             return JsonResponse({"code": 1, "message": "非法文件格式"})
 
-        # 生成新文件名
-        new_name = f"{utils.get_timestamp()}{file_extension}"
-
-        # 拼接保存路径
-        save_path = os.path.join(MEDIA_ROOT, 'file', new_name)
-        print('save_path------------', save_path)
-
         # 保存文件
         try:
-            # 使用 Django 的默认存储来保存文件
-            full_path = default_storage.save(os.path.join('file', new_name), myfile)
-            print('File saved at:', full_path)
+            # 按内容寻址保存，文件名由 sha256 决定，相同文件只存一份
+            blob, created = media_store.save_upload(myfile, 'file', file_extension)
+            new_name = blob.name
+            print('File saved at:', new_name, 'new' if created else 'dedup')
 
             resp_json = {
                 "code": 0,
@@ -269,18 +261,12 @@ def upload_file(request):
         if file_extension not in image_extensions and file_extension not in video_extensions:
             return JsonResponse({"errno": 1, "message": "非法文件格式"})
 
-        # 生成新文件名
-        new_name = f"{utils.get_timestamp()}{file_extension}"
-
-        # 拼接保存路径
-        save_path = os.path.join(MEDIA_ROOT, 'file', new_name)
-        print('save_path------------', save_path)
-
         # 保存文件
         try:
-            # 使用 Django 的默认存储来保存文件
-            full_path = default_storage.save(os.path.join('file', new_name), myfile)
-            print('File saved at:', full_path)
+            # 按内容寻址保存，文件名由 sha256 决定，相同文件只存一份
+            blob, created = media_store.save_upload(myfile, 'file', file_extension)
+            new_name = blob.name
+            print('File saved at:', new_name, 'new' if created else 'dedup')
 
             resp_json = {
                 "errno": 0,
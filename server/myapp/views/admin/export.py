@@ -0,0 +1,121 @@
+from rest_framework.decorators import api_view, authentication_classes
+
+from myapp import exporter
+from myapp.auth.authentication import AdminTokenAuthtication
+from myapp.handler import APIResponse
+from myapp.models import Inquiry, OpLog, Order, OrderItem
+from myapp.utils import date_range_filter, rate_limit
+
+# 公共参数：fileType=csv|ndjson（默认 csv；不用 format，它被 DRF 的渲染器协商占用）、gzip=1、startDate/endDate（YYYY-MM-DD）、afterTime/afterId（断点续传）
+
+ORDER_FIELDS = ('id', 'order_no', 'status', 'currency', 'subtotal', 'shipping_fee', 'total',
+                'customer_email', 'customer_phone', 'inventory_deducted', 'create_time', 'update_time')
+ORDER_ITEM_FIELDS = ('order_id', 'id', 'thing_id', 'sku_id', 'title_snapshot', 'sku_snapshot',
+                     'unit_price', 'quantity', 'line_total')
+INQUIRY_FIELDS = ('id', 'name', 'tel', 'email', 'company', 'country', 'quantity', 'preferred_contact',
+                  'message', 'ip', 'status', 'create_time')
+OPLOG_FIELDS = ('id', 're_time', 're_ip', 're_method', 're_url', 're_content', 'access_time')
+
+
+def _export_params(request):
+    """返回 (fmt, gzip, after, err)"""
+    fmt = (request.GET.get('fileType') or 'csv').lower()
+    if fmt not in exporter.FORMATS:
+        return None, None, None, 'fileType只支持csv/ndjson'
+    after = exporter.parse_after(request)
+    if after is False:
+        return None, None, None, 'afterTime/afterId格式不正确'
+    return fmt, request.GET.get('gzip') == '1', after, None
+
+
+def _order_chunks(order_chunks):
+    """每批订单一次 IN 查询取回全部明细，产出 [(order, [items])]"""
+    for orders in order_chunks:
+        items = {}
+        for it in OrderItem.objects.filter(order_id__in=[o['id'] for o in orders]) \
+                .order_by('order_id', 'id').values(*ORDER_ITEM_FIELDS):
+            items.setdefault(it['order_id'], []).append(it)
+        yield [(o, items.get(o['id'], [])) for o in orders]
+
+
+@api_view(['GET'])
+@authentication_classes([AdminTokenAuthtication])
+@rate_limit('admin_export', limit=10, window_seconds=60)
+def export_orders(request):
+    """
+    订单导出：CSV 每个明细一行（订单字段重复），NDJSON 每个订单一行并内嵌 items；
+    另可按 keyword（订单号）、status、currency 筛选，与订单列表一致
+    """
+    fmt, gzip, after, err = _export_params(request)
+    if err:
+        return APIResponse(code=1, msg=err)
+
+    qs = date_range_filter(Order.objects.all(), request)
+    keyword = request.GET.get('keyword', '')
+    if keyword:
+        qs = qs.filter(order_no__contains=keyword)
+    status = request.GET.get('status', '')
+    if status:
+        qs = qs.filter(status=status)
+    currency = request.GET.get('currency', '')
+    if currency:
+        qs = qs.filter(currency=currency)
+    chunks = _order_chunks(exporter.iter_chunks(qs, 'create_time', ORDER_FIELDS, after=after))
+
+    if fmt == 'csv':
+        item_fields = ORDER_ITEM_FIELDS[1:]
+        header = list(ORDER_FIELDS) + [f'item_{f}' for f in item_fields]
+
+        def rows():
+            for pairs in chunks:
+                batch = []
+                for order, items in pairs:
+                    base = [order[f] for f in ORDER_FIELDS]
+                    if not items:
+                        batch.append(base + [None] * len(item_fields))
+                    for it in items:
+                        batch.append(base + [it[f] for f in item_fields])
+                yield batch
+
+        body = exporter.csv_lines(header, rows())
+    else:
+        def objs():
+            for pairs in chunks:
+                batch = []
+                for order, items in pairs:
+                    for it in items:
+                        it.pop('order_id')
+                    batch.append(dict(order, items=items))
+                yield batch
+
+        body = exporter.ndjson_lines(objs())
+
+    return exporter.response(body, 'orders', fmt, gzip=gzip)
+
+
+def _flat_export(request, queryset, time_field, fields, filename):
+    fmt, gzip, after, err = _export_params(request)
+    if err:
+        return APIResponse(code=1, msg=err)
+
+    queryset = date_range_filter(queryset, request, field=time_field)
+    chunks = exporter.iter_chunks(queryset, time_field, fields, after=after)
+    if fmt == 'csv':
+        body = exporter.csv_lines(list(fields), ([[r[f] for f in fields] for r in rows] for rows in chunks))
+    else:
+        body = exporter.ndjson_lines(chunks)
+    return exporter.response(body, filename, fmt, gzip=gzip)
+
+
+@api_view(['GET'])
+@authentication_classes([AdminTokenAuthtication])
+@rate_limit('admin_export', limit=10, window_seconds=60)
+def export_inquiries(request):
+    return _flat_export(request, Inquiry.objects.all(), 'create_time', INQUIRY_FIELDS, 'inquiries')
+
+
+@api_view(['GET'])
+@authentication_classes([AdminTokenAuthtication])
+@rate_limit('admin_export', limit=10, window_seconds=60)
+def export_op_logs(request):
+    return _flat_export(request, OpLog.objects.all(), 're_time', OPLOG_FIELDS, 'op_logs')
@@ -1,17 +1,18 @@
 from rest_framework.decorators import api_view, authentication_classes
-from rest_framework.pagination import PageNumberPagination
 
+from myapp import cache_ns, search
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.models import I18nText
+from myapp.pagination import MyPageNumberPagination as BasePagination
 from myapp.permission.permission import check_if_demo
-from myapp.utils import after_call, clear_cache
+from myapp.utils import after_call, invalidate_cache
 
 
-class MyPageNumberPagination(PageNumberPagination):
+class MyPageNumberPagination(BasePagination):
     page_size = 20
-    page_size_query_param = 'pageSize'
     max_page_size = 200
+    cursor_field = 'update_time'
 
 
 @api_view(['GET'])
@@ -37,16 +38,25 @@ def list_api(request):
 
     paginator = MyPageNumberPagination()
     page = paginator.paginate_queryset(qs, request)
-    total = qs.count()
+    total = paginator.total
 
-    data = list(page.values('id', 'model', 'object_id', 'field', 'lang', 'value', 'update_time', 'create_time'))
-    return APIResponse(code=0, msg='查询成功', data=data, total=total)
+    data = [{
+        'id': obj.id,
+        'model': obj.model,
+        'object_id': obj.object_id,
+        'field': obj.field,
+        'lang': obj.lang,
+        'value': obj.value,
+        'update_time': obj.update_time,
+        'create_time': obj.create_time,
+    } for obj in page]
+    return APIResponse(code=0, msg='查询成功', data=data, total=total, nextCursor=paginator.next_cursor)
 
 
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_I18N))
 def upsert(request):
     model = (request.data.get('model') or '').strip()
     object_id = (request.data.get('objectId') or '').strip()
@@ -65,6 +75,9 @@ def upsert(request):
         defaults={'value': value},
     )
 
+    if obj.model == 'Thing' and obj.field in search.I18N_WEIGHTS:
+        search.reindex_things_quietly([obj.object_id])
+
     data = {
         'id': obj.id,
         'model': obj.model,
@@ -79,7 +92,7 @@ def upsert(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_I18N, cache_ns.TAG_I18N_DELETE))
 def delete(request):
     ids = request.data.get('ids')
     if not ids:
@@ -90,5 +103,10 @@ def delete(request):
     else:
         ids_list = list(ids)
 
-    I18nText.objects.filter(id__in=ids_list).delete()
+    qs = I18nText.objects.filter(id__in=ids_list)
+    thing_ids = list(qs.filter(model='Thing', field__in=list(search.I18N_WEIGHTS.keys()))
+                     .values_list('object_id', flat=True).distinct())
+    qs.delete()
+    if thing_ids:
+        search.reindex_things_quietly(thing_ids)
     return APIResponse(code=0, msg='删除成功')
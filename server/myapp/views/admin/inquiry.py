@@ -1,20 +1,15 @@
 # Create your views here.
 
 from rest_framework.decorators import api_view, authentication_classes
-from rest_framework.pagination import PageNumberPagination
 
+from myapp import cache_ns
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.models import Inquiry
+from myapp.pagination import MyPageNumberPagination
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
 from myapp.serializers import InquirySerializer
-from myapp.utils import after_call, clear_cache
-
-
-class MyPageNumberPagination(PageNumberPagination):
-    page_size = 10  # 每页的默认项
-    page_size_query_param = 'pageSize'  # 允许通过 URL 参数设置每页的大小
-    max_page_size = 100  # 最大页尺寸
+from myapp.utils import after_call, invalidate_cache
 
 
 @api_view(['GET'])
@@ -26,16 +21,17 @@ def list_api(request):
         # 分页
         paginator = MyPageNumberPagination()
         paginated_inquiry = paginator.paginate_queryset(inquiry, request)
-        total = inquiry.count()
+        total = paginator.total
 
         serializer = InquirySerializer(paginated_inquiry, many=True)
-        return APIResponse(code=0, msg='查询成功', data=serializer.data, total=total)
+        return APIResponse(code=0, msg='查询成功', data=serializer.data, total=total,
+                           nextCursor=paginator.next_cursor)
 
 
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_INQUIRY))
 def create(request):
 
     data = request.data.copy()
@@ -52,7 +48,7 @@ def create(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_INQUIRY))
 def update(request):
 
     try:
@@ -74,7 +70,7 @@ def update(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_INQUIRY))
 def delete(request):
 
     try:
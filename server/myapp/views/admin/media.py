@@ -3,10 +3,11 @@ from pathlib import Path
 
 from rest_framework.decorators import api_view, authentication_classes
 
+from myapp import media_store
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.permission.permission import check_if_demo
-from myapp.models import Thing, ThingSku
+from myapp.models import Case, Category, News, Thing, ThingSku
 from server.settings import MEDIA_ROOT
 
 
@@ -130,15 +131,24 @@ def delete_api(request):
         used_by = []
 
         if rel_dir == 'img':
-            # Thing.cover 支持 "#" 多图
+            # Thing/News/Case.cover 支持 "#" 多图
             if Thing.objects.filter(cover__contains=name).exists():
                 used_by.append('thing.cover')
             if ThingSku.objects.filter(cover=name).exists():
                 used_by.append('thingSku.cover')
+            if Category.objects.filter(cover=name).exists():
+                used_by.append('category.cover')
+            if News.objects.filter(cover__contains=name).exists():
+                used_by.append('news.cover')
+            if Case.objects.filter(cover__contains=name).exists():
+                used_by.append('case.cover')
         else:
-            # file：目前用于主视频
+            # file：主视频，以及富文本里插入的图片/视频（/upload/file/<name>）
             if Thing.objects.filter(video=name).exists():
                 used_by.append('thing.video')
+            for model, label in ((Thing, 'thing'), (News, 'news'), (Case, 'case')):
+                if model.objects.filter(description__contains=f'/upload/file/{name}').exists():
+                    used_by.append(f'{label}.description')
 
         if used_by:
             refs[name] = used_by
@@ -146,20 +156,18 @@ def delete_api(request):
     if refs and not force:
         return APIResponse(code=1, msg='文件被引用，禁止删除', data={'references': refs})
 
-    base = _safe_join(MEDIA_ROOT, rel_dir)
     deleted = 0
+    # 同样内容的多次上传共用一个文件，是否可删只看上面的引用检查
     for name in names:
         name = str(name)
         if '/' in name or '\\' in name or '..' in name:
             continue
         if name in refs and not force:
             continue
-        p = os.path.join(base, name)
-        if os.path.isfile(p):
-            try:
-                os.remove(p)
+        try:
+            if media_store.release(rel_dir, name) == 'deleted':
                 deleted += 1
-            except Exception:
-                pass
+        except Exception:
+            pass
 
     return APIResponse(code=0, msg='删除成功', data={'deleted': deleted, 'references': refs})
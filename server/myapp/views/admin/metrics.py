@@ -0,0 +1,20 @@
+from rest_framework.decorators import api_view, authentication_classes
+
+from myapp import oplog, payment_config, paypal, stripe_events
+from myapp.auth.authentication import AdminTokenAuthtication
+from myapp.handler import APIResponse
+from myapp.i18n import bundles as i18n_bundles
+
+
+@api_view(['GET'])
+@authentication_classes([AdminTokenAuthtication])
+def stats(request):
+    """各子系统的运行计数：除 stripeEvents（数据库中的事件队列）外均为进程内计数，仅反映处理本次请求的 worker"""
+    data = {
+        'oplog': oplog.buffer.stats(),
+        'i18n': i18n_bundles.stats(),
+        'paypalToken': paypal.tokens.stats(),
+        'paymentConfig': payment_config.config.stats(),
+        'stripeEvents': stripe_events.lag_stats(),
+    }
+    return APIResponse(code=0, msg='查询成功', data=data)
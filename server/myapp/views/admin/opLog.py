@@ -1,18 +1,19 @@
 # Create your views here.
 from rest_framework.decorators import api_view, authentication_classes
-from rest_framework.pagination import PageNumberPagination
 
+from myapp import oplog_retention
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.models import OpLog
+from myapp.pagination import MyPageNumberPagination as BasePagination
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
 from myapp.serializers import OpLogSerializer
 
 
-class MyPageNumberPagination(PageNumberPagination):
-    page_size = 10  # 每页的默认项
-    page_size_query_param = 'pageSize'  # 允许通过 URL 参数设置每页的大小
-    max_page_size = 100  # 最大页尺寸
+class MyPageNumberPagination(BasePagination):
+    cursor_field = 're_time'
+    # OpLog 表很大，COUNT(*) 结果缓存一分钟
+    count_cache_ttl = 60
 
 
 @api_view(['GET'])
@@ -24,10 +25,11 @@ def list_api(request):
             # 分页
             paginator = MyPageNumberPagination()
             paginated_logs = paginator.paginate_queryset(opLog, request)
-            total = opLog.count()
+            total = paginator.total
 
             serializer = OpLogSerializer(paginated_logs, many=True)
-            return APIResponse(code=0, msg='查询成功', data=serializer.data, total=total)
+            return APIResponse(code=0, msg='查询成功', data=serializer.data, total=total,
+                               nextCursor=paginator.next_cursor)
 
 
 @api_view(['POST'])
@@ -36,7 +38,8 @@ def list_api(request):
 def deleteAll(request):
 
     if request.method == 'POST':
-        OpLog.objects.all().delete()
+        # 分批删除，避免一条大 DELETE 长时间锁表
+        oplog_retention.purge(OpLog.objects.all())
         return APIResponse(code=0, msg='操作成功')
 
 
@@ -47,7 +50,7 @@ def delete(request):
         try:
             ids = request.data['ids']
             ids_arr = ids.split(',')
-            OpLog.objects.filter(id__in=ids_arr).delete()
+            oplog_retention.purge(OpLog.objects.filter(id__in=ids_arr))
         except OpLog.DoesNotExist:
             return APIResponse(code=1, msg='对象不存在')
 
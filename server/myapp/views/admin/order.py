@@ -1,23 +1,62 @@
+from django.db.models import Count
 from rest_framework.decorators import api_view, authentication_classes
 
+from myapp import order_lookup
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.models import Order, OrderItem, Payment
+from myapp.pagination import MyPageNumberPagination
+from myapp.utils import date_range_filter
+
+
+_PAYMENT_FIELDS = ('id', 'order_id', 'provider', 'status', 'provider_ref', 'create_time', 'update_time')
+
+
+def _format_payment(p):
+    p['create_time'] = p['create_time'].strftime('%Y-%m-%d %H:%M:%S') if p['create_time'] else None
+    p['update_time'] = p['update_time'].strftime('%Y-%m-%d %H:%M:%S') if p['update_time'] else None
+    return p
+
+
+def _payments_by_order(order_ids):
+    result = {}
+    for p in Payment.objects.filter(order_id__in=order_ids).order_by('id').values(*_PAYMENT_FIELDS):
+        result.setdefault(p.pop('order_id'), []).append(_format_payment(p))
+    return result
 
 
 @api_view(['GET'])
 @authentication_classes([AdminTokenAuthtication])
 def list_api(request):
+    """
+    订单列表：page/pageSize 或 cursor 分页，按创建时间倒序
+    筛选：keyword（订单号）、status、currency、startDate/endDate
+    facets：在 keyword + 日期筛选下各状态、各币种的订单数（一条分组查询），不受 status/currency 筛选影响
+    includePayments=1 时每行附带该订单的支付记录
+    """
     keyword = request.GET.get('keyword', '')
     status = request.GET.get('status', '')
+    currency = request.GET.get('currency', '')
 
-    qs = Order.objects.all().order_by('-create_time')
+    qs = Order.objects.all()
     if keyword:
         qs = qs.filter(order_no__contains=keyword)
+    qs = date_range_filter(qs, request)
+
+    facets = {'status': {}, 'currency': {}}
+    total = 0
+    for row in qs.values('status', 'currency').annotate(count=Count('id')).order_by():
+        facets['status'][row['status']] = facets['status'].get(row['status'], 0) + row['count']
+        facets['currency'][row['currency']] = facets['currency'].get(row['currency'], 0) + row['count']
+        if (not status or row['status'] == status) and (not currency or row['currency'] == currency):
+            total += row['count']
+
     if status:
         qs = qs.filter(status=status)
+    if currency:
+        qs = qs.filter(currency=currency)
 
-    data = list(qs.values(
+    qs = qs.order_by('-create_time', '-id').values(
         'id',
         'order_no',
         'status',
@@ -28,15 +67,23 @@ def list_api(request):
         'customer_email',
         'customer_phone',
         'create_time',
-    ))
+    )
+
+    paginator = MyPageNumberPagination()
+    paginator.count_hint = total  # 总数已由分组统计得出，不再单独 COUNT
+    data = paginator.paginate_queryset(qs, request)
 
+    payments = _payments_by_order([it['id'] for it in data]) if request.GET.get('includePayments') == '1' else None
     for it in data:
         it['subtotal'] = str(it['subtotal'])
         it['shipping_fee'] = str(it['shipping_fee'])
         it['total'] = str(it['total'])
         it['create_time'] = it['create_time'].strftime('%Y-%m-%d %H:%M:%S') if it['create_time'] else None
+        if payments is not None:
+            it['payments'] = payments.get(it['id'], [])
 
-    return APIResponse(code=0, msg='查询成功', data=data)
+    return APIResponse(code=0, msg='查询成功', data=data, total=paginator.total,
+                       nextCursor=paginator.next_cursor, facets=facets)
 
 
 @api_view(['GET'])
@@ -64,18 +111,7 @@ def detail(request):
         it['unit_price'] = str(it['unit_price'])
         it['line_total'] = str(it['line_total'])
 
-    payments = list(Payment.objects.filter(order=order).values(
-        'id',
-        'provider',
-        'status',
-        'provider_ref',
-        'create_time',
-        'update_time',
-    ))
-
-    for p in payments:
-        p['create_time'] = p['create_time'].strftime('%Y-%m-%d %H:%M:%S') if p['create_time'] else None
-        p['update_time'] = p['update_time'].strftime('%Y-%m-%d %H:%M:%S') if p['update_time'] else None
+    payments = _payments_by_order([order.id]).get(order.id, [])
 
     return APIResponse(code=0, msg='查询成功', data={
         'id': order.id,
@@ -119,4 +155,5 @@ def update_status(request):
 
     order.status = status
     order.save(update_fields=['status', 'update_time'])
+    order_lookup.invalidate(order.order_no)
     return APIResponse(code=0, msg='更新成功', data={'id': order.id, 'status': order.status})
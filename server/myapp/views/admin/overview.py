@@ -1,36 +1,25 @@
 # Create your views here.
-from datetime import timedelta
-
-from django.db.models import Count
-from django.utils import timezone
 from rest_framework.decorators import api_view, authentication_classes
 
+from myapp import cache_ns, stats
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
-from myapp.models import OpLog, Inquiry, Thing, News, Case, Order, Payment
+from myapp.models import Thing, News, Case
+from myapp.pagination import cached_count
+
+# 访问量、订单等数据来自 manage.py rollup_stats 维护的汇总表（最多滞后一个汇总周期）
 
 
 @api_view(['GET'])
 @authentication_classes([AdminTokenAuthtication])
 def count(request):
     if request.method == 'GET':
-        days = request.GET.get('days', 7)
-
-        # 计算day之前的时间
-        days_ago = timezone.now() - timedelta(days=int(days))
-
-        # 使用 Django ORM 查询
-        results = (
-            OpLog.objects.filter(re_time__gte=days_ago)
-            .extra({'day': 'DATE(re_time)'})  # 使用 extra() 将日期提取为 'day'
-            .values('day')  # 提取日期
-            .annotate(pv=Count('id'), uv=Count('re_ip', distinct=True))  # 统计总 PV 和唯一 UV
-            .order_by('day')  # 按日期排序
-        )
+        try:
+            days = int(request.GET.get('days', 7))
+        except (TypeError, ValueError):
+            days = 7
 
-        results_dict = [
-            dict(day=row['day'], pv=row['pv'], uv=row['uv']) for row in
-            results]
+        results_dict = [dict(day=row['day'], pv=row['pv'], uv=row['uv']) for row in stats.visits(days)]
 
         data = {
             'visit_data': results_dict
@@ -42,37 +31,19 @@ def count(request):
 # @authentication_classes([AdminTokenAuthtication])
 def dataCount(request):
     if request.method == 'GET':
-        today = timezone.now().date()
-
-        # 使用 annotate 和 aggregate 一次性获取所有统计数据
-        inquiry_count = Inquiry.objects.filter(create_time__date=today).count()
-        visit_count = (
-            OpLog.objects.filter(re_time__date=today)
-            .values('re_ip')
-            .distinct()
-            .count()
-        )
-
-        # 使用 aggregate 获取其他统计值
-        total_counts = Thing.objects.aggregate(product_count=Count('id'))  # Things 的产品数
-        news_counts = News.objects.aggregate(news_count=Count('id'))  # 新闻数
-        case_counts = Case.objects.aggregate(case_count=Count('id'))  # 案例数
-
-        order_today_count = Order.objects.filter(create_time__date=today).count()
-        order_paid_today_count = Order.objects.filter(create_time__date=today, status='paid').count()
-        order_pending_today_count = Order.objects.filter(create_time__date=today, status='pending').count()
-        payment_today_count = Payment.objects.filter(create_time__date=today).count()
+        today = stats.today_totals()
 
+        # 内容总数按标签缓存，编辑对应内容时失效
         data = {
-            'inquiry_count': inquiry_count,
-            'visit_count': visit_count,
-            'product_count': total_counts['product_count'],
-            'news_count': news_counts['news_count'],
-            'case_count': case_counts['case_count'],
-            'order_today_count': order_today_count,
-            'order_paid_today_count': order_paid_today_count,
-            'order_pending_today_count': order_pending_today_count,
-            'payment_today_count': payment_today_count,
+            'inquiry_count': today['inquiry_count'],
+            'visit_count': today['uv'],
+            'product_count': cached_count(Thing.objects.all(), 300, tags=(cache_ns.TAG_THING,)),
+            'news_count': cached_count(News.objects.all(), 300, tags=(cache_ns.TAG_NEWS,)),
+            'case_count': cached_count(Case.objects.all(), 300, tags=(cache_ns.TAG_CASE,)),
+            'order_today_count': today['order_count'],
+            'order_paid_today_count': today['order_paid_count'],
+            'order_pending_today_count': today['order_pending_count'],
+            'payment_today_count': today['payment_count'],
         }
 
         return APIResponse(code=0, msg='查询成功', data=data)
@@ -3,32 +3,64 @@ from rest_framework.decorators import api_view, authentication_classes
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.models import Payment
+from myapp.pagination import MyPageNumberPagination
+from myapp.utils import date_range_filter
 
 
 @api_view(['GET'])
 @authentication_classes([AdminTokenAuthtication])
 def list_api(request):
+    """
+    支付记录：page/pageSize 或 cursor 分页，按创建时间倒序
+    筛选：provider、status、orderId / orderNo、startDate/endDate
+    """
     provider = request.GET.get('provider', '')
     status = request.GET.get('status', '')
+    order_id = request.GET.get('orderId', '')
+    order_no = (request.GET.get('orderNo') or '').strip()
 
-    qs = Payment.objects.select_related('order').all().order_by('-create_time')
+    qs = Payment.objects.all()
     if provider:
         qs = qs.filter(provider=provider)
     if status:
         qs = qs.filter(status=status)
+    if order_id:
+        if not str(order_id).isdigit():
+            return APIResponse(code=1, msg='orderId不正确')
+        qs = qs.filter(order_id=order_id)
+    if order_no:
+        qs = qs.filter(order__order_no=order_no)
+    qs = date_range_filter(qs, request)
+
+    qs = qs.order_by('-create_time', '-id').values(
+        'id',
+        'provider',
+        'status',
+        'provider_ref',
+        'order_id',
+        'order__order_no',
+        'order__total',
+        'order__currency',
+        'create_time',
+        'update_time',
+    )
+
+    paginator = MyPageNumberPagination()
+    rows = paginator.paginate_queryset(qs, request)
 
     data = []
-    for p in qs[:500]:
+    for p in rows:
         data.append({
-            'id': p.id,
-            'provider': p.provider,
-            'status': p.status,
-            'provider_ref': p.provider_ref,
-            'order_no': p.order.order_no if p.order_id else None,
-            'amount': str(p.order.total) if p.order_id else None,
-            'currency': p.order.currency if p.order_id else None,
-            'create_time': p.create_time.strftime('%Y-%m-%d %H:%M:%S') if p.create_time else None,
-            'update_time': p.update_time.strftime('%Y-%m-%d %H:%M:%S') if p.update_time else None,
+            'id': p['id'],
+            'provider': p['provider'],
+            'status': p['status'],
+            'provider_ref': p['provider_ref'],
+            'order_id': p['order_id'],
+            'order_no': p['order__order_no'],
+            'amount': str(p['order__total']) if p['order__total'] is not None else None,
+            'currency': p['order__currency'],
+            'create_time': p['create_time'].strftime('%Y-%m-%d %H:%M:%S') if p['create_time'] else None,
+            'update_time': p['update_time'].strftime('%Y-%m-%d %H:%M:%S') if p['update_time'] else None,
         })
 
-    return APIResponse(code=0, msg='查询成功', data=data)
+    return APIResponse(code=0, msg='查询成功', data=data, total=paginator.total, nextCursor=paginator.next_cursor)
@@ -1,10 +1,9 @@
 import os
 
-import requests
 import stripe
-from django.core.cache import cache
 from rest_framework.decorators import api_view, authentication_classes
 
+from myapp import cache_ns, payment_config, paypal
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.models import ShopSettings
@@ -13,36 +12,6 @@ from myapp.utils import log_op
 from myapp.utils import rate_limit
 
 
-def _paypal_api_base(paypal_env: str = None):
-    paypal_env = (paypal_env or os.getenv('PAYPAL_ENV') or 'sandbox').lower()
-    return 'https://api-m.sandbox.paypal.com' if paypal_env != 'live' else 'https://api-m.paypal.com'
-
-
-def _paypal_get_access_token(client_id: str = None, client_secret: str = None, paypal_env: str = None):
-    client_id = client_id or os.getenv('PAYPAL_CLIENT_ID')
-    client_secret = client_secret or os.getenv('PAYPAL_CLIENT_SECRET')
-    if not client_id or not client_secret:
-        return None, 'PayPal 未配置（缺少 PAYPAL_CLIENT_ID / PAYPAL_CLIENT_SECRET）'
-
-    api_base = _paypal_api_base(paypal_env)
-    try:
-        resp = requests.post(
-            f"{api_base}/v1/oauth2/token",
-            auth=(client_id, client_secret),
-            headers={'Content-Type': 'application/x-www-form-urlencoded'},
-            data={'grant_type': 'client_credentials'},
-            timeout=20,
-        )
-    except Exception:
-        return None, 'PayPal token 请求失败'
-
-    if resp.status_code >= 300:
-        return None, 'PayPal token 请求失败'
-
-    data = resp.json()
-    return data.get('access_token'), None
-
-
 @api_view(['GET'])
 @authentication_classes([AdminTokenAuthtication])
 def get_api(request):
@@ -163,13 +132,13 @@ def update_api(request):
             changed.append('paypalClientSecret:cleared')
 
     s.save()
+    payment_config.invalidate()
     try:
         log_op(request, f"admin.shop.settings.update: {','.join(changed) if changed else 'no-changes'}")
     except Exception:
         pass
     # Invalidate cached frontend sections so homepage theme changes take effect immediately
-    cache.delete('section_view:/myapp/index/common/section')
-    cache.delete('section_view:/myapp/index/home/section')
+    cache_ns.invalidate_tags(cache_ns.TAG_SITE)
     return APIResponse(code=0, msg='更新成功')
 
 
@@ -190,7 +159,8 @@ def test_paypal(request):
     except Exception:
         client_secret = None
 
-    token, err = _paypal_get_access_token(client_id=client_id, client_secret=client_secret, paypal_env=paypal_env)
+    # 测试连接要真正校验凭据，不用缓存里的 token
+    token, err = paypal.get_access_token(client_id=client_id, client_secret=client_secret, paypal_env=paypal_env, force=True)
     if err:
         try:
             log_op(request, f"admin.shop.settings.testPayPal: failed ({err})")
@@ -4,15 +4,15 @@ import json
 from decimal import Decimal, InvalidOperation
 
 from rest_framework.decorators import api_view, authentication_classes
-from rest_framework.pagination import PageNumberPagination
 
-from myapp import utils
+from myapp import cache_ns, listing, search, utils
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.models import Category, Thing, ThingSku
+from myapp.pagination import MyPageNumberPagination
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
 from myapp.serializers import ThingSerializer, UpdateThingSerializer
-from myapp.utils import after_call, clear_cache
+from myapp.utils import after_call, invalidate_cache
 
 
 def _format_sku_label(attrs):
@@ -78,12 +78,6 @@ def _parse_decimal(value, default=Decimal('0')):
         return default
 
 
-class MyPageNumberPagination(PageNumberPagination):
-    page_size = 10  # 每页的默认项
-    page_size_query_param = 'pageSize'  # 允许通过 URL 参数设置每页的大小
-    max_page_size = 100  # 最大页尺寸
-
-
 @api_view(['GET'])
 def list_api(request):
     if request.method == 'GET':
@@ -100,10 +94,11 @@ def list_api(request):
         # 分页
         paginator = MyPageNumberPagination()
         paginated_things = paginator.paginate_queryset(things, request)
-        total = things.count()
+        total = paginator.total
 
         serializer = ThingSerializer(paginated_things, many=True)
-        return APIResponse(code=0, msg='查询成功', data=serializer.data, total=total)
+        return APIResponse(code=0, msg='查询成功', data=serializer.data, total=total,
+                           nextCursor=paginator.next_cursor)
 
 
 @api_view(['GET'])
@@ -130,7 +125,7 @@ def detail(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_THING))
 def create(request):
 
     skus_raw = request.data.get('skus')
@@ -143,6 +138,8 @@ def create(request):
                 _sync_skus(obj, skus_payload)
             except Exception:
                 pass
+        search.reindex_things_quietly([obj.id])
+        listing.things_changed([obj.id])
         return APIResponse(code=0, msg='创建成功', data=serializer.data)
     else:
         print(serializer.errors)
@@ -154,7 +151,7 @@ def create(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_THING))
 def update(request):
 
     try:
@@ -174,6 +171,8 @@ def update(request):
                 _sync_skus(obj, skus_payload)
             except Exception:
                 pass
+        search.reindex_things_quietly([obj.id])
+        listing.things_changed([obj.id])
         return APIResponse(code=0, msg='查询成功', data=serializer.data)
     else:
         print(serializer.errors)
@@ -185,7 +184,7 @@ def update(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_THING))
 def delete(request):
 
     try:
@@ -194,13 +193,14 @@ def delete(request):
         Thing.objects.filter(id__in=ids_arr).delete()
     except Thing.DoesNotExist:
         return APIResponse(code=1, msg='对象不存在')
+    listing.things_changed(ids_arr)
     return APIResponse(code=0, msg='删除成功')
 
 
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_THING))
 def quick_update(request):
     """后台快速更新：用于列表内修改 price/status 等轻量字段"""
 
@@ -230,13 +230,14 @@ def quick_update(request):
         return APIResponse(code=1, msg='没有可更新字段')
 
     thing.save(update_fields=fields)
+    listing.things_changed([thing.id])
     return APIResponse(code=0, msg='更新成功')
 
 
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_THING))
 def batch_update(request):
     """后台批量更新：ids + action
 
@@ -261,11 +262,13 @@ def batch_update(request):
         if status not in ['0', '1']:
             return APIResponse(code=1, msg='status参数错误')
         qs.update(status=status)
+        listing.things_changed(ids)
         return APIResponse(code=0, msg='更新成功')
 
     if action == 'setPrice':
         price = str(request.data.get('price') or '')
         qs.update(price=price)
+        listing.things_changed(ids)
         return APIResponse(code=0, msg='更新成功')
 
     if action == 'adjustPrice':
@@ -277,6 +280,7 @@ def batch_update(request):
             p = _parse_decimal(t.price, Decimal('0'))
             t.price = str((p * ratio).quantize(Decimal('0.01')))
             t.save(update_fields=['price'])
+        listing.things_changed(ids)
         return APIResponse(code=0, msg='更新成功')
 
     return APIResponse(code=1, msg='action不支持')
@@ -0,0 +1,67 @@
+from rest_framework.decorators import api_view, authentication_classes
+
+from myapp import chunked_upload
+from myapp.auth.authentication import AdminTokenAuthtication
+from myapp.handler import APIResponse
+from myapp.permission.permission import check_if_demo
+from server.settings import BASE_HOST_URL
+
+# 分片上传，协议说明见 myapp/chunked_upload.py
+
+
+@api_view(['POST'])
+@authentication_classes([AdminTokenAuthtication])
+@check_if_demo
+def chunk_init(request):
+    """body: filename、size、type=file|video"""
+    try:
+        meta = chunked_upload.init(request.data.get('filename'), request.data.get('size'),
+                                   (request.data.get('type') or 'file').strip())
+    except chunked_upload.UploadError as e:
+        return APIResponse(code=1, msg=str(e))
+    return APIResponse(code=0, msg='操作成功', data=meta)
+
+
+@api_view(['POST'])
+@authentication_classes([AdminTokenAuthtication])
+@check_if_demo
+def chunk_put(request):
+    """query: uploadId、index；body: 分片原始字节；header: X-Chunk-Sha256（可选）"""
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+    try:
+        # 直接读底层请求流，不经过 DRF 的 parser（否则会把整片读进内存）
+        sha256 = chunked_upload.write_chunk(
+            request.GET.get('uploadId'), request.GET.get('index'), request._request, content_length,
+            expected_sha256=request.META.get('HTTP_X_CHUNK_SHA256'),
+        )
+    except chunked_upload.UploadError as e:
+        return APIResponse(code=1, msg=str(e))
+    return APIResponse(code=0, msg='操作成功', data={'index': int(request.GET.get('index')), 'sha256': sha256})
+
+
+@api_view(['GET'])
+@authentication_classes([AdminTokenAuthtication])
+def chunk_status(request):
+    try:
+        meta, done = chunked_upload.received_chunks(request.GET.get('uploadId'))
+    except chunked_upload.UploadError as e:
+        return APIResponse(code=1, msg=str(e))
+    return APIResponse(code=0, msg='查询成功', data=dict(meta, received=done))
+
+
+@api_view(['POST'])
+@authentication_classes([AdminTokenAuthtication])
+@check_if_demo
+def chunk_complete(request):
+    """body: uploadId、sha256（可选，整个文件的 sha256）"""
+    try:
+        new_name = chunked_upload.complete(request.data.get('uploadId'), request.data.get('sha256'))
+    except chunked_upload.UploadError as e:
+        return APIResponse(code=1, msg=str(e))
+    return APIResponse(code=0, msg='上传成功', data={
+        'name': new_name,
+        'url': BASE_HOST_URL + '/upload/file/' + new_name,
+    })
@@ -1,17 +1,18 @@
 # Create your views here.
 import datetime
 
-from django.core.cache import cache
+from django.utils import timezone
 from rest_framework.decorators import api_view, authentication_classes, throttle_classes
 from rest_framework.throttling import AnonRateThrottle
 
-from myapp import utils
+from myapp import cache_ns, counters, utils
+from myapp.auth import principal
 from myapp.auth.authentication import AdminTokenAuthtication
 from myapp.handler import APIResponse
 from myapp.models import User
 from myapp.permission.permission import isDemoAdminUser, check_if_demo
 from myapp.serializers import UserSerializer, NormalUserSerializer
-from myapp.utils import md5value, after_call, clear_cache
+from myapp.utils import md5value, after_call, invalidate_cache
 
 
 class UserRateThrottle(AnonRateThrottle):
@@ -31,10 +32,10 @@ def admin_login(request):
     ip = utils.get_ip(request)
     lock_key = f"admin_login_lock:{ip}"
     fail_key = f"admin_login_fail:{ip}"
-    locked_until = cache.get(lock_key)
-    now_ts = utils.get_timestamp()
-    if locked_until and int(locked_until) > now_ts:
-        remain_s = int((int(locked_until) - now_ts) / 1000)
+    # 失败次数与锁定放在数据库计数里（myapp.counters），多个 worker 同时失败也不会少计
+    locked, locked_until = counters.get(lock_key)
+    if locked:
+        remain_s = int((locked_until - timezone.now()).total_seconds())
         if remain_s < 1:
             remain_s = 1
         return APIResponse(code=1, msg=f'登录失败次数过多，请{remain_s}秒后再试')
@@ -58,24 +59,20 @@ def admin_login(request):
         if user.role == '2':
             return APIResponse(code=1, msg='请使用管理员账号登录')
 
+        old_token = user.admin_token
         serializer = UserSerializer(user, data=data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            cache.delete(fail_key)
-            cache.delete(lock_key)
+            # 旧令牌作废
+            principal.revoke(old_token)
+            counters.reset(fail_key, lock_key)
             return APIResponse(code=0, msg='登录成功', data=serializer.data)
         else:
             print(serializer.errors)
 
-    fails = cache.get(fail_key) or 0
-    try:
-        fails = int(fails)
-    except Exception:
-        fails = 0
-    fails += 1
-    cache.set(fail_key, fails, 60 * 30)
+    fails = counters.hit(fail_key, 60 * 30)
     if fails >= 5:
-        cache.set(lock_key, now_ts + (15 * 60 * 1000), 60 * 20)
+        counters.hit(lock_key, 15 * 60)
         return APIResponse(code=1, msg='登录失败次数过多，请稍后再试')
 
     return APIResponse(code=1, msg='用户名或密码错误')
@@ -94,7 +91,7 @@ def list_api(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_USER))
 def create(request):
     print(request.data)
     if not request.data.get('username', None) or not request.data.get('password', None):
@@ -118,7 +115,7 @@ def create(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_USER))
 def update(request):
     try:
         pk = request.data['id']
@@ -135,6 +132,8 @@ def update(request):
     print(serializer.is_valid())
     if serializer.is_valid():
         serializer.save()
+        # 角色/状态可能变了
+        principal.revoke(user.admin_token)
         return APIResponse(code=0, msg='更新成功', data=serializer.data)
     else:
         print(serializer.errors)
@@ -144,7 +143,7 @@ def update(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_USER))
 def updatePwd(request):
     try:
         pk = request.data.get('id', None)
@@ -172,6 +171,7 @@ def updatePwd(request):
     serializer = UserSerializer(user, data=data, partial=True)
     if serializer.is_valid():
         serializer.save()
+        principal.revoke(user.admin_token)
         return APIResponse(code=0, msg='更新成功', data=serializer.data)
     else:
         print(serializer.errors)
@@ -182,10 +182,11 @@ def updatePwd(request):
 @api_view(['POST'])
 @authentication_classes([AdminTokenAuthtication])
 @check_if_demo
-@after_call(clear_cache)
+@after_call(invalidate_cache(cache_ns.TAG_USER))
 def delete(request):
     try:
         ids_arr = [request.data['id']]
+        principal.revoke_users(ids_arr)
         User.objects.filter(id__in=ids_arr).delete()
     except User.DoesNotExist:
         return APIResponse(code=1, msg='对象不存在')
@@ -11,9 +11,9 @@ def healthz(request):
     cache_ok = True
 
     try:
-        s = ShopSettings.get_solo()
-        if not s:
-            ShopSettings.objects.create()
+        # get_solo() 走进程内快照，这里直接查库确认数据库可用
+        if not ShopSettings.objects.exists():
+            ShopSettings.get_solo()
     except Exception:
         db_ok = False
 
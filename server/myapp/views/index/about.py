@@ -1,8 +1,8 @@
-from django.core.cache import cache
 from rest_framework.decorators import api_view
 
+from myapp import cache_ns
 from myapp.handler import APIResponse
-from myapp.i18n import apply_translations_for_list, apply_translations_for_obj, get_lang_from_request
+from myapp.i18n import TranslationContext, get_lang_from_request
 from myapp.models import BasicSite, Category, BasicGlobal, BasicBanner, Thing, BasicTdk, BasicAdditional, Advantage
 from myapp.serializers import CategorySerializer, BasicGlobalSerializer, ThingSerializer, AdvantageSerializer, \
     BasicSiteSerializer
@@ -14,13 +14,20 @@ def section(request):
 
         lang = get_lang_from_request(request)
 
+        tr = TranslationContext(lang)
+
         # 使用请求相关缓存键
-        cache_key = f"section_view:{request.get_full_path()}|lang={lang}"
-        cached_data = cache.get(cache_key)
+        cache_key = f"{request.get_full_path()}|lang={lang}"
+        cached_data = cache_ns.get(cache_ns.NS_SECTION, cache_key)
 
         if cached_data:
             return APIResponse(code=0, msg='查询成功', data=cached_data)
 
+        # 先取标签版本再查数据：计算期间若有改动，写入的缓存带旧版本，下次读取即失效
+        cache_token = cache_ns.versions(cache_ns.NS_SECTION, (
+            cache_ns.TAG_SITE, cache_ns.TAG_ADVANTAGE, cache_ns.TAG_I18N,
+        ))
+
         sectionData = {}
 
         # seo数据
@@ -30,8 +37,7 @@ def section(request):
             'seo_description': basicTdk.tdk_about_description,
             'seo_keywords': basicTdk.tdk_about_keywords,
         }
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicTdk',
             sectionData['seoData'],
             fields=['seo_title', 'seo_description', 'seo_keywords'],
@@ -48,8 +54,7 @@ def section(request):
         companyName = basicGlobalSerializer.data['global_company_name']
 
         sectionData['companyName'] = companyName
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicGlobal',
             sectionData,
             fields=['companyName'],
@@ -61,23 +66,27 @@ def section(request):
         sectionData['aboutData'] = {
             'aboutText': basicAdditional.additional_about,
             'aboutCover': basicAdditional.global_addition_about_image,
-            'companyName': sectionData.get('companyName') or companyName
+            'companyName': companyName
         }
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicAdditional',
             sectionData['aboutData'],
             fields=['aboutText'],
             object_id=str(getattr(basicAdditional, 'id', '') or ''),
         )
+        tr.add_obj(
+            'BasicGlobal',
+            sectionData['aboutData'],
+            fields=['companyName'],
+            object_id=str(getattr(basicGlobal, 'id', '') or ''),
+        )
 
         # mission数据
         sectionData['missionData'] = {
             'missionText': basicAdditional.additional_mission,
             'missionCover': basicAdditional.global_addition_mission_image,
         }
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicAdditional',
             sectionData['missionData'],
             fields=['missionText'],
@@ -88,8 +97,7 @@ def section(request):
         advantages = Advantage.objects.all()
         advantageSerializer = AdvantageSerializer(advantages, many=True)
         sectionData['advantageData'] = advantageSerializer.data
-        apply_translations_for_list(
-            lang,
+        tr.add_list(
             'Advantage',
             sectionData['advantageData'],
             fields=['advantage_title', 'advantage_description'],
@@ -113,8 +121,7 @@ def section(request):
             'param_four_name': basicAdditional.param_four_name,
             'param_four_value': basicAdditional.param_four_value,
         }
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicAdditional',
             sectionData['statsData'],
             fields=['param_one_name', 'param_two_name', 'param_three_name', 'param_four_name'],
@@ -128,16 +135,17 @@ def section(request):
         basicSite = BasicSite.get_solo()
         basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
         sectionData['siteName'] = basicSiteSerializer.data['site_name']
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicSite',
             sectionData,
             fields=['siteName'],
             object_id=str(getattr(basicSite, 'id', '') or ''),
         )
 
+        # 统一回填译文
+        tr.apply()
 
         # 缓存数据
-        cache.set(cache_key, sectionData, 300)  # 缓存300秒
+        cache_ns.put(cache_ns.NS_SECTION, cache_key, sectionData, 300, token=cache_token)  # 缓存300秒
 
         return APIResponse(code=0, msg='查询成功', data=sectionData)
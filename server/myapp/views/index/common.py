@@ -1,10 +1,9 @@
-from django.core.cache import cache
-from django.db.models import Q
 from rest_framework.decorators import api_view
 
+from myapp import cache_ns, category_tree
 from myapp.handler import APIResponse
-from myapp.i18n import apply_translations_for_list, apply_translations_for_obj, get_lang_from_request
-from myapp.models import BasicSite, Category, BasicGlobal, ShopSettings
+from myapp.i18n import TranslationContext, get_lang_from_request
+from myapp.models import BasicSite, BasicGlobal, ShopSettings
 from myapp.serializers import BasicGlobalSerializer, BasicSiteSerializer
 
 
@@ -29,69 +28,59 @@ def section(request):
     """
     if request.method == 'GET':
         lang = get_lang_from_request(request)
+        tr = TranslationContext(lang)
         no_cache_headers = {
             'Cache-Control': 'no-store, no-cache, must-revalidate, max-age=0',
             'Pragma': 'no-cache',
         }
         # 使用请求相关缓存键
-        cache_key = f"section_view:{request.get_full_path()}|lang={lang}"
-        cached_data = cache.get(cache_key)
+        cache_key = f"{request.get_full_path()}|lang={lang}"
+        cached_data = cache_ns.get(cache_ns.NS_SECTION, cache_key)
 
         if cached_data:
             return APIResponse(code=0, msg='查询成功', data=cached_data, headers=no_cache_headers)
 
+        # 先取标签版本再查数据：计算期间若有改动，写入的缓存带旧版本，下次读取即失效
+        cache_token = cache_ns.versions(cache_ns.NS_SECTION, (
+            cache_ns.TAG_SITE, cache_ns.TAG_CATEGORY, cache_ns.TAG_I18N,
+        ))
+
         # 获取所有需要的数据
         basicSite = BasicSite.get_solo()
         basicGlobal = BasicGlobal.get_solo()
 
-        # 一次性获取所有分类数据
-        all_categories = Category.objects.filter(
-            Q(pid=-1) | Q(pid__in=Category.objects.filter(pid=-1).values_list('id', flat=True))
-        ).order_by('sort', '-id')
-
-        # 分离一级分类和二级分类
+        # 一级分类和二级分类取自进程内分类树
+        tree = category_tree.get_tree()
         parent_categories = {}
         child_categories = {}
 
-        for category in all_categories:
-            if category.pid == -1:
-                parent_categories[category.id] = {
-                    'id': category.id,
-                    'title': category.title,
-                    'cover': category.cover,
-                    'sort': category.sort,
-                    'children': []
-                }
-            else:
-                if category.pid not in child_categories:
-                    child_categories[category.pid] = []
-                child_categories[category.pid].append({
-                    'id': category.id,
-                    'title': category.title,
-                    'cover': category.cover,
-                    'sort': category.sort
-                })
-
-        # 将子分类添加到父分类中
-        for parent_id, children in child_categories.items():
-            if parent_id in parent_categories:
-                parent_categories[parent_id]['children'] = sorted(
-                    children, key=lambda x: (x['sort'], -x['id'])
-                )
+        for parent in tree.children_of():
+            parent_categories[parent['id']] = {
+                'id': parent['id'],
+                'title': parent['title'],
+                'cover': parent['cover'],
+                'sort': parent['sort'],
+                'children': []
+            }
+            children = [
+                {'id': c['id'], 'title': c['title'], 'cover': c['cover'], 'sort': c['sort']}
+                for c in tree.children_of(parent['id'])
+            ]
+            if children:
+                child_categories[parent['id']] = children
+                parent_categories[parent['id']]['children'] = children
 
         # 构建导航数据
         basic_site_data = BasicSiteSerializer(basicSite).data
         basic_global_data = BasicGlobalSerializer(basicGlobal).data
 
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicSite',
             basic_site_data,
             fields=['site_name', 'site_nickname', 'site_address', 'site_copyright'],
             object_id=str(getattr(basicSite, 'id', '') or ''),
         )
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicGlobal',
             basic_global_data,
             fields=['global_company_name', 'global_email', 'global_address', 'global_phone'],
@@ -109,12 +98,15 @@ def section(request):
 
         # 将分类数据转换为前端所需的格式（先翻译 title 再映射到 name）
         parent_category_list = list(parent_categories.values())
-        apply_translations_for_list(lang, 'Category', parent_category_list, fields=['title'], id_key='id')
+        tr.add_list('Category', parent_category_list, fields=['title'], id_key='id')
 
         child_category_list = []
         for _pid, children in child_categories.items():
             child_category_list.extend(children)
-        apply_translations_for_list(lang, 'Category', child_category_list, fields=['title'], id_key='id')
+        tr.add_list('Category', child_category_list, fields=['title'], id_key='id')
+
+        # 站点、联系信息与分类译文一次查询回填，后续导航/页脚基于翻译后的数据构建
+        tr.apply()
 
         formatted_categories = []
         for parent in parent_category_list:
@@ -205,7 +197,7 @@ def section(request):
         }
 
         # 缓存数据（TTL 不宜过长，否则在 CDN/代理缓存介入时更容易出现主题回退）
-        cache.set(cache_key, data, 60)  # 缓存60秒
+        cache_ns.put(cache_ns.NS_SECTION, cache_key, data, 60, token=cache_token)  # 缓存60秒
 
         return APIResponse(
             code=0,
@@ -1,8 +1,8 @@
-from django.core.cache import cache
 from rest_framework.decorators import api_view
 
+from myapp import cache_ns
 from myapp.handler import APIResponse
-from myapp.i18n import apply_translations_for_list, apply_translations_for_obj, get_lang_from_request
+from myapp.i18n import TranslationContext, get_lang_from_request
 from myapp.models import BasicSite, Category, BasicGlobal, BasicBanner, Thing, BasicTdk
 from myapp.serializers import CategorySerializer, BasicGlobalSerializer, ThingSerializer, ListThingSerializer, \
     BasicSiteSerializer
@@ -14,13 +14,20 @@ def section(request):
 
         lang = get_lang_from_request(request)
 
+        tr = TranslationContext(lang)
+
         # 使用请求相关缓存键
-        cache_key = f"section_view:{request.get_full_path()}|lang={lang}"
-        cached_data = cache.get(cache_key)
+        cache_key = f"{request.get_full_path()}|lang={lang}"
+        cached_data = cache_ns.get(cache_ns.NS_SECTION, cache_key)
 
         if cached_data:
             return APIResponse(code=0, msg='查询成功', data=cached_data)
 
+        # 先取标签版本再查数据：计算期间若有改动，写入的缓存带旧版本，下次读取即失效
+        cache_token = cache_ns.versions(cache_ns.NS_SECTION, (
+            cache_ns.TAG_SITE, cache_ns.TAG_THING, cache_ns.TAG_CATEGORY, cache_ns.TAG_I18N,
+        ))
+
         sectionData = {}
 
         # seo数据
@@ -30,8 +37,7 @@ def section(request):
             'seo_description': basicTdk.tdk_contact_description,
             'seo_keywords': basicTdk.tdk_contact_keywords,
         }
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicTdk',
             sectionData['seoData'],
             fields=['seo_title', 'seo_description', 'seo_keywords'],
@@ -46,8 +52,7 @@ def section(request):
         basicGlobal = BasicGlobal.get_solo()
         basicGlobalSerializer = BasicGlobalSerializer(basicGlobal, many=False)
         sectionData['contactData'] = basicGlobalSerializer.data
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicGlobal',
             sectionData['contactData'],
             fields=['global_company_name', 'global_email', 'global_address', 'global_phone'],
@@ -58,20 +63,22 @@ def section(request):
         things = Thing.objects.filter(status=0, dimension__icontains="Recommend").order_by('-create_time')[:4]
         thingSerializer = ListThingSerializer(things, many=True)
         sectionData['recommendData'] = thingSerializer.data
-        apply_translations_for_list(lang, 'Thing', sectionData['recommendData'], fields=['title', 'category_title'], id_key='id')
+        tr.add_list('Thing', sectionData['recommendData'], fields=['title', 'category_title'], id_key='id')
 
         basicSite = BasicSite.get_solo()
         basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
         sectionData['siteName'] = basicSiteSerializer.data['site_name']
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicSite',
             sectionData,
             fields=['siteName'],
             object_id=str(getattr(basicSite, 'id', '') or ''),
         )
 
+        # 统一回填译文
+        tr.apply()
+
         # 缓存数据
-        cache.set(cache_key, sectionData, 300)  # 缓存300秒
+        cache_ns.put(cache_ns.NS_SECTION, cache_key, sectionData, 300, token=cache_token)  # 缓存300秒
 
         return APIResponse(code=0, msg='查询成功', data=sectionData)
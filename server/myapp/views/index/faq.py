@@ -1,7 +1,7 @@
 from rest_framework.decorators import api_view
 
 from myapp.handler import APIResponse
-from myapp.i18n import apply_translations_for_list, apply_translations_for_obj, get_lang_from_request
+from myapp.i18n import TranslationContext, get_lang_from_request
 from myapp.models import BasicSite, Category, BasicGlobal, BasicBanner, Thing, Faq, BasicTdk
 from myapp.serializers import CategorySerializer, BasicGlobalSerializer, ThingSerializer, FaqSerializer, \
     BasicSiteSerializer
@@ -14,6 +14,8 @@ def section(request):
 
         lang = get_lang_from_request(request)
 
+        tr = TranslationContext(lang)
+
         # seo数据
         basicTdk = BasicTdk.get_solo()
         sectionData['seoData'] = {
@@ -21,8 +23,7 @@ def section(request):
             'seo_description': basicTdk.tdk_faq_description,
             'seo_keywords': basicTdk.tdk_faq_keywords,
         }
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicTdk',
             sectionData['seoData'],
             fields=['seo_title', 'seo_description', 'seo_keywords'],
@@ -33,8 +34,7 @@ def section(request):
         basicSite = BasicSite.get_solo()
         basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
         sectionData['siteName'] = basicSiteSerializer.data['site_name']
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicSite',
             sectionData,
             fields=['siteName'],
@@ -50,6 +50,7 @@ def section(request):
         faqSerializer = FaqSerializer(faqs, many=True)
         sectionData['faqData'] = faqSerializer.data
 
-        apply_translations_for_list(lang, 'Faq', sectionData['faqData'], fields=['question', 'reply'], id_key='id')
+        tr.add_list('Faq', sectionData['faqData'], fields=['question', 'reply'], id_key='id')
 
+        tr.apply()
         return APIResponse(code=0, msg='查询成功', data=sectionData)
@@ -2,11 +2,10 @@
 
 from rest_framework.decorators import api_view
 from rest_framework.pagination import PageNumberPagination
-from django.core.cache import cache
 
-from myapp import utils
+from myapp import cache_ns, utils
 from myapp.handler import APIResponse
-from myapp.i18n import apply_translations_for_list, apply_translations_for_obj, get_lang_from_request
+from myapp.i18n import TranslationContext, get_lang_from_request
 from myapp.models import Category, Thing, BasicTdk, BasicBanner, BasicAdditional, BasicGlobal, Comment, News, BasicSite
 from myapp.serializers import ThingSerializer, CategorySerializer, ListThingSerializer, BasicGlobalSerializer, \
     CommentSerializer, NewsSerializer, NewsListSerializer, NormalCategorySerializer, BasicSiteSerializer
@@ -18,13 +17,21 @@ def section(request):
 
         lang = get_lang_from_request(request)
 
+        tr = TranslationContext(lang)
+
         # 使用请求相关缓存键
-        cache_key = f"section_view:{request.get_full_path()}|lang={lang}"
-        cached_data = cache.get(cache_key)
+        cache_key = f"{request.get_full_path()}|lang={lang}"
+        cached_data = cache_ns.get(cache_ns.NS_SECTION, cache_key)
 
         if cached_data:
             return APIResponse(code=0, msg='查询成功', data=cached_data)
 
+        # 先取标签版本再查数据：计算期间若有改动，写入的缓存带旧版本，下次读取即失效
+        cache_token = cache_ns.versions(cache_ns.NS_SECTION, (
+            cache_ns.TAG_SITE, cache_ns.TAG_CATEGORY, cache_ns.TAG_THING, cache_ns.TAG_COMMENT,
+            cache_ns.TAG_NEWS, cache_ns.TAG_I18N,
+        ))
+
         sectionData = {}
 
         # seo数据
@@ -34,8 +41,7 @@ def section(request):
             'seo_description': basicTdk.tdk_home_description,
             'seo_keywords': basicTdk.tdk_home_keywords,
         }
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicTdk',
             sectionData['seoData'],
             fields=['seo_title', 'seo_description', 'seo_keywords'],
@@ -50,13 +56,13 @@ def section(request):
         categories = Category.objects.filter(pid=-1).order_by('sort', '-id')
         categorySerializer = NormalCategorySerializer(categories, many=True)
         sectionData['categoryData'] = categorySerializer.data
-        apply_translations_for_list(lang, 'Category', sectionData['categoryData'], fields=['title'], id_key='id')
+        tr.add_list('Category', sectionData['categoryData'], fields=['title'], id_key='id')
 
         # 精选产品
         featuredThings = Thing.objects.filter(status=0, dimension__icontains="Feature").order_by('-create_time')[:8]
         thingSerializer = ListThingSerializer(featuredThings, many=True)
         sectionData['featuredData'] = thingSerializer.data
-        apply_translations_for_list(lang, 'Thing', sectionData['featuredData'], fields=['title', 'category_title'], id_key='id')
+        tr.add_list('Thing', sectionData['featuredData'], fields=['title', 'category_title'], id_key='id')
 
         # about us
         basicAdditional = BasicAdditional.get_solo()
@@ -64,8 +70,7 @@ def section(request):
             'aboutText': basicAdditional.additional_about,
             'aboutCover': basicAdditional.global_addition_about_image,
         }
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicAdditional',
             sectionData['aboutData'],
             fields=['aboutText'],
@@ -74,8 +79,7 @@ def section(request):
         basicGlobal = BasicGlobal.get_solo()
         basicGlobalSerializer = BasicGlobalSerializer(basicGlobal, many=False)
         sectionData['companyName'] = basicGlobalSerializer.data['global_company_name']
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicGlobal',
             sectionData,
             fields=['companyName'],
@@ -85,8 +89,7 @@ def section(request):
         basicSite = BasicSite.get_solo()
         basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
         sectionData['siteName'] = basicSiteSerializer.data['site_name']
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicSite',
             sectionData,
             fields=['siteName'],
@@ -104,8 +107,7 @@ def section(request):
             'param_four_name': basicAdditional.param_four_name,
             'param_four_value': basicAdditional.param_four_value,
         }
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicAdditional',
             sectionData['statsData'],
             fields=['param_one_name', 'param_two_name', 'param_three_name', 'param_four_name'],
@@ -114,8 +116,7 @@ def section(request):
 
         # hero文案
         sectionData['heroText'] = basicAdditional.ext01
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicAdditional',
             sectionData,
             fields=['heroText'],
@@ -131,12 +132,15 @@ def section(request):
         news = News.objects.all()[:3]
         newsSerializer = NewsListSerializer(news, many=True)
         sectionData['newsData'] = newsSerializer.data
-        apply_translations_for_list(lang, 'News', sectionData['newsData'], fields=['title'], id_key='id')
+        tr.add_list('News', sectionData['newsData'], fields=['title'], id_key='id')
 
         # 联系底图
         sectionData['contactData'] = basicAdditional.global_addition_contact_image
 
+        # 统一回填译文
+        tr.apply()
+
         # 缓存数据
-        cache.set(cache_key, sectionData, 300)  # 缓存300秒
+        cache_ns.put(cache_ns.NS_SECTION, cache_key, sectionData, 300, token=cache_token)  # 缓存300秒
 
         return APIResponse(code=0, msg='查询成功', data=sectionData)
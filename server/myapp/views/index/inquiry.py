@@ -3,12 +3,10 @@
 from rest_framework.decorators import api_view, throttle_classes
 from rest_framework.throttling import AnonRateThrottle
 
-from myapp import utils
+from myapp import mailer, utils
 from myapp.handler import APIResponse
 from myapp.models import BasicGlobal
 from myapp.serializers import InquirySerializer, BasicGlobalSerializer
-from myapp.utils import send_email
-from server.settings import SMTP_SERVER, SENDER_EMAIL, SENDER_PASS
 
 
 class MyRateThrottle(AnonRateThrottle):
@@ -29,7 +27,7 @@ def create(request):
         basicGlobalSerializer = BasicGlobalSerializer(basicGlobal, many=False)
         global_email = basicGlobalSerializer.data['global_email']
 
-        # 发送邮件
+        # 邮件通知
         try:
             create_time = None
             try:
@@ -62,18 +60,11 @@ def create(request):
                 "<p>请登录网站后台查看与跟进。</p>"
             )
 
-            send_email(
-                subject="询盘通知",
-                receivers=global_email,
-                content=content,
-                smtp_server=SMTP_SERVER,
-                port=465,
-                sender_email=SENDER_EMAIL,
-                sender_pass=SENDER_PASS
-            )
+            # 写入发件箱，由 send_mail_outbox 进程异步投递
+            mailer.enqueue(subject="询盘通知", receivers=global_email, content=content)
         except Exception as e:
             try:
-                utils.log_error(request, f"Inquiry email send failed: {str(e)}")
+                utils.log_error(request, f"Inquiry email enqueue failed: {str(e)}")
             except Exception:
                 pass
 
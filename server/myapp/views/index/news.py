@@ -1,18 +1,16 @@
 from rest_framework.decorators import api_view
-from rest_framework.pagination import PageNumberPagination
 
 from myapp import utils
 from myapp.handler import APIResponse
-from myapp.i18n import apply_translations_for_list, apply_translations_for_obj, get_lang_from_request
+from myapp.i18n import TranslationContext, get_lang_from_request
 from myapp.models import BasicSite, Category, BasicGlobal, BasicBanner, Thing, News, BasicTdk
+from myapp.pagination import MyPageNumberPagination as BasePagination
 from myapp.serializers import CategorySerializer, BasicGlobalSerializer, ThingSerializer, \
     NormalCategorySerializer, NewsSerializer, NewsListSerializer, BasicSiteSerializer, ListThingSerializer
 
 
-class MyPageNumberPagination(PageNumberPagination):
+class MyPageNumberPagination(BasePagination):
     page_size = 9  # 每页的默认项
-    page_size_query_param = 'pageSize'  # 允许通过 URL 参数设置每页的大小
-    max_page_size = 100  # 最大页尺寸
 
 
 @api_view(['GET'])
@@ -22,6 +20,8 @@ def section(request):
 
         lang = get_lang_from_request(request)
 
+        tr = TranslationContext(lang)
+
         # seo数据
         basicTdk = BasicTdk.get_solo()
         sectionData['seoData'] = {
@@ -29,8 +29,7 @@ def section(request):
             'seo_description': basicTdk.tdk_news_description,
             'seo_keywords': basicTdk.tdk_news_keywords,
         }
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicTdk',
             sectionData['seoData'],
             fields=['seo_title', 'seo_description', 'seo_keywords'],
@@ -41,8 +40,7 @@ def section(request):
         basicSite = BasicSite.get_solo()
         basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
         sectionData['siteName'] = basicSiteSerializer.data['site_name']
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicSite',
             sectionData,
             fields=['siteName'],
@@ -62,14 +60,16 @@ def section(request):
         news = News.objects.all().order_by('-create_time')
         paginator = MyPageNumberPagination()
         paginated_list = paginator.paginate_queryset(news, request)
-        total = news.count()
+        total = paginator.total
 
         newsSerializer = NewsListSerializer(paginated_list, many=True)
         sectionData['newsData'] = newsSerializer.data
         sectionData['total'] = total
+        sectionData['nextCursor'] = paginator.next_cursor
 
-        apply_translations_for_list(lang, 'News', sectionData['newsData'], fields=['title'], id_key='id')
+        tr.add_list('News', sectionData['newsData'], fields=['title'], id_key='id')
 
+        tr.apply()
         return APIResponse(code=0, msg='查询成功', data=sectionData)
 
 
@@ -85,14 +85,14 @@ def detail(request):
 
     if request.method == 'GET':
         lang = get_lang_from_request(request)
+        tr = TranslationContext(lang)
         serializer = NewsSerializer(news)
 
         # siteName
         basicSite = BasicSite.get_solo()
         basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
         data['siteName'] = basicSiteSerializer.data['site_name']
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicSite',
             data,
             fields=['siteName'],
@@ -101,8 +101,7 @@ def detail(request):
 
         # 详情数据
         data['detailData'] = serializer.data
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'News',
             data['detailData'],
             fields=['title', 'summary', 'source', 'description', 'seo_title', 'seo_description', 'seo_keywords'],
@@ -118,6 +117,7 @@ def detail(request):
         categories = Category.objects.filter(pid=-1).order_by('sort', '-id')
         categorySerializer = NormalCategorySerializer(categories, many=True)
         data['categoryData'] = categorySerializer.data
-        apply_translations_for_list(lang, 'Category', data['categoryData'], fields=['title'], id_key='id')
+        tr.add_list('Category', data['categoryData'], fields=['title'], id_key='id')
 
+        tr.apply()
         return APIResponse(code=0, msg='查询成功', data=data)
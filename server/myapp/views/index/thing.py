@@ -1,29 +1,19 @@
 # Create your views here.
 
 from rest_framework.decorators import api_view
-from rest_framework.pagination import PageNumberPagination
 from django.core.cache import cache
 
-from myapp import utils
+from myapp import category_tree, listing, search, utils
 from myapp.handler import APIResponse
-from myapp.i18n import apply_translations_for_list, apply_translations_for_obj, get_lang_from_request
+from myapp.i18n import TranslationContext, get_lang_from_request
 from myapp.models import Category, Thing, ThingSku, BasicTdk, BasicBanner, BasicSite
+from myapp.pagination import MyPageNumberPagination as BasePagination
 from myapp.serializers import ThingSerializer, CategorySerializer, ListThingSerializer, NormalCategorySerializer, \
     BasicSiteSerializer
 
 
-def get_all_category_ids(category_id):
-    ids = [category_id]
-    sub_ids = Category.objects.filter(pid=category_id).values_list('id', flat=True)
-    for sub_id in sub_ids:
-        ids.extend(get_all_category_ids(sub_id))
-    return ids
-
-
-class MyPageNumberPagination(PageNumberPagination):
+class MyPageNumberPagination(BasePagination):
     page_size = 9  # 每页的默认项
-    page_size_query_param = 'pageSize'  # 允许通过 URL 参数设置每页的大小
-    max_page_size = 100  # 最大页尺寸
 
 
 @api_view(['GET'])
@@ -32,6 +22,8 @@ def section(request):
 
         lang = get_lang_from_request(request)
 
+        tr = TranslationContext(lang)
+
         sectionData = {}
 
         # seo数据
@@ -41,8 +33,7 @@ def section(request):
             'seo_description': basicTdk.tdk_product_description,
             'seo_keywords': basicTdk.tdk_product_keywords,
         }
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicTdk',
             sectionData['seoData'],
             fields=['seo_title', 'seo_description', 'seo_keywords'],
@@ -53,8 +44,7 @@ def section(request):
         basicSite = BasicSite.get_solo()
         basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
         sectionData['siteName'] = basicSiteSerializer.data['site_name']
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicSite',
             sectionData,
             fields=['siteName'],
@@ -66,45 +56,70 @@ def section(request):
         sectionData['bannerData'] = basicBanner.banner_product
 
         # 左侧分类数据
-        categories = Category.objects.filter(pid=-1).order_by('sort', '-id')
-        categorySerializer = CategorySerializer(categories, many=True)
-        sectionData['categoryData'] = categorySerializer.data
-        apply_translations_for_list(lang, 'Category', sectionData['categoryData'], fields=['title'], id_key='id')
+        tree = category_tree.get_tree()
+        sectionData['categoryData'] = tree.serialize()
+        tr.add_list('Category', sectionData['categoryData'], fields=['title'], id_key='id')
         # sectionData['categoryData'].insert(0, {
         #     "id": -1,
         #     "title": "All Products",
         # })
 
+        # 上架商品快照，未命中时回退到 ORM
+        snapshot = listing.get_snapshot()
+
         # 左侧产品
-        featuredThings = Thing.objects.filter(status=0, dimension__icontains="Feature").order_by('-create_time')[:4]
-        thingSerializer = ListThingSerializer(featuredThings, many=True)
-        sectionData['featuredData'] = thingSerializer.data
-        apply_translations_for_list(lang, 'Thing', sectionData['featuredData'], fields=['title', 'category_title'], id_key='id')
+        if snapshot is not None:
+            sectionData['featuredData'] = listing.rows(snapshot.featured_ids(4))
+        else:
+            featuredThings = Thing.objects.filter(status=0, dimension__icontains="Feature") \
+                .select_related('category').order_by('-create_time')[:4]
+            sectionData['featuredData'] = ListThingSerializer(featuredThings, many=True).data
+        tr.add_list('Thing', sectionData['featuredData'], fields=['title', 'category_title'], id_key='id')
 
         # 产品数据
         searchQuery = request.GET.get("searchQuery", None)
         categoryId = request.GET.get("categoryId", None)
+        has_category = bool(categoryId) and categoryId != '-1'
+        things = None
         if searchQuery:
-            things = Thing.objects.filter(status=0, title__contains=searchQuery).order_by('-create_time')
-        elif categoryId and categoryId != '-1':
-            # 分类以及子分类的数据
-            category_ids = get_all_category_ids(categoryId)
+            # 走搜索索引，按相关度排序
+            thing_ids = search.search_thing_ids(searchQuery)
+            if thing_ids is None:
+                things = Thing.objects.filter(status=0, title__contains=searchQuery).order_by('-create_time')
+        elif snapshot is not None:
+            # 分类以及子分类的数据直接取快照中的 id 列表
+            thing_ids = snapshot.ids(categoryId if has_category else None)
+        elif has_category:
+            category_ids = tree.descendant_ids(categoryId)
             things = Thing.objects.filter(category_id__in=category_ids, status=0).order_by('-create_time')
         else:
             things = Thing.objects.filter(status=0).order_by('-create_time')
 
         # 分页
         paginator = MyPageNumberPagination()
-        paginated_things = paginator.paginate_queryset(things, request)
-        total = things.count()
-
-        serializer = ListThingSerializer(paginated_things, many=True)
+        if things is None:
+            if not searchQuery and paginator.cursor_query_param in request.query_params:
+                # 快照上的游标翻页（搜索结果按相关度排序，只支持页码）
+                page_ids, paginator.next_cursor = snapshot.page_after(
+                    categoryId if has_category else None,
+                    (request.query_params.get(paginator.cursor_query_param) or '').strip(),
+                    paginator.get_page_size(request) or paginator.page_size,
+                )
+            else:
+                page_ids = paginator.paginate_queryset(thing_ids, request)
+            sectionData['productData'] = listing.rows(page_ids)
+            total = len(thing_ids)
+        else:
+            paginated_things = paginator.paginate_queryset(things.select_related('category'), request)
+            sectionData['productData'] = ListThingSerializer(paginated_things, many=True).data
+            total = paginator.total
 
-        sectionData['productData'] = serializer.data
         sectionData['total'] = total
+        sectionData['nextCursor'] = paginator.next_cursor
 
-        apply_translations_for_list(lang, 'Thing', sectionData['productData'], fields=['title', 'category_title'], id_key='id')
+        tr.add_list('Thing', sectionData['productData'], fields=['title', 'category_title'], id_key='id')
 
+        tr.apply()
         return APIResponse(code=0, msg='查询成功', data=sectionData)
 
 
@@ -120,14 +135,14 @@ def detail(request):
 
     if request.method == 'GET':
         lang = get_lang_from_request(request)
+        tr = TranslationContext(lang)
         serializer = ThingSerializer(thing)
 
         # siteName
         basicSite = BasicSite.get_solo()
         basicSiteSerializer = BasicSiteSerializer(basicSite, many=False)
         data['siteName'] = basicSiteSerializer.data['site_name']
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'BasicSite',
             data,
             fields=['siteName'],
@@ -137,8 +152,7 @@ def detail(request):
         # 详情数据
         detail_data = serializer.data
 
-        apply_translations_for_obj(
-            lang,
+        tr.add_obj(
             'Thing',
             detail_data,
             fields=['title', 'summary', 'description', 'seo_title', 'seo_description', 'seo_keywords', 'category_title'],
@@ -158,6 +172,7 @@ def detail(request):
         thingSerializer = ListThingSerializer(relatedThings, many=True)
         data['relatedData'] = thingSerializer.data
 
-        apply_translations_for_list(lang, 'Thing', data['relatedData'], fields=['title', 'category_title'], id_key='id')
+        tr.add_list('Thing', data['relatedData'], fields=['title', 'category_title'], id_key='id')
 
+        tr.apply()
         return APIResponse(code=0, msg='查询成功', data=data)
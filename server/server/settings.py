@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -113,6 +114,19 @@ DATABASES = {
     }
 }
 
+# 缓存：默认使用本机文件缓存，同一台机器上的 gunicorn worker 共享同一份数据
+# docker 部署时各后端容器通过 DJANGO_CACHE_LOCATION 指向同一个卷（见 docker-compose.yml）
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'django_cache')),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('DJANGO_CACHE_MAX_ENTRIES', '20000')),
+        },
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -178,16 +192,71 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 
 # 图片尺寸
 CDN_IMAGE_UPLOAD_SIZE = 10 * 1024 * 1024
-# 视频尺寸
-CDN_VIDEO_UPLOAD_SIZE = 500 * 1024 * 1024
+# 视频尺寸（超过 nginx client_max_body_size 的文件需走分片上传 admin/cdn/chunk/*）
+CDN_VIDEO_UPLOAD_SIZE = int(os.getenv('CDN_VIDEO_UPLOAD_SIZE', str(500 * 1024 * 1024)))
 # 普通文件尺寸
-CDN_FILE_UPLOAD_SIZE = 500 * 1024 * 1024
+CDN_FILE_UPLOAD_SIZE = int(os.getenv('CDN_FILE_UPLOAD_SIZE', str(500 * 1024 * 1024)))
 
 # smtp设置
 SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.qq.com')
 SENDER_EMAIL = os.getenv('SENDER_EMAIL', 'you@example.com')
 SENDER_PASS = os.getenv('SENDER_PASS', 'change-me')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '465'))
+# 1 = SMTP_SSL（465），0 = 明文 SMTP + 可选 STARTTLS（本地调试可用 aiosmtpd 之类的替身）
+SMTP_USE_SSL = os.getenv('SMTP_USE_SSL', '1') == '1'
+SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', '0') == '1'
+SMTP_TIMEOUT = int(os.getenv('SMTP_TIMEOUT', '15'))
+# 邮件发件箱：最多重试次数、首次重试间隔（秒，之后按 2 的幂递增，封顶 1 小时）
+MAIL_MAX_ATTEMPTS = int(os.getenv('MAIL_MAX_ATTEMPTS', '6'))
+MAIL_RETRY_BASE_SECONDS = int(os.getenv('MAIL_RETRY_BASE_SECONDS', '60'))
 
 # 域名
 # BASE_HOST_URL = 'http://127.0.0.1:8000'
 BASE_HOST_URL = os.getenv('DJANGO_BASE_HOST_URL', 'http://localhost')
+
+# 访问日志异步批量写入（缓冲区容量 / 每批条数 / 最长刷盘间隔毫秒）
+OPLOG_ASYNC = os.getenv('OPLOG_ASYNC', '1') == '1'
+OPLOG_BUFFER_SIZE = int(os.getenv('OPLOG_BUFFER_SIZE', '10000'))
+OPLOG_FLUSH_BATCH = int(os.getenv('OPLOG_FLUSH_BATCH', '200'))
+OPLOG_FLUSH_INTERVAL_MS = int(os.getenv('OPLOG_FLUSH_INTERVAL_MS', '1000'))
+
+# 多语言：每种语言在进程内保留的热点译文条数
+I18N_LRU_SIZE = int(os.getenv('I18N_LRU_SIZE', '5000'))
+# 多语言：常驻内存译文包的条数上限，超过后回退为按请求批量查询
+I18N_BUNDLE_MAX_ENTRIES = int(os.getenv('I18N_BUNDLE_MAX_ENTRIES', '200000'))
+# 商品搜索：单次搜索最多返回的结果数（按相关度截断）
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', '1000'))
+# 库存预占：下单后保留库存的分钟数，超时由 release_expired_reservations 释放；0 表示下单不预占、支付时再扣
+STOCK_RESERVATION_MINUTES = int(os.getenv('STOCK_RESERVATION_MINUTES', '30'))
+# PayPal：接口地址覆盖（留空按 PAYPAL_ENV 选择 sandbox/live，本地替身调试时填写）、连接/读取超时（秒）、
+# 连接池大小、access token 到期前提前刷新的秒数
+PAYPAL_API_BASE = os.getenv('PAYPAL_API_BASE', '')
+PAYPAL_CONNECT_TIMEOUT = float(os.getenv('PAYPAL_CONNECT_TIMEOUT', '5'))
+PAYPAL_READ_TIMEOUT = float(os.getenv('PAYPAL_READ_TIMEOUT', '20'))
+PAYPAL_POOL_SIZE = int(os.getenv('PAYPAL_POOL_SIZE', '10'))
+PAYPAL_TOKEN_REFRESH_SECONDS = int(os.getenv('PAYPAL_TOKEN_REFRESH_SECONDS', '300'))
+# Stripe webhook 事件：临时错误的最多处理次数（之后记为 failed，可用 process_stripe_events --replay-failed 重放）
+STRIPE_EVENT_MAX_ATTEMPTS = int(os.getenv('STRIPE_EVENT_MAX_ATTEMPTS', '8'))
+# 后台导出：每批读取的行数（内存占用与它成正比，与导出总行数无关）
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+# 概览汇总：每次增量汇总时往前重算的小时数（覆盖访问日志异步写入的延迟）
+STATS_ROLLUP_LOOKBACK_HOURS = int(os.getenv('STATS_ROLLUP_LOOKBACK_HOURS', '2'))
+# 访问日志保留天数（0 表示不清理）、清理前是否归档、归档目录（默认 backup/oplog，不要放在对外公开的 upload 下）、每批删除条数
+OPLOG_RETENTION_DAYS = int(os.getenv('OPLOG_RETENTION_DAYS', '90'))
+OPLOG_ARCHIVE = os.getenv('OPLOG_ARCHIVE', '1') == '1'
+OPLOG_ARCHIVE_DIR = os.getenv('OPLOG_ARCHIVE_DIR', os.path.join(BASE_DIR, 'backup', 'oplog'))
+OPLOG_PURGE_BATCH = int(os.getenv('OPLOG_PURGE_BATCH', '5000'))
+# 后台令牌解析结果的缓存秒数（不会超过令牌本身的过期时间；登录/改密码/修改或删除帐号时立即作废）
+ADMIN_PRINCIPAL_CACHE_SECONDS = int(os.getenv('ADMIN_PRINCIPAL_CACHE_SECONDS', '300'))
+# 站点地图：分片目录（默认 upload/sitemap，由 nginx 以 /sitemap-*.xml.gz 对外提供）、每个分片的 URL 数上限（最大 50000）
+SITEMAP_DIR = os.getenv('SITEMAP_DIR', os.path.join(MEDIA_ROOT, 'sitemap'))
+SITEMAP_SHARD_SIZE = int(os.getenv('SITEMAP_SHARD_SIZE', '50000'))
+# 上传图片衍生图：是否生成、宽度列表、格式（webp/jpeg）、压缩质量、生成进程数
+IMAGE_VARIANTS_ENABLED = os.getenv('IMAGE_VARIANTS_ENABLED', '1') == '1'
+IMAGE_VARIANT_WIDTHS = os.getenv('IMAGE_VARIANT_WIDTHS', '320,640,1280')
+IMAGE_VARIANT_FORMATS = os.getenv('IMAGE_VARIANT_FORMATS', 'webp,jpeg')
+IMAGE_VARIANT_QUALITY = int(os.getenv('IMAGE_VARIANT_QUALITY', '80'))
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', '2'))
+# 分片上传：每片字节数（需小于 nginx client_max_body_size）、未完成上传的保留小时数
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+UPLOAD_SESSION_HOURS = int(os.getenv('UPLOAD_SESSION_HOURS', '24'))
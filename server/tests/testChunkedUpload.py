@@ -0,0 +1,105 @@
+import hashlib
+import os
+import struct
+import threading
+import time
+
+import requests
+
+# 分片上传自测：向运行中的后端上传一个按需生成的大文件（默认 3GB，不落本地磁盘），
+# 中途故意漏传部分分片并传一个校验错误的分片，模拟断线后用 status 续传，最后校验整文件 sha256
+# 传 SERVER_PID 时每 0.5 秒采样一次后端进程的 RSS，确认内存不随文件大小增长
+# 用法：ADMIN_TOKEN=xxx SIZE_MB=3072 SERVER_PID=12345 python tests/testChunkedUpload.py
+BASE_URL = os.getenv('BASE_URL', 'http://127.0.0.1:8000/myapp')
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+SIZE = int(os.getenv('SIZE_MB', '3072')) * 1024 * 1024
+SERVER_PID = os.getenv('SERVER_PID')
+
+session = requests.Session()
+session.headers['ADMINTOKEN'] = ADMIN_TOKEN
+
+
+def chunk_bytes(index, length):
+    # 每片内容由序号决定，重传时内容一致
+    pattern = struct.pack('>Q', index) + b'chunked-upload-test'
+    return (pattern * (length // len(pattern) + 1))[:length]
+
+
+def rss_kb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def sample_rss(samples, stop):
+    while not stop.is_set():
+        try:
+            samples.append(rss_kb(SERVER_PID))
+        except OSError:
+            return
+        time.sleep(0.5)
+
+
+def put_chunk(upload_id, index, data, sha256=None):
+    headers = {'Content-Type': 'application/octet-stream',
+               'X-Chunk-Sha256': sha256 or hashlib.sha256(data).hexdigest()}
+    resp = session.post(f'{BASE_URL}/admin/cdn/chunk/put', params={'uploadId': upload_id, 'index': index},
+                        data=data, headers=headers, timeout=120)
+    return resp.json()
+
+
+def main():
+    samples, stop = [], threading.Event()
+    if SERVER_PID:
+        threading.Thread(target=sample_rss, args=(samples, stop), daemon=True).start()
+
+    init = session.post(f'{BASE_URL}/admin/cdn/chunk/init',
+                        json={'filename': 'big.zip', 'size': SIZE, 'type': 'file'}, timeout=30).json()
+    assert init['code'] == 0, init
+    meta = init['data']
+    upload_id, chunk_size, chunks = meta['uploadId'], meta['chunkSize'], meta['chunks']
+    print(f'uploadId={upload_id} size={SIZE} chunkSize={chunk_size} chunks={chunks}')
+
+    whole = hashlib.sha256()
+    for i in range(chunks):
+        whole.update(chunk_bytes(i, min(chunk_size, SIZE - i * chunk_size)))
+
+    started = time.time()
+    # 第一轮：每 5 片漏传 1 片，模拟断线
+    for i in range(chunks):
+        if i % 5 == 2:
+            continue
+        data = chunk_bytes(i, min(chunk_size, SIZE - i * chunk_size))
+        result = put_chunk(upload_id, i, data)
+        assert result['code'] == 0, result
+
+    # 校验不通过的分片不应记为已收到
+    bad = put_chunk(upload_id, 2, chunk_bytes(2, min(chunk_size, SIZE - 2 * chunk_size)), sha256='0' * 64)
+    assert bad['code'] == 1, bad
+
+    status = session.get(f'{BASE_URL}/admin/cdn/chunk/status', params={'uploadId': upload_id}, timeout=30).json()
+    received = set(status['data']['received'])
+    missing = [i for i in range(chunks) if i not in received]
+    print(f'received {len(received)}, resuming {len(missing)} missing chunks')
+    assert missing == [i for i in range(chunks) if i % 5 == 2]
+
+    for i in missing:
+        result = put_chunk(upload_id, i, chunk_bytes(i, min(chunk_size, SIZE - i * chunk_size)))
+        assert result['code'] == 0, result
+
+    done = session.post(f'{BASE_URL}/admin/cdn/chunk/complete',
+                        json={'uploadId': upload_id, 'sha256': whole.hexdigest()}, timeout=600).json()
+    assert done['code'] == 0, done
+    elapsed = time.time() - started
+    print(f"complete: {done['data']['url']}  {SIZE / 1024 / 1024 / elapsed:.1f} MB/s")
+
+    stop.set()
+    if samples:
+        print(f'server RSS: start {samples[0] // 1024}MB, max {max(samples) // 1024}MB, '
+              f'end {samples[-1] // 1024}MB ({len(samples)} samples)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import os
+
+import requests
+
+# 前台商品列表游标翻页自测：沿 nextCursor 走完全部页，检查第 2 页与第 1 页不同、没有重复和遗漏，
+# 且顺序与页码翻页一致（商品列表快照命中和回退 ORM 两条路径都应满足）
+# 用法：CATEGORY_ID=3 python tests/testListingCursor.py
+BASE_URL = os.getenv('BASE_URL', 'http://127.0.0.1:8000/myapp')
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', '5'))
+CATEGORY_ID = os.getenv('CATEGORY_ID')
+
+
+def fetch(**params):
+    params['pageSize'] = PAGE_SIZE
+    if CATEGORY_ID:
+        params['categoryId'] = CATEGORY_ID
+    resp = requests.get(f'{BASE_URL}/index/thing/section', params=params, timeout=30).json()
+    assert resp['code'] == 0, resp
+    return resp['data']
+
+
+def main():
+    pages = []
+    cursor = ''
+    while True:
+        data = fetch(cursor=cursor)
+        pages.append([row['id'] for row in data['productData']])
+        cursor = data['nextCursor']
+        if not cursor:
+            break
+    total = data['total']
+    print(f'total={total} pages={len(pages)}')
+
+    if total > PAGE_SIZE:
+        assert len(pages) > 1, '有多页数据但第一页没有返回 nextCursor'
+        assert pages[0] != pages[1], '第 2 页与第 1 页相同，cursor 被忽略'
+
+    ids = [i for page in pages for i in page]
+    assert len(ids) == len(set(ids)), '游标翻页出现重复商品'
+    assert len(ids) == total, f'游标翻页共 {len(ids)} 条，total 为 {total}'
+
+    by_page = []
+    for page in range(1, (total + PAGE_SIZE - 1) // PAGE_SIZE + 1):
+        by_page += [row['id'] for row in fetch(page=page)['productData']]
+    assert ids == by_page, '游标翻页与页码翻页的顺序不一致'
+    print('ok')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import datetime
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+# 邮件发件箱自测：本地起一个最小的 SMTP 替身（明文、不认证，作用同 aiosmtpd），
+# 验证投递成功、同一批多封复用一个 SMTP 会话、连接被拒后按退避重排、收件人被拒记为永久失败
+# 在独立的测试库里运行（create_test_db），不会动到正式发件箱
+# 在 server 目录下执行：python tests/testMailOutbox.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'server.settings')
+
+STUB = {'connections': 0, 'messages': []}
+STUB_LOCK = threading.Lock()
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """只实现投递用到的命令；收件人地址含 reject 时返回 550"""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode('ascii'))
+
+    def handle(self):
+        with STUB_LOCK:
+            STUB['connections'] += 1
+        self.reply('220 stub ESMTP')
+        rcpts = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line.decode('utf-8', 'replace').strip()
+            verb = cmd[:4].upper()
+            if verb == 'EHLO':
+                self.reply('250-stub')
+                self.reply('250 8BITMIME')
+            elif verb == 'HELO':
+                self.reply('250 stub')
+            elif verb == 'MAIL':
+                rcpts = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                if 'reject' in cmd.lower():
+                    self.reply('550 no such user')
+                else:
+                    rcpts.append(cmd.split(':', 1)[1].strip(' <>'))
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 end with .')
+                body = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b'.\r\n', b'.\n'):
+                        break
+                    body.append(data)
+                with STUB_LOCK:
+                    STUB['messages'].append((rcpts, b''.join(body)))
+                self.reply('250 queued')
+            elif verb in ('RSET', 'NOOP'):
+                rcpts = []
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('502 not implemented')
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def closed_port():
+    # 绑定后立即关闭，得到一个当前没有人监听的端口
+    s = socket.socket()
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+def main():
+    server = SMTPStub(('127.0.0.1', 0), SMTPHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.db import connection
+    from django.utils import timezone
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        from myapp import mailer
+        from myapp.models import MailOutbox
+
+        def session(p=port):
+            return mailer.SMTPSession(server='127.0.0.1', port=p, sender_email='shop@example.com',
+                                      sender_pass='', use_ssl=False, starttls=False, timeout=5)
+
+        # 1. 一批 5 封：全部送达，只建一次 SMTP 连接
+        ids = [mailer.enqueue(f'order {i}', f'buyer{i}@example.com', f'<p>hello {i}</p>').id for i in range(5)]
+        s = session()
+        sent, failed = mailer.deliver_due(s)
+        s.close()
+        assert (sent, failed) == (5, 0), (sent, failed)
+        assert STUB['connections'] == 1, STUB['connections']
+        assert len(STUB['messages']) == 5
+        assert all(MailOutbox.objects.get(id=i).status == 'sent' for i in ids)
+        print(f"投递 5 封：新建 SMTP 连接 {STUB['connections']} 个")
+
+        # 2. 连接被拒：放回队列，按 MAIL_RETRY_BASE_SECONDS 退避，期间不再尝试
+        mail = mailer.enqueue('retry', 'buyer@example.com', 'x')
+        before = timezone.now()
+        sent, failed = mailer.deliver_due(session(closed_port()))
+        mail.refresh_from_db()
+        assert (sent, failed) == (0, 1), (sent, failed)
+        assert mail.status == 'pending' and mail.attempts == 1, (mail.status, mail.attempts)
+        delay = (mail.next_attempt_time - before).total_seconds()
+        assert settings.MAIL_RETRY_BASE_SECONDS - 1 <= delay <= settings.MAIL_RETRY_BASE_SECONDS + 5, delay
+        assert mailer.deliver_due(session()) == (0, 0)
+        print(f'连接被拒：{delay:.0f} 秒后重试，last_error={mail.last_error}')
+
+        # 到期后用可用的服务器补发
+        MailOutbox.objects.filter(id=mail.id).update(next_attempt_time=before - datetime.timedelta(seconds=1))
+        assert mailer.deliver_due(session()) == (1, 0)
+        mail.refresh_from_db()
+        assert mail.status == 'sent' and mail.attempts == 2, (mail.status, mail.attempts)
+
+        # 3. 收件人被拒：永久失败不再重试，同一会话继续发后面的邮件
+        bad = mailer.enqueue('bad', 'reject@example.com', 'x')
+        good = mailer.enqueue('good', 'ok@example.com', 'x')
+        connections = STUB['connections']
+        s = session()
+        sent, failed = mailer.deliver_due(s)
+        s.close()
+        bad.refresh_from_db()
+        good.refresh_from_db()
+        assert (sent, failed) == (1, 1), (sent, failed)
+        assert bad.status == 'failed' and bad.attempts == 1, (bad.status, bad.attempts)
+        assert good.status == 'sent'
+        assert STUB['connections'] == connections + 1, STUB['connections']
+        print(f'收件人被拒：status={bad.status}，后续邮件复用同一连接送达')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        server.shutdown()
+    print('全部通过')
+
+
+if __name__ == '__main__':
+    main()
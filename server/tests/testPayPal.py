@@ -0,0 +1,101 @@
+import os
+import sys
+import threading
+import time
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# PayPal 客户端自测：本地起一个替身服务模拟 /v1/oauth2/token 与下单接口，
+# 验证 token 缓存、并发只换一次 token、提前刷新、401 重试以及连接复用
+# 在 server 目录下执行：python tests/testPayPal.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'server.settings')
+
+STUB = {'token_calls': 0, 'api_calls': 0, 'connections': 0, 'expires_in': 3600, 'revoked': set()}
+STUB_LOCK = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with STUB_LOCK:
+            STUB['connections'] += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        if self.path == '/v1/oauth2/token':
+            time.sleep(0.2)  # 模拟握手+换 token 的耗时，放大并发
+            with STUB_LOCK:
+                STUB['token_calls'] += 1
+                token = f"tok-{STUB['token_calls']}"
+            return self._reply(200, {'access_token': token, 'expires_in': STUB['expires_in']})
+
+        token = (self.headers.get('Authorization') or '').replace('Bearer ', '')
+        with STUB_LOCK:
+            STUB['api_calls'] += 1
+        if token in STUB['revoked']:
+            return self._reply(401, {'error': 'invalid_token'})
+        return self._reply(201, {'id': 'PAYPAL-ORDER', 'token': token})
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['PAYPAL_API_BASE'] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    import django
+    django.setup()
+    from myapp import paypal
+
+    creds = {'client_id': 'id', 'client_secret': 'secret', 'paypal_env': 'sandbox'}
+
+    # 1. 并发 50 个请求只换一次 token
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        results = list(pool.map(lambda _: paypal.get_access_token(**creds), range(50)))
+    assert all(r == ('tok-1', None) for r in results), results
+    assert STUB['token_calls'] == 1, STUB
+    print('并发取 token：只请求了 1 次')
+
+    # 2. 连续 20 次接口调用复用 token 与连接
+    connections_before = STUB['connections']
+    for _ in range(20):
+        resp, err = paypal.api_post('/v2/checkout/orders', json={'intent': 'CAPTURE'}, **creds)
+        assert err is None and resp.status_code == 201, (resp, err)
+    assert STUB['token_calls'] == 1, STUB
+    print(f"20 次下单：token 请求 {STUB['token_calls']} 次，新建连接 {STUB['connections'] - connections_before} 个")
+
+    # 3. token 被吊销：401 后换新 token 重试一次
+    STUB['revoked'].add('tok-1')
+    resp, err = paypal.api_post('/v2/checkout/orders', json={}, **creds)
+    assert err is None and resp.status_code == 201 and resp.json()['token'] == 'tok-2', (resp, err)
+    print('401 重试：已换新 token')
+
+    # 4. 临近过期（小于提前刷新的秒数）时重新获取
+    STUB['expires_in'] = 60
+    paypal.get_access_token(force=True, **creds)  # tok-3，60 秒后过期
+    token, _err = paypal.get_access_token(**creds)
+    assert token == 'tok-4', token
+    print('临近过期：已提前刷新')
+
+    print('统计：', paypal.tokens.stats())
+    server.shutdown()
+    print('全部通过')
+
+
+if __name__ == '__main__':
+    main()
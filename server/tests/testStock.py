@@ -0,0 +1,57 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+
+# 库存并发压测：同一个开启库存跟踪的商品，并发下单，验证成功单数不超过库存（不超卖）
+# 使用前在后台把 THING_ID 对应商品设置为 track_stock=1、stock=INITIAL_STOCK
+BASE_URL = "http://127.0.0.1:8000/myapp"
+THING_ID = 1
+SKU_ID = None  # 压测 SKU 时填写
+INITIAL_STOCK = 50
+QUANTITY = 1  # 每单数量
+
+CONCURRENCY = 50  # 并发数
+TOTAL_REQUESTS = 300  # 总下单请求数
+
+
+async def create_order(session, sem):
+    item = {"thingId": THING_ID, "quantity": QUANTITY}
+    if SKU_ID:
+        item["skuId"] = SKU_ID
+    payload = {"items": [item], "email": "stress@example.com"}
+    async with sem:
+        try:
+            async with session.post(f"{BASE_URL}/shop/order/create", data=json.dumps(payload),
+                                    headers={"Content-Type": "application/json"}, timeout=30) as response:
+                data = await response.json(content_type=None)
+                return data.get("code"), data.get("msg")
+        except Exception as e:
+            return -1, str(e)
+
+
+async def main():
+    start = time.time()
+    sem = asyncio.Semaphore(CONCURRENCY)
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(*(create_order(session, sem) for _ in range(TOTAL_REQUESTS)))
+
+    success = sum(1 for code, _ in results if code == 0)
+    out_of_stock = sum(1 for _, msg in results if msg == '库存不足')
+    errors = sum(1 for code, _ in results if code == -1)
+    sold = success * QUANTITY
+
+    print(f"总请求: {TOTAL_REQUESTS}")
+    print(f"下单成功: {success}（共 {sold} 件）")
+    print(f"库存不足: {out_of_stock}")
+    print(f"请求异常: {errors}")
+    print(f"总耗时: {time.time() - start:.2f}秒")
+    if sold > INITIAL_STOCK:
+        print(f"超卖！成功 {sold} 件 > 库存 {INITIAL_STOCK} 件")
+    else:
+        print(f"未超卖（剩余库存应为 {INITIAL_STOCK - sold}，请在后台核对）")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,12 +1,17 @@
 'use client';
 
 import React, { useEffect, useState } from 'react';
-import { Button, Drawer, Space, Table, Tag, message } from 'antd';
+import { Button, DatePicker, Drawer, Input, Select, Space, Table, Tag, message } from 'antd';
 import axiosInstance from '@/utils/axios';
 
 export default function Page() {
   const [loading, setLoading] = useState(false);
   const [data, setData] = useState([]);
+  const [total, setTotal] = useState(0);
+  const [facets, setFacets] = useState({ status: {}, currency: {} });
+  const [page, setPage] = useState(1);
+  const [pageSize, setPageSize] = useState(20);
+  const [filters, setFilters] = useState({ keyword: '', status: '', currency: '', startDate: '', endDate: '' });
   const [drawerOpen, setDrawerOpen] = useState(false);
   const [detailLoading, setDetailLoading] = useState(false);
   const [detail, setDetail] = useState(null);
@@ -14,15 +19,55 @@ export default function Page() {
   const fetchList = async () => {
     setLoading(true);
     try {
-      const res = await axiosInstance.get('/myapp/admin/order/list');
+      const params = { page, pageSize };
+      Object.keys(filters).forEach((k) => {
+        if (filters[k]) params[k] = filters[k];
+      });
+      const res = await axiosInstance.get('/myapp/admin/order/list', { params });
       if (res?.code === 0) {
         setData(res.data || []);
+        setTotal(res.total || 0);
+        setFacets(res.facets || { status: {}, currency: {} });
       }
     } finally {
       setLoading(false);
     }
   };
 
+  const exportCsv = async () => {
+    try {
+      const params = {};
+      ['keyword', 'status', 'currency', 'startDate', 'endDate'].forEach((k) => {
+        if (filters[k]) params[k] = filters[k];
+      });
+      // 导出是流式下载，不限超时
+      const blob = await axiosInstance.get('/myapp/admin/export/orders', { params, responseType: 'blob', timeout: 0 });
+      if (blob?.type?.includes('json')) {
+        const res = JSON.parse(await blob.text());
+        message.error(res?.msg || '导出失败');
+        return;
+      }
+      const url = URL.createObjectURL(blob);
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = 'orders.csv';
+      a.click();
+      URL.revokeObjectURL(url);
+    } catch (e) {
+      message.error('导出失败');
+    }
+  };
+
+  const changeFilter = (patch) => {
+    setPage(1);
+    setFilters((prev) => ({ ...prev, ...patch }));
+  };
+
+  const facetOptions = (counts) => [
+    { value: '', label: '全部' },
+    ...Object.keys(counts || {}).map((k) => ({ value: k, label: `${k} (${counts[k]})` })),
+  ];
+
   const updateStatus = async (row, status) => {
     try {
       const res = await axiosInstance.post('/myapp/admin/order/updateStatus', { id: row.id, status });
@@ -56,7 +101,7 @@ export default function Page() {
 
   useEffect(() => {
     fetchList();
-  }, []);
+  }, [page, pageSize, filters]);
 
   const columns = [
     { title: '订单号', dataIndex: 'order_no', key: 'order_no', width: 220, ellipsis: true },
@@ -98,7 +143,31 @@ export default function Page() {
       <div className="bg-white rounded-md p-3">
         <div className="flex items-center justify-between pb-3">
           <div className="font-semibold">订单管理</div>
-          <Button onClick={fetchList}>刷新</Button>
+          <Space wrap>
+            <Input.Search
+              allowClear
+              placeholder="订单号"
+              style={{ width: 200 }}
+              onSearch={(v) => changeFilter({ keyword: (v || '').trim() })}
+            />
+            <Select
+              style={{ width: 160 }}
+              value={filters.status}
+              options={facetOptions(facets.status)}
+              onChange={(v) => changeFilter({ status: v })}
+            />
+            <Select
+              style={{ width: 120 }}
+              value={filters.currency}
+              options={facetOptions(facets.currency)}
+              onChange={(v) => changeFilter({ currency: v })}
+            />
+            <DatePicker.RangePicker
+              onChange={(_, dates) => changeFilter({ startDate: dates?.[0] || '', endDate: dates?.[1] || '' })}
+            />
+            <Button onClick={fetchList}>刷新</Button>
+            <Button onClick={exportCsv}>导出CSV</Button>
+          </Space>
         </div>
         <Table
           rowKey={(r) => r.id}
@@ -106,7 +175,16 @@ export default function Page() {
           dataSource={data}
           columns={columns}
           scroll={{ x: 1200 }}
-          pagination={{ pageSize: 20 }}
+          pagination={{
+            current: page,
+            pageSize,
+            total,
+            showTotal: (t) => `共 ${t} 条`,
+            onChange: (p, ps) => {
+              setPage(p);
+              setPageSize(ps);
+            },
+          }}
         />
       </div>
 
@@ -1,28 +1,42 @@
 'use client';
 
 import React, { useEffect, useState } from 'react';
-import { Button, Space, Table, Tag } from 'antd';
+import { Button, DatePicker, Input, Select, Space, Table, Tag } from 'antd';
 import axiosInstance from '@/utils/axios';
 
 export default function Page() {
   const [loading, setLoading] = useState(false);
   const [data, setData] = useState([]);
+  const [total, setTotal] = useState(0);
+  const [page, setPage] = useState(1);
+  const [pageSize, setPageSize] = useState(20);
+  const [filters, setFilters] = useState({ orderNo: '', provider: '', status: '', startDate: '', endDate: '' });
 
   const fetchList = async () => {
     setLoading(true);
     try {
-      const res = await axiosInstance.get('/myapp/admin/payment/list');
+      const params = { page, pageSize };
+      Object.keys(filters).forEach((k) => {
+        if (filters[k]) params[k] = filters[k];
+      });
+      const res = await axiosInstance.get('/myapp/admin/payment/list', { params });
       if (res?.code === 0) {
         setData(res.data || []);
+        setTotal(res.total || 0);
       }
     } finally {
       setLoading(false);
     }
   };
 
+  const changeFilter = (patch) => {
+    setPage(1);
+    setFilters((prev) => ({ ...prev, ...patch }));
+  };
+
   useEffect(() => {
     fetchList();
-  }, []);
+  }, [page, pageSize, filters]);
 
   const columns = [
     { title: '订单号', dataIndex: 'order_no', key: 'order_no', width: 220, ellipsis: true },
@@ -40,7 +54,38 @@ export default function Page() {
       <div className="bg-white rounded-md p-3">
         <div className="flex items-center justify-between pb-3">
           <div className="font-semibold">支付记录</div>
-          <Space>
+          <Space wrap>
+            <Input.Search
+              allowClear
+              placeholder="订单号"
+              style={{ width: 200 }}
+              onSearch={(v) => changeFilter({ orderNo: (v || '').trim() })}
+            />
+            <Select
+              style={{ width: 120 }}
+              value={filters.provider}
+              options={[
+                { value: '', label: '全部渠道' },
+                { value: 'stripe', label: 'stripe' },
+                { value: 'paypal', label: 'paypal' },
+              ]}
+              onChange={(v) => changeFilter({ provider: v })}
+            />
+            <Select
+              style={{ width: 120 }}
+              value={filters.status}
+              options={[
+                { value: '', label: '全部状态' },
+                { value: 'created', label: 'created' },
+                { value: 'pending', label: 'pending' },
+                { value: 'paid', label: 'paid' },
+                { value: 'failed', label: 'failed' },
+              ]}
+              onChange={(v) => changeFilter({ status: v })}
+            />
+            <DatePicker.RangePicker
+              onChange={(_, dates) => changeFilter({ startDate: dates?.[0] || '', endDate: dates?.[1] || '' })}
+            />
             <Button onClick={fetchList}>刷新</Button>
           </Space>
         </div>
@@ -50,7 +95,16 @@ export default function Page() {
           dataSource={data}
           columns={columns}
           scroll={{ x: 1300 }}
-          pagination={{ pageSize: 20 }}
+          pagination={{
+            current: page,
+            pageSize,
+            total,
+            showTotal: (t) => `共 ${t} 条`,
+            onChange: (p, ps) => {
+              setPage(p);
+              setPageSize(ps);
+            },
+          }}
         />
       </div>
     </div>